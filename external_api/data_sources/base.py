@@ -6,9 +6,16 @@ BaseApi (基类)
 """
 import inspect
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, cast
 import os
 
+import aiohttp
+import httpx
+
+from . import fixtures, pipeline, transport
+from .http2 import Http2Session
+from .instrumentation import httpx_event_hooks, session_trace_configs
+
 
 EXCLUDE_METHODS = ['get_capabilities', 'get_api_info', 'source_name', 'get_source_info']
 
@@ -47,6 +54,105 @@ class BaseAPI(ABC):
         """
         pass
 
+    def _client_session(self, **kwargs: Any) -> aiohttp.ClientSession:
+        """
+        创建请求上游使用的 aiohttp 会话
+        会话附带指标采集的 trace hooks，所有数据源都应通过此方法创建会话
+        事件循环通过 transport.open_pool 打开了连接池时，会话共享该连接池
+        请求头按 transport.accept_encoding 协商响应压缩
+        连接池以 HTTP/2 打开时返回共享 HTTP/2 客户端上的 Http2Session
+
+        Returns:
+            aiohttp.ClientSession: 新的会话，调用方负责关闭（async with）；录制/回放模式下为 fixtures 中的对应会话，HTTP/2 时为 Http2Session
+        """
+        # 录制/回放会话实现数据源用到的 ClientSession 接口子集（get/post/request 与 async with）
+        if fixtures.mode == fixtures.REPLAY:
+            return cast(aiohttp.ClientSession, fixtures.ReplaySession(**kwargs))
+        http2_client = transport.get_http2_client()
+        if http2_client is not None and fixtures.mode is None:
+            return cast(aiohttp.ClientSession, Http2Session(http2_client, **kwargs))
+        kwargs = {"headers": {"Accept-Encoding": transport.accept_encoding("aiohttp")}, **transport.session_kwargs(), **kwargs}
+        if fixtures.mode == fixtures.RECORD:
+            return cast(aiohttp.ClientSession, fixtures.RecordingSession(trust_env=True, trace_configs=session_trace_configs(), **kwargs))
+        return aiohttp.ClientSession(trust_env=True, trace_configs=session_trace_configs(), **kwargs)
+
+    def _http_client(self, **kwargs: Any) -> httpx.AsyncClient:
+        """
+        创建请求上游使用的 httpx 客户端（httpx 版本的 _client_session）
+        附带指标采集的 event hooks，录制模式下记录响应，回放模式下由 fixtures 应答
+
+        Returns:
+            httpx.AsyncClient: 新的客户端，调用方负责关闭（async with）
+        """
+        kwargs.setdefault("headers", {"Accept-Encoding": transport.accept_encoding("httpx")})
+        if transport.get_http2_client() is not None:
+            # 连接池以 HTTP/2 打开时，httpx 客户端同样通过 ALPN 协商 HTTP/2
+            kwargs.setdefault("http2", True)
+        event_hooks = httpx_event_hooks()
+        if fixtures.mode == fixtures.RECORD:
+            event_hooks["response"].append(fixtures.record_httpx_response)
+        elif fixtures.mode == fixtures.REPLAY:
+            kwargs["transport"] = httpx.MockTransport(fixtures.replay_httpx_request)
+        return httpx.AsyncClient(event_hooks=event_hooks, **kwargs)
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        json: Any = None,
+        data: Any = None,
+        timeout: Any = None,
+        decode: str = pipeline.DECODE_JSON,
+        keep: Optional[Dict[str, Any]] = None,
+        use_httpx: bool = False,
+        client: Optional[httpx.AsyncClient] = None,
+        idempotent: Optional[bool] = None,
+        cache_ttl: Optional[float] = None,
+    ) -> Any:
+        """
+        通过请求管道请求上游并返回解码后的响应体
+        依次经过缓存、限流、重试、负载日志各阶段（见 pipeline），数据源都应通过此方法请求上游
+        HTTP 错误状态抛出所用客户端的异常（aiohttp.ClientResponseError / httpx.HTTPStatusError），超时抛出 asyncio.TimeoutError
+
+        Args:
+            method: HTTP 方法
+            url: 请求地址
+            params: 查询参数
+            headers: 请求头
+            json: JSON 请求体
+            data: 表单或原始请求体
+            timeout: 超时秒数
+            decode: 响应体解码方式，pipeline.DECODE_JSON / DECODE_LENIENT_JSON / DECODE_BYTES / DECODE_STREAM
+            keep: DECODE_STREAM 时只构建的字段，见 streaming.load_json
+            use_httpx: 通过 _http_client 而不是 _client_session 发送
+            client: 已打开的 httpx 客户端，use_httpx 时复用
+            idempotent: 失败时是否可重试，默认 GET 请求可重试
+            cache_ttl: 响应缓存秒数，默认使用 pipeline_cache_ttl 配置（仅 GET）
+
+        Returns:
+            Any: 解码后的响应体，DECODE_BYTES 时为原始字节
+        """
+        request = pipeline.Request(
+            self,
+            method,
+            url,
+            params=params,
+            headers=headers,
+            json=json,
+            data=data,
+            timeout=timeout,
+            decode=decode,
+            keep=keep,
+            use_httpx=use_httpx,
+            client=client,
+            idempotent=idempotent,
+            cache_ttl=cache_ttl,
+        )
+        return (await pipeline.execute(request)).data
+
     def get_capabilities(self) -> List[Dict[str, Any]]:
         """
         获取数据源所有能力的描述
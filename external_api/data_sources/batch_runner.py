@@ -0,0 +1,232 @@
+"""
+Sharded multi-process batch runner
+
+For large jobs (thousands of symbols, hotels or scholar queries) a single event
+loop becomes CPU-bound on response parsing. ``run_batch`` splits the job list
+into shards and runs them on a process pool; every worker process keeps its own
+event loop with a pooled connector (see ``transport``), its own share of the
+global rate limit (applied to upstream requests by the ``pipeline`` rate_limit
+stage) and concurrency limit. Results are merged back in job order.
+
+With ``checkpoint_dir`` every finished shard is written to disk as soon as it
+completes, so a crashed or interrupted job re-run with the same arguments only
+fetches the shards that are missing, plus the calls of finished shards that
+failed (returned ``{"success": False, ...}`` or raised):
+
+    calls = [("yahoo_finance", "get_stock_info", {"symbol": symbol}) for symbol in symbols]
+    results = run_batch(calls, processes=4, shard_size=50, rate_limit=20, checkpoint_dir="/tmp/stock_info_job")
+
+Worker processes are started with the ``spawn`` method, so scripts calling
+``run_batch`` need an ``if __name__ == "__main__":`` guard.
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import logging
+import multiprocessing
+import multiprocessing.util
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple, cast
+
+from . import pipeline, transport
+from .sync_client import Call
+
+logger = logging.getLogger("data_sources_batch_runner")
+
+# 工作进程状态，由 _init_worker 初始化
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_max_concurrency = 0
+
+
+def _init_worker(rate_limit: Optional[float], max_concurrency: int, pool_size: int) -> None:
+    """工作进程初始化：创建常驻事件循环与连接池，数据源在首个分片时加载"""
+    global _worker_loop, _worker_max_concurrency
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+
+    async def setup() -> None:
+        from .client import config, get_client
+
+        transport.open_pool(limit=pool_size)
+        if rate_limit:
+            # 由请求管道的 rate_limit 阶段限制本进程所有数据源的请求速率；config 只在本进程内修改
+            rate_limits = cast(Dict[str, float], config.get("pipeline_rate_limits") or {})
+            config["pipeline_rate_limits"] = {**rate_limits, pipeline.ALL_SOURCES: rate_limit}
+            get_client()
+
+    _worker_loop.run_until_complete(setup())
+    _worker_max_concurrency = max_concurrency
+    # 工作进程退出时不执行 atexit，需通过 multiprocessing 的 finalizer 关闭连接池
+    multiprocessing.util.Finalize(None, _close_worker, exitpriority=10)
+
+
+def _close_worker() -> None:
+    if _worker_loop is not None and not _worker_loop.is_closed():
+        _worker_loop.run_until_complete(transport.close_pool())
+        _worker_loop.close()
+
+
+def _run_shard(shard_index: int, calls: Sequence[Call]) -> List[Any]:
+    """在工作进程中执行一个分片，返回与 calls 顺序一致的结果"""
+    if _worker_loop is None:
+        raise RuntimeError("Batch worker process is not initialized")
+    return _worker_loop.run_until_complete(_run_shard_async(shard_index, calls))
+
+
+async def _run_shard_async(shard_index: int, calls: Sequence[Call]) -> List[Any]:
+    from .client import get_client
+
+    client = get_client()
+    semaphore = asyncio.Semaphore(max(1, _worker_max_concurrency))
+
+    async def run(source_name: str, method_name: str, kwargs: Dict[str, Any]) -> Any:
+        async with semaphore:
+            try:
+                return _to_serializable(await getattr(client.__getattr__(source_name), method_name)(**kwargs))
+            except Exception as e:
+                logger.error(f"Batch call {source_name}.{method_name} failed in shard {shard_index}: {str(e)}")
+                return {"success": False, "error": str(e)}
+
+    return await asyncio.gather(*(run(*call) for call in calls))
+
+
+def _failed(result: Any) -> bool:
+    """调用是否失败（返回 success 为 False，或抛出异常），失败的调用在恢复任务时重试"""
+    return isinstance(result, dict) and result.get("success") is False
+
+
+def _to_serializable(value: Any) -> Any:
+    """将紧凑记录等转换为可 JSON 序列化、可跨进程传递的结构"""
+    return json.loads(json.dumps(value, ensure_ascii=False, default=lambda item: item.to_dict() if hasattr(item, "to_dict") else str(item)))
+
+
+def _job_id(calls: Sequence[Call], shard_size: int) -> str:
+    payload = json.dumps([list(call) for call in calls], sort_keys=True, default=str)
+    return hashlib.sha1(f"{shard_size}:{payload}".encode("utf-8")).hexdigest()
+
+
+class _Checkpoint:
+    """分片结果的检查点目录：manifest.json 记录任务标识，每个完成的分片一个 shard-XXXXX.json"""
+
+    def __init__(self, path: str, job_id: str, shards: int):
+        self.path = path
+        self.job_id = job_id
+        os.makedirs(path, exist_ok=True)
+        manifest_path = os.path.join(path, "manifest.json")
+        manifest = None
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        if manifest is not None and manifest.get("job") != job_id:
+            raise ValueError(f"Checkpoint directory {path} belongs to a different job, use a new directory or remove it")
+        if manifest is None:
+            self._write(manifest_path, {"job": job_id, "shards": shards, "created_at": time.time()})
+
+    def _shard_path(self, shard_index: int) -> str:
+        return os.path.join(self.path, f"shard-{shard_index:05d}.json")
+
+    def load(self, shard_index: int) -> Optional[List[Any]]:
+        try:
+            with open(self._shard_path(shard_index), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logger.warning(f"Ignoring corrupt checkpoint of shard {shard_index}: {str(e)}")
+            return None
+
+    def save(self, shard_index: int, results: List[Any]) -> None:
+        self._write(self._shard_path(shard_index), results)
+
+    @staticmethod
+    def _write(path: str, data: Any) -> None:
+        # 先写临时文件再替换，避免进程中断留下不完整的检查点
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def run_batch(
+    calls: Sequence[Call],
+    processes: Optional[int] = None,
+    shard_size: int = 100,
+    rate_limit: Optional[float] = None,
+    max_concurrency: int = 20,
+    pool_size: int = 100,
+    checkpoint_dir: Optional[str] = None,
+) -> List[Any]:
+    """
+    Run data source calls sharded across a process pool
+
+    Args:
+        calls: (source name, method name, keyword arguments) tuples
+        processes: Number of worker processes, defaults to the CPU count
+        shard_size: Number of calls per shard (the unit of scheduling and checkpointing)
+        rate_limit: Maximum upstream requests per second over all processes and sources, None for no limit; each process gets an equal share
+        max_concurrency: Maximum calls in flight per process
+        pool_size: Maximum pooled upstream connections per process
+        checkpoint_dir: Directory to persist finished shards to and resume from, None to disable checkpointing
+
+    Returns:
+        List[Any]: Return values in the order of ``calls``; a call that raised is reported as {"success": False, "error": ...}
+
+    Raises:
+        concurrent.futures.process.BrokenProcessPool: A worker process died; finished shards are checkpointed
+    """
+    calls = [(source_name, method_name, dict(kwargs)) for source_name, method_name, kwargs in calls]
+    if shard_size < 1:
+        raise ValueError("shard_size must be at least 1")
+    shards = [calls[start : start + shard_size] for start in range(0, len(calls), shard_size)]
+    processes = max(1, min(processes or os.cpu_count() or 1, len(shards) or 1))
+
+    checkpoint = _Checkpoint(checkpoint_dir, _job_id(calls, shard_size), len(shards)) if checkpoint_dir else None
+    results: List[Optional[List[Any]]] = [None] * len(shards)
+    # (分片序号, 需要执行的分片内调用序号)
+    pending: List[Tuple[int, List[int]]] = []
+    for shard_index, shard in enumerate(shards):
+        loaded = checkpoint.load(shard_index) if checkpoint is not None else None
+        if loaded is None or len(loaded) != len(shard):
+            pending.append((shard_index, list(range(len(shard)))))
+            continue
+        results[shard_index] = loaded
+        failed = [call_index for call_index, result in enumerate(loaded) if _failed(result)]
+        if failed:
+            pending.append((shard_index, failed))
+    if checkpoint is not None:
+        resumed = sum(result is not None for result in results)
+        if resumed:
+            retried = sum(len(indices) for shard_index, indices in pending if results[shard_index] is not None)
+            logger.info(f"Resuming batch job from {checkpoint_dir}: {resumed}/{len(shards)} shards already done, retrying {retried} failed calls")
+
+    if pending:
+        per_process_rate = rate_limit / processes if rate_limit else None
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(per_process_rate, max_concurrency, pool_size),
+        ) as pool:
+            futures = {
+                pool.submit(_run_shard, shard_index, [shards[shard_index][call_index] for call_index in indices]): (shard_index, indices)
+                for shard_index, indices in pending
+            }
+            for future in concurrent.futures.as_completed(futures):
+                shard_index, indices = futures[future]
+                shard_results = results[shard_index] or [None] * len(shards[shard_index])
+                for call_index, result in zip(indices, future.result()):
+                    shard_results[call_index] = result
+                results[shard_index] = shard_results
+                # 失败的调用同样写入检查点，恢复任务时只重试这些调用
+                if checkpoint is not None:
+                    checkpoint.save(shard_index, shard_results)
+                failed_calls = sum(_failed(result) for result in shard_results)
+                logger.info(f"Batch shard {shard_index + 1}/{len(shards)} done" + (f", {failed_calls} failed calls" if failed_calls else ""))
+
+    # 每个分片或从检查点完整加载，或已执行完毕（future.result() 出错时已抛出异常）
+    if any(shard is None for shard in results):
+        raise RuntimeError("Batch finished with missing shard results")
+    return [result for shard in cast(List[List[Any]], results) for result in shard]
@@ -0,0 +1,14 @@
+"""
+Offline benchmarks for the data sources
+
+``mock_upstream`` serves recorded-shape payloads of every upstream API behind a
+local aiohttp server with configurable latency and jitter; ``run`` drives the
+data source methods against it and reports throughput, latency percentiles and
+memory per method, so performance work can be validated without network access:
+
+    python -m external_api.data_sources.benchmarks.run --requests 200 --concurrency 20
+"""
+
+from .mock_upstream import MockUpstream, create_app
+
+__all__ = ["MockUpstream", "create_app"]
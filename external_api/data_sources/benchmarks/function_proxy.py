@@ -0,0 +1,201 @@
+"""
+Load test of the FunctionProxy -> function server path
+
+Starts a stub function server (``/execute`` and ``/execute_batch``) with
+configurable latency on a local port, drives ``FunctionProxy.__call__`` with a
+range of concurrency levels for each transport (``per_call`` session,
+``pooled`` connections, ``batched`` requests) and reports throughput and
+latency percentiles, marking the level at which throughput saturates:
+
+    python -m external_api.data_sources.benchmarks.function_proxy
+    python -m external_api.data_sources.benchmarks.function_proxy -t pooled -t batched -c 1,16,64,256 --latency-ms 5
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import time
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from ...function_utils import PROXY_TRANSPORTS, FunctionProxy, close_function_transports
+from ..metrics import LatencyHistogram
+
+# 吞吐量达到最大值的该比例即视为饱和
+SATURATION_RATIO = 0.9
+
+
+def create_stub_app(latency_ms: float = 1, jitter_ms: float = 0, batch_endpoint: bool = True, seed: Optional[int] = None) -> web.Application:
+    """
+    Create a stub function server
+
+    Args:
+        latency_ms: Base latency of each /execute request (and of each /execute_batch request as a whole)
+        jitter_ms: Maximum random deviation of the latency
+        batch_endpoint: Whether to serve /execute_batch; without it the batched transport falls back to /execute
+        seed: Seed of the jitter generator
+
+    Returns:
+        web.Application: The stub application
+    """
+    rng = random.Random(seed)
+
+    async def delay() -> None:
+        value = latency_ms + rng.uniform(-jitter_ms, jitter_ms) if jitter_ms else latency_ms
+        if value > 0:
+            await asyncio.sleep(value / 1000)
+
+    def execute_one(request: Dict[str, Any]) -> Dict[str, Any]:
+        return {"is_error": False, "message": json.dumps({"function": request.get("function_name"), "parameters": request.get("parameters")})}
+
+    async def execute(request: web.Request) -> web.Response:
+        payload = await request.json()
+        await delay()
+        return web.json_response(execute_one(payload))
+
+    async def execute_batch(request: web.Request) -> web.Response:
+        payload = await request.json()
+        await delay()
+        return web.json_response({"results": [execute_one(item) for item in payload["requests"]]})
+
+    app = web.Application()
+    app.router.add_post("/execute", execute)
+    if batch_endpoint:
+        app.router.add_post("/execute_batch", execute_batch)
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _drive(proxy: FunctionProxy, requests: int, concurrency: int) -> Dict[str, Any]:
+    histogram = LatencyHistogram()
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in remaining:
+            started = time.perf_counter()
+            result = await proxy(query=f"load test {i}")
+            histogram.record(time.perf_counter() - started)
+            errors += int(result.is_error)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, requests)))))
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": requests / elapsed if elapsed else 0.0,
+        "latency": histogram.to_dict(),
+    }
+
+
+async def run_load_test(
+    transports: Optional[List[str]] = None,
+    concurrency_levels: Optional[List[int]] = None,
+    requests: int = 2000,
+    latency_ms: float = 1,
+    jitter_ms: float = 0,
+    batch_endpoint: bool = True,
+    seed: Optional[int] = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Load test every transport at every concurrency level against a local stub server
+
+    Args:
+        transports: Transports to compare, None for all of ``PROXY_TRANSPORTS``
+        concurrency_levels: Concurrency levels to sweep, default [1, 8, 32, 128, 512]
+        requests: Calls per (transport, concurrency) run
+        latency_ms: Stub server latency in milliseconds
+        jitter_ms: Stub server latency jitter in milliseconds
+        batch_endpoint: Whether the stub serves /execute_batch
+        seed: Seed of the stub latency jitter
+
+    Returns:
+        List[Dict[str, Any]]: One entry per transport, e.g.
+        {"transport": "pooled", "saturation_concurrency": 32, "runs": [{"concurrency": 1, "throughput_rps": 610.2, "latency": {...}, "errors": 0}, ...]}
+    """
+    transports = transports or list(PROXY_TRANSPORTS)
+    unknown = [transport for transport in transports if transport not in PROXY_TRANSPORTS]
+    if unknown:
+        raise ValueError(f"Unknown transports: {', '.join(unknown)}; available: {', '.join(PROXY_TRANSPORTS)}")
+    concurrency_levels = concurrency_levels or [1, 8, 32, 128, 512]
+
+    runner = web.AppRunner(create_stub_app(latency_ms, jitter_ms, batch_endpoint, seed), access_log=None)
+    await runner.setup()
+    # FunctionProxy 固定访问 localhost，需同时监听 IPv4/IPv6 的同一端口
+    port = _free_port()
+    await web.TCPSite(runner, "localhost", port, reuse_address=True).start()
+
+    results = []
+    try:
+        for transport in transports:
+            proxy = FunctionProxy({"name": "load_test", "parameters": [{"name": "query"}]})
+            proxy.server_port = port
+            proxy.transport = transport
+
+            # 预热连接
+            await proxy(query="warm up")
+            runs = [await _drive(proxy, requests, concurrency) for concurrency in concurrency_levels]
+            await close_function_transports()
+
+            peak = max(run["throughput_rps"] for run in runs)
+            saturation = next(run["concurrency"] for run in runs if run["throughput_rps"] >= peak * SATURATION_RATIO)
+            results.append({"transport": transport, "saturation_concurrency": saturation, "peak_throughput_rps": peak, "runs": runs})
+    finally:
+        await runner.cleanup()
+    return results
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    """Render load test results as a plain text table"""
+    header = f"{'transport':<10} {'conc':>6} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}"
+    lines = [header, "-" * len(header)]
+    for result in results:
+        for run in result["runs"]:
+            latency = run["latency"]
+            marker = "  <- saturates" if run["concurrency"] == result["saturation_concurrency"] else ""
+            lines.append(
+                f"{result['transport']:<10} {run['concurrency']:>6} {run['throughput_rps']:>10.1f} {latency['p50_ms']:>9.2f} "
+                f"{latency['p99_ms']:>9.2f} {latency['max_ms']:>9.2f} {run['errors']:>7}{marker}"
+            )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test FunctionProxy against a local stub function server")
+    parser.add_argument("-t", "--transport", action="append", dest="transports", help=f"Transport to test (repeatable), one of: {', '.join(PROXY_TRANSPORTS)}")
+    parser.add_argument("-c", "--concurrency", default="1,8,32,128,512", help="Comma separated concurrency levels")
+    parser.add_argument("-n", "--requests", type=int, default=2000, help="Calls per concurrency level")
+    parser.add_argument("--latency-ms", type=float, default=1, help="Stub server latency")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Stub server latency jitter")
+    parser.add_argument("--no-batch-endpoint", action="store_true", help="Do not serve /execute_batch")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the latency jitter")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(
+        run_load_test(
+            transports=args.transports,
+            concurrency_levels=[int(level) for level in args.concurrency.split(",") if level.strip()],
+            requests=args.requests,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            batch_endpoint=not args.no_batch_endpoint,
+            seed=args.seed,
+        )
+    )
+    print(json.dumps(results, indent=2) if args.json else format_table(results))
+
+
+if __name__ == "__main__":
+    main()
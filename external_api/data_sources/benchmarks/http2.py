@@ -0,0 +1,293 @@
+"""
+Compare the pooled HTTP/1.1 transport with the HTTP/2 transport under fan-out
+
+Serves the mock upstream payloads twice on local ports, once over HTTP/1.1
+(the aiohttp mock) and once over cleartext HTTP/2 (a small h2 server), both
+with the same latency. Each scenario is then called with a large number of
+calls in flight on one event loop, first through a pooled aiohttp connector
+and then through the shared HTTP/2 client (``transport.open_pool(http2=True)``),
+and throughput, latency percentiles and the number of upstream connections
+used are reported:
+
+    python -m external_api.data_sources.benchmarks.http2
+    python -m external_api.data_sources.benchmarks.http2 -s yahoo_finance.get_stock_price -c 64,256 --latency-ms 50 --h1-pool 32
+
+Needs the optional ``h2`` package.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple, cast
+
+from aiohttp import web
+
+from .. import transport
+from ..client import config
+from ..http2 import available as http2_available
+from .mock_upstream import ROUTES, create_app
+from .run import SCENARIOS, _drive
+
+DEFAULT_SCENARIOS = ["yahoo_finance.get_stock_price", "twitter.search_tweets", "booking.search_hotel_details"]
+
+
+class _H2Protocol(asyncio.Protocol):
+    """最小的明文 HTTP/2 服务端（prior knowledge），按路径返回预先编码的响应体"""
+
+    def __init__(self, server: "H2MockUpstream"):
+        import h2.config
+        import h2.connection
+
+        self._server = server
+        self._conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False, header_encoding="utf-8"))
+        self._transport: Optional[asyncio.Transport] = None
+        self._paths: Dict[int, str] = {}
+        # 等待流控窗口的流
+        self._window_waiters: Dict[int, asyncio.Future] = {}
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._transport = cast(asyncio.Transport, transport)
+        self._server.connections += 1
+        self._conn.initiate_connection()
+        self._flush()
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        for waiter in self._window_waiters.values():
+            if not waiter.done():
+                waiter.cancel()
+
+    def _flush(self) -> None:
+        data = self._conn.data_to_send()
+        if data and self._transport is not None and not self._transport.is_closing():
+            self._transport.write(data)
+
+    def data_received(self, data: bytes) -> None:
+        import h2.events
+
+        for event in self._conn.receive_data(data):
+            if isinstance(event, h2.events.RequestReceived):
+                # header_encoding 为 utf-8 时头部已解码为 str
+                self._paths[event.stream_id] = cast(Dict[str, str], dict(event.headers or []))[":path"]
+            elif isinstance(event, h2.events.DataReceived):
+                self._conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+            elif isinstance(event, h2.events.StreamEnded):
+                asyncio.ensure_future(self._respond(event.stream_id))
+            elif isinstance(event, h2.events.WindowUpdated):
+                # stream_id 为 0 时是连接级窗口，唤醒所有等待的流
+                for stream_id, waiter in list(self._window_waiters.items()):
+                    if (event.stream_id in (0, stream_id)) and not waiter.done():
+                        waiter.set_result(None)
+            elif isinstance(event, h2.events.StreamReset):
+                reset_waiter = self._window_waiters.get(event.stream_id)
+                if reset_waiter is not None and not reset_waiter.done():
+                    reset_waiter.cancel()
+            elif isinstance(event, h2.events.ConnectionTerminated) and self._transport is not None:
+                self._transport.close()
+        self._flush()
+
+    async def _respond(self, stream_id: int) -> None:
+        path = self._paths.pop(stream_id, "/").split("?", 1)[0]
+        await self._server.delay()
+        body = self._server.body(path)
+        status = "200" if body is not None else "404"
+        body = body if body is not None else b'{"message": "Not found"}'
+        self._conn.send_headers(stream_id, [(":status", status), ("content-type", "application/json"), ("content-length", str(len(body)))])
+        try:
+            while body:
+                window = min(self._conn.local_flow_control_window(stream_id), self._conn.max_outbound_frame_size)
+                if window <= 0:
+                    self._flush()
+                    waiter = self._window_waiters[stream_id] = asyncio.get_running_loop().create_future()
+                    await waiter
+                    continue
+                self._conn.send_data(stream_id, body[:window])
+                body = body[window:]
+            self._conn.end_stream(stream_id)
+        except asyncio.CancelledError:
+            return
+        finally:
+            self._window_waiters.pop(stream_id, None)
+        self._flush()
+
+
+class H2MockUpstream:
+    """The mock upstream payloads served over cleartext HTTP/2 on a local port"""
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, items: int = 50, seed: Optional[int] = None):
+        self._latency_ms = latency_ms
+        self._jitter_ms = jitter_ms
+        self._rng = random.Random(seed)
+        self._routes: List[Tuple[re.Pattern, bytes]] = [
+            (re.compile("^" + re.sub(r"\\{[^/]+\\}", "[^/]+", path) + "$"), json.dumps(factory(items)).encode("utf-8")) for path, factory in ROUTES.items()
+        ]
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.connections = 0
+        self.url = ""
+
+    def body(self, path: str) -> Optional[bytes]:
+        for pattern, body in self._routes:
+            if pattern.match(path):
+                return body
+        return None
+
+    async def delay(self) -> None:
+        value = self._latency_ms + self._rng.uniform(-self._jitter_ms, self._jitter_ms) if self._jitter_ms else self._latency_ms
+        if value > 0:
+            await asyncio.sleep(value / 1000)
+
+    async def __aenter__(self) -> "H2MockUpstream":
+        self._server = await asyncio.get_running_loop().create_server(lambda: _H2Protocol(self), "127.0.0.1", 0)
+        self.url = f"http://127.0.0.1:{self._server.sockets[0].getsockname()[1]}"
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+class _H1MockUpstream:
+    """HTTP/1.1 mock upstream counting the distinct client connections it served"""
+
+    def __init__(self, latency_ms: float, jitter_ms: float, items: int, seed: Optional[int]):
+        self._app = create_app(latency_ms=latency_ms, jitter_ms=jitter_ms, items=items, seed=seed)
+        self._peers: Set[Any] = set()
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+        @web.middleware
+        async def count_connections(request: web.Request, handler: Any) -> web.StreamResponse:
+            if request.transport is not None:
+                self._peers.add(request.transport.get_extra_info("peername"))
+            return await handler(request)
+
+        self._app.middlewares.insert(0, count_connections)
+
+    @property
+    def connections(self) -> int:
+        return len(self._peers)
+
+    async def __aenter__(self) -> "_H1MockUpstream":
+        self._runner = web.AppRunner(self._app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        self.url = f"http://127.0.0.1:{self._runner.addresses[0][1]}"
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+async def _run(name: str, proxy_url: str, requests: int, concurrency: int) -> Dict[str, Any]:
+    source_cls, method_name, kwargs = SCENARIOS[name]
+    method = getattr(source_cls(dict(config, external_api_proxy_url=proxy_url)), method_name)
+    histogram, errors, elapsed = await _drive(name, method, kwargs, requests, concurrency)
+    return {"errors": errors, "throughput_rps": requests / elapsed if elapsed else 0.0, "latency": histogram.to_dict()}
+
+
+async def run_comparison(
+    scenarios: Optional[List[str]] = None,
+    concurrency_levels: Optional[List[int]] = None,
+    requests: int = 1000,
+    latency_ms: float = 20,
+    jitter_ms: float = 5,
+    items: int = 50,
+    h1_pool: int = 100,
+    h2_connections: int = 4,
+    seed: Optional[int] = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Run every scenario at every concurrency level over pooled HTTP/1.1 and over HTTP/2
+
+    Args:
+        scenarios: Scenario names of ``run.SCENARIOS``, default DEFAULT_SCENARIOS
+        concurrency_levels: Calls in flight, default [16, 64, 256]
+        requests: Calls per run
+        latency_ms: Mock upstream latency in milliseconds
+        jitter_ms: Mock upstream latency jitter in milliseconds
+        items: Records per mock list payload
+        h1_pool: Connection limit of the HTTP/1.1 pool
+        h2_connections: Connection limit of the HTTP/2 client
+        seed: Seed of the mock latency jitter
+
+    Returns:
+        List[Dict[str, Any]]: One entry per (scenario, concurrency, transport), e.g.
+        {"scenario": ..., "concurrency": 64, "transport": "http2", "connections": 1, "throughput_rps": 1520.4, "latency": {...}, "errors": 0}
+    """
+    if not http2_available():
+        raise RuntimeError("The h2 package is required for the HTTP/2 benchmark")
+    names = scenarios or DEFAULT_SCENARIOS
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(unknown)}; available: {', '.join(SCENARIOS)}")
+    concurrency_levels = concurrency_levels or [16, 64, 256]
+
+    results = []
+    for name in names:
+        for concurrency in concurrency_levels:
+            for transport_name in ("http1_pooled", "http2"):
+                use_http2 = transport_name == "http2"
+                upstream = H2MockUpstream(latency_ms, jitter_ms, items, seed) if use_http2 else _H1MockUpstream(latency_ms, jitter_ms, items, seed)
+                async with upstream:
+                    transport.open_pool(limit=h1_pool, http2=use_http2, http2_connections=h2_connections, http2_prior_knowledge=True)
+                    try:
+                        # 预热：建立连接并触发惰性导入，不计入结果
+                        await _run(name, upstream.url, min(concurrency, requests), concurrency)
+                        result = await _run(name, upstream.url, requests, concurrency)
+                    finally:
+                        await transport.close_pool()
+                    results.append({"scenario": name, "concurrency": concurrency, "transport": transport_name, "connections": upstream.connections, **result})
+    return results
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    """Render comparison results as a plain text table"""
+    header = f"{'scenario':<36} {'conc':>5} {'transport':<13} {'conns':>6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}"
+    lines = [header, "-" * len(header)]
+    for result in results:
+        latency = result["latency"]
+        lines.append(
+            f"{result['scenario']:<36} {result['concurrency']:>5} {result['transport']:<13} {result['connections']:>6} {result['throughput_rps']:>9.1f} "
+            f"{latency['p50_ms']:>9.2f} {latency['p99_ms']:>9.2f} {result['errors']:>7}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare pooled HTTP/1.1 and HTTP/2 upstream transports under fan-out")
+    parser.add_argument("-s", "--scenario", action="append", dest="scenarios", help=f"Scenario to run (repeatable), default: {', '.join(DEFAULT_SCENARIOS)}")
+    parser.add_argument("-c", "--concurrency", default="16,64,256", help="Comma separated concurrency levels")
+    parser.add_argument("-n", "--requests", type=int, default=1000, help="Calls per run")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Mock upstream base latency")
+    parser.add_argument("--jitter-ms", type=float, default=5, help="Mock upstream latency jitter")
+    parser.add_argument("--items", type=int, default=50, help="Records per mock list payload")
+    parser.add_argument("--h1-pool", type=int, default=100, help="Connection limit of the HTTP/1.1 pool")
+    parser.add_argument("--h2-connections", type=int, default=4, help="Connection limit of the HTTP/2 client")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the latency jitter")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    results = asyncio.run(
+        run_comparison(
+            scenarios=args.scenarios,
+            concurrency_levels=[int(level) for level in args.concurrency.split(",") if level.strip()],
+            requests=args.requests,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            items=args.items,
+            h1_pool=args.h1_pool,
+            h2_connections=args.h2_connections,
+            seed=args.seed,
+        )
+    )
+    print(json.dumps(results, indent=2) if args.json else format_table(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,482 @@
+"""
+Local mock of the external-api proxy
+
+Every route returns a payload with the same shape as the real upstream response
+(chart data, flightOffers, hotels, tweets, organic results, ...), sized by
+``items``. Payloads are generated once per route and served from memory so the
+benchmark measures the data sources, not the mock.
+"""
+
+import asyncio
+import gzip
+import json
+import random
+from typing import Any, Callable, Dict, Optional
+
+from aiohttp import web
+
+BASE_TIMESTAMP = 1735689600  # 2025-01-01 00:00:00 UTC
+
+
+def _flight_offers(items: int) -> Dict[str, Any]:
+    offers = []
+    for i in range(items):
+        legs = []
+        for j in range(2):
+            legs.append(
+                {
+                    "departureTime": f"2025-06-01T{8 + j * 4:02d}:{i % 60:02d}:00",
+                    "arrivalTime": f"2025-06-01T{11 + j * 4:02d}:{i % 60:02d}:00",
+                    "departureAirport": {"code": "PVG" if j == 0 else "NRT", "name": "Departure Airport"},
+                    "arrivalAirport": {"code": "NRT" if j == 0 else "LAX", "name": "Arrival Airport"},
+                    "totalTime": 10800 + j * 600,
+                    "flightInfo": {"flightNumber": 100 + i, "carrierInfo": {"marketingCarrier": "MU", "operatingCarrier": "MU"}},
+                    "flightStops": [],
+                }
+            )
+        offers.append(
+            {
+                "token": f"offer-{i}",
+                "segments": [{"legs": legs}],
+                "priceBreakdown": {"total": {"currencyCode": "USD", "units": 400 + i, "nanos": 500000000}},
+            }
+        )
+    return {"status": True, "message": "Success", "data": {"flightOffers": offers}}
+
+
+def _destinations(items: int) -> Dict[str, Any]:
+    return {
+        "status": True,
+        "message": "Success",
+        "data": [
+            {
+                "dest_id": str(-1924465 - i),
+                "search_type": "city",
+                "name": f"City {i}",
+                "city_name": f"City {i}",
+                "label": f"City {i}, Area, Country",
+                "longitude": 121.4763,
+                "latitude": 31.229422,
+                "country": "Country",
+            }
+            for i in range(max(1, min(items, 10)))
+        ],
+    }
+
+
+def _hotels(items: int) -> Dict[str, Any]:
+    hotels = []
+    for i in range(items):
+        hotels.append(
+            {
+                "hotel_id": 191605 + i,
+                "property": {
+                    "name": f"Hotel {i}",
+                    "accuratePropertyClass": 4,
+                    "reviewScore": 8.5,
+                    "reviewCount": 1200 + i,
+                    "latitude": 31.23,
+                    "longitude": 121.47,
+                    "priceBreakdown": {"grossPrice": {"currency": "USD", "value": 180.0 + i}},
+                },
+            }
+        )
+    return {"status": True, "message": "Success", "data": {"hotels": hotels}}
+
+
+def _hotel_details(items: int) -> Dict[str, Any]:
+    rooms = {}
+    for i in range(items):
+        rooms[str(19160501 + i)] = {
+            "description": "Spacious room with city view. " * 4,
+            "photos": [{"url_max1280": f"https://example.com/rooms/{i}/{j}.jpg"} for j in range(5)],
+            "children_and_beds_text": {"allow_children": 1, "children_at_the_property": [{"text": "Children of any age are welcome."}]},
+            "bed_configurations": [{"bed_types": [{"name_with_count": "1 king bed", "description": "King bed"}]}],
+        }
+    return {
+        "status": True,
+        "message": "Success",
+        "data": {
+            "hotel_id": 191605,
+            "hotel_name": "Mock Hotel",
+            "url": "https://example.com/hotel/191605",
+            "review_nr": 1200,
+            "raw_data": {"reviewScore": 8.5},
+            "arrival_date": "2025-06-01",
+            "departure_date": "2025-06-03",
+            "latitude": 31.23,
+            "longitude": 121.47,
+            "address": "1 Mock Road",
+            "city": "Shanghai",
+            "district": "Huangpu",
+            "countrycode": "cn",
+            "country_trans": "China",
+            "currency_code": "USD",
+            "zip": "200000",
+            "timezone": "Asia/Shanghai",
+            "facilities_block": {"facilities": [{"name": f"Facility {j}"} for j in range(20)]},
+            "hotel_important_information_with_codes": [{"phrase": f"Important information {j}"} for j in range(5)],
+            "spoken_languages": ["en-gb", "zh-cn"],
+            "rooms": rooms,
+        },
+    }
+
+
+def _chart(items: int) -> Dict[str, Any]:
+    rng = random.Random(items)
+    close = [round(100 + rng.uniform(-5, 5), 2) for _ in range(items)]
+    return {
+        "chart": {
+            "result": [
+                {
+                    "meta": {"currency": "USD", "symbol": "MOCK"},
+                    "timestamp": [BASE_TIMESTAMP + i * 86400 for i in range(items)],
+                    "indicators": {
+                        "quote": [
+                            {
+                                "open": close,
+                                "high": [value + 1 for value in close],
+                                "low": [value - 1 for value in close],
+                                "close": close,
+                                "volume": [1_000_000 + i for i in range(items)],
+                            }
+                        ]
+                    },
+                }
+            ],
+            "error": None,
+        }
+    }
+
+
+def _twitter_user(i: int) -> Dict[str, Any]:
+    return {
+        "user_id": 44196397 + i,
+        "username": f"user{i}",
+        "name": f"User {i}",
+        "creation_date": "Tue Jun 02 20:12:29 +0000 2009",
+        "description": "Mock account",
+        "location": "Earth",
+        "external_url": "https://example.com",
+        "profile_pic_url": "https://example.com/avatar.jpg",
+        "profile_banner_url": "https://example.com/banner.jpg",
+        "follower_count": 1000 + i,
+        "following_count": 100,
+        "number_of_tweets": 5000,
+        "listed_count": 10,
+        "favourites_count": 200,
+        "is_verified": False,
+        "is_blue_verified": True,
+        "is_private": False,
+        "bot": False,
+    }
+
+
+def _tweets(items: int) -> Dict[str, Any]:
+    results = []
+    for i in range(items):
+        results.append(
+            {
+                "tweet_id": str(1900000000000000000 + i),
+                "creation_date": "Thu Mar 13 18:08:35 +0000 2025",
+                "text": f"Mock tweet number {i} about markets and travel. " * 2,
+                "language": "en",
+                "media_url": [f"https://example.com/media/{i}.jpg"],
+                "video_url": None,
+                "retweet_count": i,
+                "reply_count": i // 2,
+                "favorite_count": i * 3,
+                "quote_count": 1,
+                "views": 1000 + i,
+                "bookmark_count": 2,
+                "user": _twitter_user(i % 10),
+            }
+        )
+    return {"results": results, "continuation_token": "mock-continuation-token"}
+
+
+def _organic(items: int) -> Dict[str, Any]:
+    return {
+        "organic": [
+            {
+                "title": f"Mock result {i}",
+                "snippet": "A recorded-shape snippet of a search result. " * 3,
+                "link": f"https://example.com/result/{i}",
+                "publicationInfo": "A Author, B Author - Journal, 2024",
+                "year": 2024,
+                "citedBy": i,
+                "pdfUrl": f"https://example.com/result/{i}.pdf",
+                "priorityDate": "2020-01-01",
+                "filingDate": "2020-06-01",
+                "grantDate": "2022-01-01",
+                "inventor": "A Inventor",
+                "assignee": "Mock Inc.",
+                "publicationNumber": f"US{10000000 + i}B2",
+            }
+            for i in range(items)
+        ]
+    }
+
+
+def _pins(items: int) -> Dict[str, Any]:
+    return {
+        "data": [
+            {
+                "id": str(750412494069279813 + i),
+                "title": f"Mock pin {i}",
+                "description": "Recorded-shape pin description",
+                "alt_text": "alt",
+                "auto_alt_text": "auto alt",
+                "images": {"orig": {"url": f"https://example.com/pins/{i}.jpg"}},
+                "reaction_counts": {"1": i},
+                "pinner": {
+                    "id": "750412494069279813",
+                    "image_large_url": "https://example.com/pinner.jpg",
+                    "follower_count": 2385,
+                    "username": "pinner",
+                    "full_name": "Pinner",
+                },
+            }
+            for i in range(items)
+        ],
+        "nextPageCursor": "mock-cursor",
+    }
+
+
+def _pinterest_users(items: int) -> Dict[str, Any]:
+    return {
+        "data": [
+            {
+                "id": "750412494069279813",
+                "full_name": "Pinner",
+                "username": "pinner",
+                "image_large_url": "https://example.com/pinner.jpg",
+                "pin_count": 6459,
+                "follower_count": 2385,
+                "last_pin_save_time": "Fri, 25 Apr 2025 01:31:38 +0000",
+                "recent_pin_images": {"192x": [{"url": f"https://example.com/recent/{i}.jpg"} for i in range(min(items, 10))]},
+            }
+        ]
+    }
+
+
+def _commodities_supported(items: int) -> Dict[str, Any]:
+    return {
+        "success": True,
+        "supported_commodities": {f"C{i:03d}": f"Commodity {i}" for i in range(items)},
+        "supported_currencies": {"USD": "US Dollar", "EUR": "Euro"},
+    }
+
+
+def _commodities_market_data(items: int) -> Dict[str, Any]:
+    return {
+        "success": True,
+        "base_currency": "USD",
+        "rates": {f"C{i:03d}": {"open": 9270, "high": 9633, "low": 9201, "prev": 9288, "current": 9590} for i in range(items)},
+    }
+
+
+def _metal(items: int) -> Dict[str, Any]:
+    return {
+        "data": {
+            name: {
+                "currency": "USD",
+                "name": name.title(),
+                "results": [{"bid": 3318.3, "mid": 3319.3, "high": 3373.6, "low": 3264.2, "originalTime": "2025-04-25T17:00:00Z", "unit": "OUNCE"}],
+            }
+            for name in ("gold", "silver", "platinum", "palladium")
+        }
+    }
+
+
+def _locations(items: int) -> Dict[str, Any]:
+    return {
+        "data": [
+            {
+                "location_id": str(13189438 + i),
+                "name": f"Mock Location {i}",
+                "distance": "0.5",
+                "address_obj": {"street1": "1 Mock Road", "city": "Playa del Carmen", "country": "Mexico", "address_string": "1 Mock Road, Mexico"},
+            }
+            for i in range(min(items, 10))
+        ]
+    }
+
+
+def _location_details(items: int) -> Dict[str, Any]:
+    return {
+        "location_id": "13189438",
+        "name": "Mock Location",
+        "description": "A recorded-shape location description. " * 5,
+        "web_url": "https://example.com/location/13189438",
+        "address_obj": {"street1": "1 Mock Road", "city": "Playa del Carmen", "country": "Mexico", "address_string": "1 Mock Road, Mexico"},
+        "ancestors": [{"level": "City", "name": "Playa del Carmen", "location_id": "150812"}],
+        "latitude": "20.63",
+        "longitude": "-87.07",
+        "timezone": "America/Cancun",
+        "ranking_data": {"geo_location_id": "150812", "ranking_string": "#1 of 400", "ranking_out_of": "400", "ranking": "1"},
+        "rating": "4.5",
+        "num_reviews": "2500",
+        "review_rating_count": {"1": "10", "2": "20", "3": "100", "4": "500", "5": "1870"},
+        "subratings": {"0": {"name": "rate_location", "value": "4.5", "localized_name": "Location"}},
+        "photo_count": "900",
+        "amenities": [f"Amenity {i}" for i in range(items)],
+        "category": {"name": "hotel", "localized_name": "Hotel"},
+        "subcategory": [{"name": "hotel", "localized_name": "Hotel"}],
+        "trip_types": [{"name": "couples", "value": "800", "localized_name": "Couples"}],
+    }
+
+
+def _reviews(items: int) -> Dict[str, Any]:
+    return {
+        "data": [
+            {
+                "id": i,
+                "lang": "en",
+                "location_id": 13189438,
+                "published_date": "2025-04-24T22:29:34Z",
+                "rating": 5,
+                "helpful_votes": i,
+                "url": f"https://example.com/review/{i}",
+                "text": "Recorded-shape review text. " * 10,
+                "title": f"Review {i}",
+                "trip_type": "Couples",
+                "travel_date": "2025-04",
+                "user": {"username": f"reviewer{i}", "avatar": {"original": "https://example.com/avatar.jpg"}},
+                "subratings": {"0": {"name": "RATE_VALUE", "value": 5, "localized_name": "Value"}},
+            }
+            for i in range(items)
+        ]
+    }
+
+
+def _photos(items: int) -> Dict[str, Any]:
+    return {
+        "data": [
+            {
+                "id": 700000000 + i,
+                "is_blessed": i % 2 == 0,
+                "caption": f"Photo {i}",
+                "published_date": "2021-02-26T00:50:50.206Z",
+                "images": {"original": {"url": f"https://example.com/photos/{i}.jpg"}},
+                "album": "Hotel & Grounds",
+                "source": {"name": "Management"},
+                "user": {"username": "owner"},
+            }
+            for i in range(items)
+        ]
+    }
+
+
+# 路径 -> 载荷生成函数；与各数据源请求的上游路径一一对应
+ROUTES: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "/api/v1/flights/searchFlights": _flight_offers,
+    "/api/v1/hotels/searchDestination": _destinations,
+    "/api/v1/hotels/searchHotels": _hotels,
+    "/api/v1/hotels/getHotelDetails": _hotel_details,
+    "/stock/v3/get-chart": _chart,
+    "/search/search": _tweets,
+    "/user/tweets": _tweets,
+    "/scholar": _organic,
+    "/patents": _organic,
+    "/pinterest/pins/advance": _pins,
+    "/pinterest/users/relevance": _pinterest_users,
+    "/v1/supported": _commodities_supported,
+    "/v1/market-data": _commodities_market_data,
+    "/web-crawling/api/gold-index": _metal,
+    "/api/v1/location/search": _locations,
+    "/api/v1/location/nearby_search": _locations,
+    "/api/v1/location/{location_id}/details": _location_details,
+    "/api/v1/location/{location_id}/reviews": _reviews,
+    "/api/v1/location/{location_id}/photos": _photos,
+}
+
+
+def create_app(latency_ms: float = 0, jitter_ms: float = 0, items: int = 50, seed: Optional[int] = None, compress: bool = False) -> web.Application:
+    """
+    Create the mock upstream application
+
+    Args:
+        latency_ms: Base response latency in milliseconds
+        jitter_ms: Maximum random deviation added to (or subtracted from) the latency, in milliseconds
+        items: Number of records (flight offers, hotels, tweets, price bars, ...) in list payloads
+        seed: Seed of the jitter generator, for reproducible runs
+        compress: Serve gzip-compressed bodies to clients accepting gzip
+
+    Returns:
+        web.Application: The mock application
+    """
+    rng = random.Random(seed)
+    bodies = {path: json.dumps(factory(items)).encode("utf-8") for path, factory in ROUTES.items()}
+
+    @web.middleware
+    async def latency_middleware(request: web.Request, handler: Callable) -> web.StreamResponse:
+        delay = latency_ms + rng.uniform(-jitter_ms, jitter_ms) if jitter_ms else latency_ms
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        return await handler(request)
+
+    def make_handler(body: bytes) -> Callable:
+        # 压缩结果预先计算，避免压缩耗时计入上游延迟
+        compressed = gzip.compress(body, compresslevel=6) if compress else None
+
+        async def handler(request: web.Request) -> web.Response:
+            if request.can_read_body:
+                await request.read()
+            if compressed is not None and "gzip" in request.headers.get("Accept-Encoding", ""):
+                return web.Response(body=compressed, content_type="application/json", headers={"Content-Encoding": "gzip"})
+            return web.Response(body=body, content_type="application/json")
+
+        return handler
+
+    app = web.Application(middlewares=[latency_middleware])
+    for path, body in bodies.items():
+        app.router.add_route("*", path, make_handler(body))
+    return app
+
+
+class MockUpstream:
+    """
+    Run the mock upstream on a local port
+
+    Usage:
+        async with MockUpstream(latency_ms=20, jitter_ms=5) as upstream:
+            source = BookingSource(dict(config, external_api_proxy_url=upstream.url))
+    """
+
+    def __init__(
+        self, latency_ms: float = 0, jitter_ms: float = 0, items: int = 50, seed: Optional[int] = None, host: str = "127.0.0.1", port: int = 0, compress: bool = False
+    ):
+        self._app = create_app(latency_ms=latency_ms, jitter_ms=jitter_ms, items=items, seed=seed, compress=compress)
+        self._host = host
+        self._port = port
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    async def start(self) -> str:
+        """
+        Start serving
+
+        Returns:
+            str: Base url of the mock, to be used as ``external_api_proxy_url``
+        """
+        self._runner = web.AppRunner(self._app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self._host, self._port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://{self._host}:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        """Stop serving"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "MockUpstream":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.stop()
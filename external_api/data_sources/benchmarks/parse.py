@@ -0,0 +1,123 @@
+"""
+Benchmark response parsing on recorded fixtures
+
+Replays the bodies recorded by ``fixtures`` (record mode) through the parser
+of each call, with no network and no event loop involved, and reports parses
+per second and MB/s so parsing changes can be compared across commits:
+
+    # record once, against the real upstream or the local mock
+    python -m external_api.data_sources.benchmarks.run --record fixtures/
+    # then, on every commit
+    python -m external_api.data_sources.benchmarks.parse fixtures/ --json > parse.json
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from ..booking_source import BookingSource
+from ..client import config
+from ..fixtures import load_bodies
+from ..projection import FieldSelector
+from ..tripadvisor_source import TripAdvisorSource
+from ..twitter_source import TwitterSource
+from ..yahoo_source import YahooFinanceSource
+
+
+def _parsers() -> Dict[str, Callable[[bytes], Any]]:
+    """调用名 -> 解析函数（输入原始响应体），解析逻辑与数据源方法中一致"""
+    twitter = TwitterSource(config)
+    yahoo = YahooFinanceSource(config)
+    tripadvisor = TripAdvisorSource(config)
+    return {
+        "booking.search_hotel_details": lambda body: BookingSource._parse_hotel_detail_payload(body, FieldSelector()),
+        "twitter.search_tweets": lambda body: twitter._parse_search_payload(body, "", False, FieldSelector()),
+        "twitter.get_user_tweets": lambda body: twitter._parse_timeline_payload(body, "", False, FieldSelector()),
+        "yahoo_finance.get_stock_price": lambda body: yahoo._parse_chart_payload(body, "", False, FieldSelector()),
+        "tripadvisor.get_location_reviews": lambda body: tripadvisor._parse_reviews(json.loads(body)),
+        "tripadvisor.get_location_details": lambda body: tripadvisor._parse_location_details(json.loads(body)),
+        "tripadvisor.get_location_photos": lambda body: tripadvisor._parse_photos(json.loads(body)),
+    }
+
+
+def bench_parser(parser: Callable[[bytes], Any], bodies: List[bytes], min_time: float = 1.0) -> Dict[str, Any]:
+    """
+    Run ``parser`` over ``bodies`` repeatedly for at least ``min_time`` seconds
+
+    Args:
+        parser: Function parsing one raw response body
+        bodies: Recorded response bodies
+        min_time: Minimum measuring time in seconds
+
+    Returns:
+        Dict[str, Any]: {"bodies": 3, "parses": 1200, "parses_per_s": 1190.2, "mb_per_s": 52.1, "mean_us": 840.2}
+    """
+    total_bytes = sum(len(body) for body in bodies)
+    parses = 0
+    parsed_bytes = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time:
+        for body in bodies:
+            parser(body)
+        parses += len(bodies)
+        parsed_bytes += total_bytes
+        elapsed = time.perf_counter() - started
+    return {
+        "bodies": len(bodies),
+        "parses": parses,
+        "parses_per_s": parses / elapsed,
+        "mb_per_s": parsed_bytes / elapsed / 1_000_000,
+        "mean_us": elapsed / parses * 1_000_000,
+    }
+
+
+def run_parse_benchmarks(path: str, calls: Optional[List[str]] = None, min_time: float = 1.0) -> List[Dict[str, Any]]:
+    """
+    Benchmark the parsers of all calls with recorded fixtures
+
+    Args:
+        path: Fixture directory
+        calls: Call names to benchmark, None for every call with a parser
+        min_time: Minimum measuring time per call in seconds
+
+    Returns:
+        List[Dict[str, Any]]: One result per call with recorded bodies, see ``bench_parser``
+    """
+    parsers = _parsers()
+    unknown = [name for name in calls or () if name not in parsers]
+    if unknown:
+        raise ValueError(f"No parser registered for: {', '.join(unknown)}; available: {', '.join(parsers)}")
+
+    results = []
+    for name in calls or parsers:
+        bodies = load_bodies(path, name)
+        if not bodies:
+            continue
+        results.append({"call": name, **bench_parser(parsers[name], bodies, min_time=min_time)})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark response parsing on recorded fixtures")
+    parser.add_argument("path", help="Fixture directory")
+    parser.add_argument("-c", "--call", action="append", dest="calls", help="Call to benchmark (repeatable)")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Minimum measuring time per call in seconds")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run_parse_benchmarks(args.path, calls=args.calls, min_time=args.min_time)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    header = f"{'call':<40} {'bodies':>7} {'parses/s':>11} {'MB/s':>8} {'mean us':>10}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        print(f"{result['call']:<40} {result['bodies']:>7} {result['parses_per_s']:>11.1f} {result['mb_per_s']:>8.2f} {result['mean_us']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
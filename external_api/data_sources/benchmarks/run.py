@@ -0,0 +1,241 @@
+"""
+Benchmark the data source methods against the local mock upstream
+
+Each scenario calls one data source method ``requests`` times with at most
+``concurrency`` calls in flight and reports throughput, latency percentiles,
+errors, the response bytes per call as transferred and after decompression,
+and the peak traced memory of a separate (shorter) tracemalloc pass, so
+tracing overhead does not skew the timings.
+
+    python -m external_api.data_sources.benchmarks.run
+    python -m external_api.data_sources.benchmarks.run -s booking.search_flights -s yahoo_finance.get_stock_price --latency-ms 50 --jitter-ms 20
+    python -m external_api.data_sources.benchmarks.run --json > baseline.json
+    python -m external_api.data_sources.benchmarks.run --compress   # mock serves gzip to clients accepting it
+    python -m external_api.data_sources.benchmarks.run --record fixtures/   # also record the responses, see benchmarks.parse
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from .. import fixtures, metrics
+from ..base import BaseAPI
+from ..booking_source import BookingSource
+from ..client import config
+from ..commodities_source import CommoditiesSource
+from ..instrumentation import run_instrumented
+from ..metal_source import MetalSource
+from ..metrics import LatencyHistogram
+from ..patents_source import PatentSource
+from ..pinterest_source import PinterestSource
+from ..scholar_source import ScholarSource
+from ..tripadvisor_source import TripAdvisorSource
+from ..twitter_source import TwitterSource
+from ..yahoo_source import YahooFinanceSource
+from .mock_upstream import MockUpstream
+
+# 场景名 -> (数据源类, 方法名, 调用参数)
+SCENARIOS: Dict[str, Tuple[Type[BaseAPI], str, Dict[str, Any]]] = {
+    "booking.search_flights": (BookingSource, "search_flights", {"from_code": "PVG", "to_code": "LAX", "depart_date": "2025-06-01"}),
+    "booking.search_hotels_by_dest_name": (
+        BookingSource,
+        "search_hotels_by_dest_name",
+        {"dest_name": "shanghai", "arrival_date": "2025-06-01", "departure_date": "2025-06-03"},
+    ),
+    "booking.search_hotel_details": (BookingSource, "search_hotel_details", {"hotel_id": "191605", "arrival_date": "2025-06-01", "departure_date": "2025-06-03"}),
+    "yahoo_finance.get_stock_price": (YahooFinanceSource, "get_stock_price", {"symbol": "MOCK", "start_date": "2025-01-01", "end_date": "2025-12-31"}),
+    "twitter.search_tweets": (TwitterSource, "search_tweets", {"query": "markets", "limit": 20}),
+    "twitter.get_user_tweets": (TwitterSource, "get_user_tweets", {"username": "user0", "user_id": "44196397", "limit": 20}),
+    "scholar.search_scholar": (ScholarSource, "search_scholar", {"query": "large language models", "num_results": 20}),
+    "patent.search_patents": (PatentSource, "search_patents", {"query": "machine learning", "num_results": 20}),
+    "pinterest.search_pins": (PinterestSource, "search_pins", {"keyword": "interior design"}),
+    "commodities.get_commodities_price": (CommoditiesSource, "get_commodities_price", {"commodity_code": "COCOA,CORN,OIL", "currency_code": "USD"}),
+    "metal.get_metal_price": (MetalSource, "get_metal_price", {"currency_code": "USD"}),
+    "tripadvisor.search_locations": (TripAdvisorSource, "search_locations", {"searchQuery": "playa del carmen"}),
+    "tripadvisor.get_location_reviews": (TripAdvisorSource, "get_location_reviews", {"locationId": 13189438}),
+    "tripadvisor.get_location_bundle": (TripAdvisorSource, "get_location_bundle", {"locationId": 13189438}),
+}
+
+
+async def _drive(name: str, method: Any, kwargs: Dict[str, Any], requests: int, concurrency: int) -> Tuple[LatencyHistogram, int, float]:
+    """以固定并发调用 ``requests`` 次，返回 (延迟直方图, 失败次数, 总耗时)；调用归属于 ``name``，与经 ApiClient 调用时一致"""
+    histogram = LatencyHistogram()
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                result = await run_instrumented(name, method, **kwargs)
+                failed = not (isinstance(result, dict) and result.get("success", True))
+            except Exception:
+                failed = True
+            histogram.record(time.perf_counter() - started)
+            errors += int(failed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, requests)))))
+    return histogram, errors, time.perf_counter() - started
+
+
+async def run_scenario(name: str, proxy_url: str, requests: int = 200, concurrency: int = 20, memory_requests: int = 20) -> Dict[str, Any]:
+    """
+    Benchmark one scenario
+
+    Args:
+        name: Scenario name, a key of ``SCENARIOS``
+        proxy_url: Base url of the (mock) upstream proxy
+        requests: Number of timed calls
+        concurrency: Maximum number of calls in flight
+        memory_requests: Number of calls in the tracemalloc pass, 0 to skip it
+
+    Returns:
+        Dict[str, Any]: e.g. {"scenario": ..., "requests": 200, "errors": 0, "throughput_rps": 812.4,
+                              "latency": {"p50_ms": ..., "p99_ms": ..., ...}, "bytes_in_per_call": 48211.0,
+                              "wire_bytes_per_call": 6012.0, "peak_memory_kib": 1830.2}
+    """
+    source_cls, method_name, kwargs = SCENARIOS[name]
+    source = source_cls(dict(config, external_api_proxy_url=proxy_url))
+    method = getattr(source, method_name)
+
+    # 预热：建立缓存（如目的地ID）并触发惰性导入，不计入结果
+    await run_instrumented(name, method, **kwargs)
+
+    before = metrics.snapshot()["calls"].get(name, {})
+    histogram, errors, elapsed = await _drive(name, method, kwargs, requests, concurrency)
+    after = metrics.snapshot()["calls"].get(name, {})
+    bytes_in = after.get("bytes_in", 0) - before.get("bytes_in", 0)
+    bytes_in_wire = after.get("bytes_in_wire", 0) - before.get("bytes_in_wire", 0)
+
+    peak_memory_kib = None
+    if memory_requests > 0:
+        tracemalloc.start()
+        try:
+            await _drive(name, method, kwargs, memory_requests, concurrency)
+            peak_memory_kib = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "scenario": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput_rps": requests / elapsed if elapsed else 0.0,
+        "latency": histogram.to_dict(),
+        "bytes_in_per_call": bytes_in / requests if requests else 0.0,
+        "wire_bytes_per_call": bytes_in_wire / requests if requests else 0.0,
+        "peak_memory_kib": peak_memory_kib,
+    }
+
+
+async def run_benchmarks(
+    scenarios: Optional[List[str]] = None,
+    requests: int = 200,
+    concurrency: int = 20,
+    latency_ms: float = 20,
+    jitter_ms: float = 5,
+    items: int = 50,
+    memory_requests: int = 20,
+    seed: Optional[int] = 0,
+    record: Optional[str] = None,
+    compress: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Start the mock upstream and benchmark the given scenarios one after another
+
+    Args:
+        scenarios: Scenario names, None for all of ``SCENARIOS``
+        requests: Number of timed calls per scenario
+        concurrency: Maximum number of calls in flight
+        latency_ms: Mock upstream base latency in milliseconds
+        jitter_ms: Mock upstream latency jitter in milliseconds
+        items: Number of records in mock list payloads
+        memory_requests: Number of calls in the tracemalloc pass, 0 to skip it
+        seed: Seed of the mock latency jitter
+        record: Fixture directory to record the mock responses of one call of each scenario to
+        compress: Let the mock upstream serve gzip-compressed responses
+
+    Returns:
+        List[Dict[str, Any]]: One result per scenario, see ``run_scenario``
+    """
+    names = scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(unknown)}; available: {', '.join(SCENARIOS)}")
+
+    results = []
+    async with MockUpstream(latency_ms=latency_ms, jitter_ms=jitter_ms, items=items, seed=seed, compress=compress) as upstream:
+        if record:
+            fixtures.configure(fixtures.RECORD, record)
+            try:
+                for name in names:
+                    source_cls, method_name, kwargs = SCENARIOS[name]
+                    source = source_cls(dict(config, external_api_proxy_url=upstream.url))
+                    await run_instrumented(name, getattr(source, method_name), **kwargs)
+            finally:
+                fixtures.configure(None)
+
+        for name in names:
+            results.append(await run_scenario(name, upstream.url, requests=requests, concurrency=concurrency, memory_requests=memory_requests))
+    return results
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    """Render benchmark results as a plain text table"""
+    header = f"{'scenario':<40} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7} {'KiB/call':>9} {'wire KiB':>9} {'peak KiB':>10}"
+    lines = [header, "-" * len(header)]
+    for result in results:
+        latency = result["latency"]
+        peak = "-" if result["peak_memory_kib"] is None else f"{result['peak_memory_kib']:.1f}"
+        lines.append(
+            f"{result['scenario']:<40} {result['throughput_rps']:>9.1f} {latency['p50_ms']:>9.2f} {latency['p99_ms']:>9.2f} "
+            f"{latency['max_ms']:>9.2f} {result['errors']:>7} {result['bytes_in_per_call'] / 1024:>9.1f} {result['wire_bytes_per_call'] / 1024:>9.1f} {peak:>10}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark data sources against a local mock upstream")
+    parser.add_argument("-s", "--scenario", action="append", dest="scenarios", help=f"Scenario to run (repeatable), one of: {', '.join(SCENARIOS)}")
+    parser.add_argument("-n", "--requests", type=int, default=200, help="Timed calls per scenario")
+    parser.add_argument("-c", "--concurrency", type=int, default=20, help="Maximum calls in flight")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Mock upstream base latency")
+    parser.add_argument("--jitter-ms", type=float, default=5, help="Mock upstream latency jitter")
+    parser.add_argument("--items", type=int, default=50, help="Records per mock list payload")
+    parser.add_argument("--memory-requests", type=int, default=20, help="Calls in the tracemalloc pass, 0 to skip")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the latency jitter")
+    parser.add_argument("--record", metavar="DIR", help="Also record the mock responses as fixtures to DIR")
+    parser.add_argument("--compress", action="store_true", help="Let the mock upstream serve gzip-compressed responses")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    # 数据源在每次请求时记录 info 日志，基准测试中只保留错误
+    logging.basicConfig(level=logging.ERROR)
+
+    results = asyncio.run(
+        run_benchmarks(
+            scenarios=args.scenarios,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            items=args.items,
+            memory_requests=args.memory_requests,
+            seed=args.seed,
+            record=args.record,
+            compress=args.compress,
+        )
+    )
+    print(json.dumps(results, indent=2) if args.json else format_table(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,34 @@ Booking.com flight search data source implementation
 """
 
 import asyncio
+import copy
+import json
 import logging
-from datetime import datetime
-from typing import Any, Dict, Optional
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import aiohttp
 
+from . import errors, pipeline, streaming
 from .base import BaseAPI
+from .cache import TTLCache
+from .executor import run_parse
+from .models import Flight, FlightPrice, FlightSegment, GeoPoint, Hotel, HotelPrice, build
+from .projection import FieldSelector
 
 logger = logging.getLogger("booking_source")
 
+# 灵活日期航班搜索允许的最大日期窗口（天）
+MAX_FLEXIBLE_DAYS = 31
+
+# 酒店详情 data 中解析用到的键，流式解码时只构建这些键
+HOTEL_DETAIL_KEYS = (
+    "hotel_id", "hotel_name", "url", "review_nr", "raw_data", "arrival_date", "departure_date", "latitude", "longitude", "address",
+    "city", "district", "countrycode", "country_trans", "currency_code", "zip", "timezone", "soldout", "available_rooms",
+    "max_rooms_in_reservation", "average_room_size_for_ufi_m2", "is_family_friendly", "is_closed", "is_cash_accepted_check_enabled",
+    "hotel_include_breakfast", "family_facilities", "spoken_languages", "facilities_block", "hotel_important_information_with_codes", "rooms",
+)
+
 
 class BookingSource(BaseAPI):
     """Booking.com data source"""
@@ -27,6 +45,15 @@ class BookingSource(BaseAPI):
             "X-Biz-Id": "matrix-agent",
             "X-Request-Timeout": str(config["timeout"] - 5),
         }
+        # 目的地ID基本不变，缓存后酒店搜索只需一次上游请求
+        self._dest_cache = TTLCache(
+            ttl=config.get("booking_dest_cache_ttl", 7 * 24 * 3600),
+            loose_match=True,
+            path=config.get("booking_dest_cache_path"),
+            name="booking_destinations",
+        )
+        # 航班价格变化较快，只做短期缓存
+        self._flight_cache = TTLCache(ttl=config.get("booking_flight_cache_ttl", 10 * 60), name="booking_flights")
 
     @property
     def source_name(self) -> str:
@@ -63,6 +90,8 @@ class BookingSource(BaseAPI):
         sort: str = "BEST",
         cabin_class: str = "ECONOMY",
         currency_code: str = "CNY",
+        compact: bool = False,
+        fields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Search for flights
@@ -79,6 +108,8 @@ class BookingSource(BaseAPI):
             sort(str): Sort method, options: BEST, CHEAPEST, FASTEST
             cabin_class(str): Cabin class, options: ECONOMY, PREMIUM_ECONOMY, BUSINESS, FIRST
             currency_code(str): Currency code, default CNY
+            compact(bool): Return flights as memory-compact records (dict-like, convert with `.to_dict()`), default False
+            fields(Optional[List[str]]): Only return these fields of each flight, e.g. ["price.amount", "stops"], default None (all fields)
 
         Returns:
             Dict[str, Any]: Dictionary containing flight search results, e.g.
@@ -158,19 +189,15 @@ class BookingSource(BaseAPI):
 
             # Send request
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # Check response status
-                        response.raise_for_status()
-                        data = await response.json()
+                data = await self._request("GET", request_url, params=params, headers=self.headers, timeout=self._timeout)
 
-            except asyncio.TimeoutError:
+            except asyncio.TimeoutError as e:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
-                logger.error(error_msg)
+                errors.log_failure(logger, error_msg, e)
                 return {"success": False, "error": error_msg}
             except aiohttp.ClientError as e:
                 error_msg = f"Request failed: {str(e)}"
-                logger.error(error_msg)
+                errors.log_failure(logger, error_msg, e)
                 return {"success": False, "error": error_msg}
 
             # Check if API response has error
@@ -184,53 +211,243 @@ class BookingSource(BaseAPI):
                 logger.error("No flight offers found")
                 return {"success": True, "data": {"flights": []}}
 
+            selector = FieldSelector(fields)
+            if not selector.selects_all:
+                compact = False
+            want_segments = selector.wants("segments")
+
             # Simplify response data structure
             simplified_flights = []
             for offer in data["data"]["flightOffers"]:
-                legs_info = []
+                legs_info: List[Any] = []
                 stops_count = 0
 
                 total_time = 0
                 for segment in offer["segments"]:
                     # Get flight number and stop info
                     for leg in segment["legs"]:
-                        flight_number = f"{leg['flightInfo']['carrierInfo']['marketingCarrier']}{leg['flightInfo']['flightNumber']}"
                         # Count stops
                         stops_count += len(leg.get("flightStops", []))
+                        if not want_segments:
+                            total_time += leg["totalTime"]
+                            continue
+
+                        flight_number = f"{leg['flightInfo']['carrierInfo']['marketingCarrier']}{leg['flightInfo']['flightNumber']}"
 
                         # Add segment info
                         legs_info.append(
-                            {
-                                "flight_number": flight_number,
-                                "from": leg["departureAirport"]["code"],
-                                "to": leg["arrivalAirport"]["code"],
-                                "departure": leg["departureTime"],
-                                "arrival": leg["arrivalTime"],
-                                "total_time": self._format_duration(leg["totalTime"]),  # Segment flight time
-                            }
+                            build(
+                                FlightSegment,
+                                compact,
+                                flight_number=flight_number,
+                                from_=leg["departureAirport"]["code"],
+                                to=leg["arrivalAirport"]["code"],
+                                departure=leg["departureTime"],
+                                arrival=leg["arrivalTime"],
+                                total_time=self._format_duration(leg["totalTime"]),  # Segment flight time
+                            )
                         )
                         total_time += leg["totalTime"]
                 # Handle price
                 price = offer["priceBreakdown"]["total"]
                 total_amount = float(price["units"]) + float(price["nanos"]) / 1_000_000_000
 
-                simplified_flights.append(
-                    {
-                        "stops": stops_count,
-                        "segments": legs_info,
-                        "total_time": self._format_duration(total_time),
-                        "price": {"currency": price["currencyCode"], "amount": total_amount},
-                    }
+                flight = build(
+                    Flight,
+                    compact,
+                    stops=stops_count,
+                    segments=legs_info,
+                    total_time=self._format_duration(total_time),
+                    price=build(FlightPrice, compact, currency=price["currencyCode"], amount=total_amount),
                 )
+                simplified_flights.append(flight if compact else selector.apply(flight))
 
             return {"success": True, "data": {"flights": simplified_flights}}
 
         except Exception as e:
             error_msg = f"Error occurred while searching flights: {str(e)}"
-            logger.error(error_msg)
-            logger.exception(e)
+            errors.log_failure(logger, error_msg, e)
+            return {"success": False, "error": error_msg}
+
+    async def search_flights_flexible(
+        self,
+        from_code: str,
+        to_code: str,
+        depart_date_from: str,
+        depart_date_to: str,
+        trip_days: Optional[int] = None,
+        stops: str = "none",
+        adults: int = 1,
+        children: Optional[str] = None,
+        cabin_class: str = "ECONOMY",
+        currency_code: str = "CNY",
+        max_concurrency: int = 5,
+    ) -> Dict[str, Any]:
+        """
+        Search the cheapest flights for every departure date in a date window, e.g. "cheapest day to fly next week"
+
+        Args:
+            from_code(str): Departure airport code, e.g.: PEK
+            to_code(str): Destination airport code, e.g.: CAN
+            depart_date_from(str): First departure date of the window, format: YYYY-MM-DD
+            depart_date_to(str): Last departure date of the window (inclusive, at most 31 days after depart_date_from), format: YYYY-MM-DD
+            trip_days(Optional[int]): For round trips, number of days between departure and return; None for one-way (optional)
+            stops(str): Number of stops, options: none, 0, 1, 2
+            adults(int): Number of adults, default is 1
+            children(Optional[str]): Children's ages, comma separated, e.g.: 0,17 (optional)
+            cabin_class(str): Cabin class, options: ECONOMY, PREMIUM_ECONOMY, BUSINESS, FIRST
+            currency_code(str): Currency code, default CNY
+            max_concurrency(int): Maximum number of dates searched at the same time, default is 5
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the price calendar, e.g.
+            {
+                "success": True,                   # Whether at least one date was searched
+                "data": {
+                    "calendar": [                  # One entry per searched date, sorted by departure date
+                        {
+                            "depart_date": "2025-04-19",   # Departure date
+                            "return_date": "2025-04-26",   # Return date, None for one-way
+                            "min_price": 1430.5,           # Cheapest total price, None if no flights
+                            "currency": "CNY",             # Currency, None if no flights
+                            "flight_count": 12,            # Number of flights found
+                            "cheapest_flight": {...}       # Cheapest flight, same format as search_flights, None if no flights
+                        }
+                    ],
+                    "cheapest": {...},             # Calendar entry with the lowest price, None if no flights at all
+                    "failed_dates": [              # Dates whose search failed
+                        {"depart_date": "2025-04-20", "error": "..."}
+                    ]
+                }
+            }
+        """
+        calendar = []
+        failed_dates = []
+        try:
+            async for entry in self.iter_flights_flexible(
+                from_code=from_code,
+                to_code=to_code,
+                depart_date_from=depart_date_from,
+                depart_date_to=depart_date_to,
+                trip_days=trip_days,
+                stops=stops,
+                adults=adults,
+                children=children,
+                cabin_class=cabin_class,
+                currency_code=currency_code,
+                max_concurrency=max_concurrency,
+            ):
+                if "error" in entry:
+                    failed_dates.append(entry)
+                else:
+                    calendar.append(entry)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+
+        if failed_dates and not calendar:
+            error_msg = "All flight searches failed:\n" + "\n".join(f"{item['depart_date']}: {item['error']}" for item in failed_dates)
             return {"success": False, "error": error_msg}
 
+        calendar.sort(key=lambda item: item["depart_date"])
+        failed_dates.sort(key=lambda item: item["depart_date"])
+        priced = [item for item in calendar if item["min_price"] is not None]
+        cheapest = min(priced, key=lambda item: item["min_price"]) if priced else None
+        return {"success": True, "data": {"calendar": calendar, "cheapest": cheapest, "failed_dates": failed_dates}}
+
+    async def iter_flights_flexible(
+        self,
+        from_code: str,
+        to_code: str,
+        depart_date_from: str,
+        depart_date_to: str,
+        trip_days: Optional[int] = None,
+        stops: str = "none",
+        adults: int = 1,
+        children: Optional[str] = None,
+        cabin_class: str = "ECONOMY",
+        currency_code: str = "CNY",
+        max_concurrency: int = 5,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the price calendar of search_flights_flexible, yielding each date as soon as its search completes
+
+        Args:
+            from_code(str): Departure airport code, e.g.: PEK
+            to_code(str): Destination airport code, e.g.: CAN
+            depart_date_from(str): First departure date of the window, format: YYYY-MM-DD
+            depart_date_to(str): Last departure date of the window (inclusive, at most 31 days after depart_date_from), format: YYYY-MM-DD
+            trip_days(Optional[int]): For round trips, number of days between departure and return; None for one-way (optional)
+            stops(str): Number of stops, options: none, 0, 1, 2
+            adults(int): Number of adults, default is 1
+            children(Optional[str]): Children's ages, comma separated, e.g.: 0,17 (optional)
+            cabin_class(str): Cabin class, options: ECONOMY, PREMIUM_ECONOMY, BUSINESS, FIRST
+            currency_code(str): Currency code, default CNY
+            max_concurrency(int): Maximum number of dates searched at the same time, default is 5
+
+        Returns:
+            AsyncIterator[Dict[str, Any]]: Async iterator of calendar entries in completion order, e.g.
+            {"depart_date": "2025-04-19", "return_date": None, "min_price": 1430.5, "currency": "CNY", "flight_count": 12, "cheapest_flight": {...}}
+            or, for a failed date, {"depart_date": "2025-04-20", "error": "..."}.
+            Raises ValueError if the date window is invalid.
+        """
+        start = datetime.strptime(depart_date_from, "%Y-%m-%d")
+        end = datetime.strptime(depart_date_to, "%Y-%m-%d")
+        days = (end - start).days + 1
+        if days < 1 or days > MAX_FLEXIBLE_DAYS:
+            raise ValueError(f"Invalid date window: {depart_date_from} to {depart_date_to}, must span 1 to {MAX_FLEXIBLE_DAYS} days")
+
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def search_date(depart: datetime) -> Dict[str, Any]:
+            depart_date = depart.strftime("%Y-%m-%d")
+            return_date = (depart + timedelta(days=trip_days)).strftime("%Y-%m-%d") if trip_days is not None else None
+            async with semaphore:
+                result = await self._search_flights_cached(
+                    from_code=from_code,
+                    to_code=to_code,
+                    depart_date=depart_date,
+                    return_date=return_date,
+                    stops=stops,
+                    adults=adults,
+                    children=children,
+                    cabin_class=cabin_class,
+                    currency_code=currency_code,
+                )
+            if not result["success"]:
+                return {"depart_date": depart_date, "error": result["error"]}
+
+            flights = result["data"]["flights"]
+            cheapest_flight = min(flights, key=lambda flight: flight["price"]["amount"]) if flights else None
+            return {
+                "depart_date": depart_date,
+                "return_date": return_date,
+                "min_price": cheapest_flight["price"]["amount"] if cheapest_flight else None,
+                "currency": cheapest_flight["price"]["currency"] if cheapest_flight else None,
+                "flight_count": len(flights),
+                "cheapest_flight": cheapest_flight,
+            }
+
+        tasks = [asyncio.ensure_future(search_date(start + timedelta(days=i))) for i in range(days)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 调用方提前退出迭代时取消剩余请求
+            for task in tasks:
+                task.cancel()
+
+    async def _search_flights_cached(self, **kwargs: Any) -> Dict[str, Any]:
+        """按 (航线, 日期, 搜索条件) 缓存的最低价航班搜索；缓存中保存副本，每次命中返回新的副本，调用方可修改结果"""
+        cache_key = "|".join(f"{key}={kwargs[key]}" for key in sorted(kwargs))
+        cached = self._flight_cache.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        result = await self.search_flights(sort="CHEAPEST", **kwargs)
+        if result["success"]:
+            self._flight_cache.set(cache_key, copy.deepcopy(result))
+        return result
+
     async def _search_hotel_destinations(self, query: str) -> Dict[str, Any]:
         """
         Search for hotel destinations
@@ -278,19 +495,15 @@ class BookingSource(BaseAPI):
 
             # 发送请求
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # 检查响应状态
-                        response.raise_for_status()
-                        data = await response.json()
+                data = await self._request("GET", request_url, params=params, headers=self.headers, timeout=self._timeout)
 
-            except asyncio.TimeoutError:
+            except asyncio.TimeoutError as e:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
-                logger.error(error_msg)
+                errors.log_failure(logger, error_msg, e)
                 return {"success": False, "error": error_msg}
             except aiohttp.ClientError as e:
                 error_msg = f"Request failed: {str(e)}"
-                logger.error(error_msg)
+                errors.log_failure(logger, error_msg, e)
                 return {"success": False, "error": error_msg}
 
             # 检查API响应中是否有错误
@@ -319,8 +532,7 @@ class BookingSource(BaseAPI):
 
         except Exception as e:
             error_msg = f"Error occurred while searching destinations: {str(e)}"
-            logger.error(error_msg)
-            logger.exception(e)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
 
     async def _search_hotels_by_destid(
@@ -339,6 +551,8 @@ class BookingSource(BaseAPI):
         currency_code: str = "USD",
         sort_by: str = "bayesian_review_score",
         categories_filter: Optional[str] = None,
+        compact: bool = False,
+        fields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Search for hotels
@@ -370,6 +584,8 @@ class BookingSource(BaseAPI):
                 - class::3: Three stars
                 - class::4: Four stars
                 - class::5: Five stars
+            compact(bool): Return hotels as memory-compact records, default False
+            fields(Optional[List[str]]): Only return these fields of each hotel, default None (all fields)
 
         Returns:
             Dict[str, Any]: Dictionary containing hotel search results, e.g.
@@ -447,19 +663,15 @@ class BookingSource(BaseAPI):
 
             # 发送请求
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # 检查响应状态
-                        response.raise_for_status()
-                        data = await response.json()
+                data = await self._request("GET", request_url, params=params, headers=self.headers, timeout=self._timeout)
 
-            except asyncio.TimeoutError:
+            except asyncio.TimeoutError as e:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
-                logger.error(error_msg)
+                errors.log_failure(logger, error_msg, e)
                 return {"success": False, "error": error_msg}
             except aiohttp.ClientError as e:
                 error_msg = f"Request failed: {str(e)}"
-                logger.error(error_msg)
+                errors.log_failure(logger, error_msg, e)
                 return {"success": False, "error": error_msg}
 
             # 检查API响应中是否有错误
@@ -471,36 +683,34 @@ class BookingSource(BaseAPI):
             # 简化响应数据结构
             # 计算平均价格
 
+            nights = (datetime.strptime(departure_date, "%Y-%m-%d") - datetime.strptime(arrival_date, "%Y-%m-%d")).days
+            selector = FieldSelector(fields)
+            if not selector.selects_all:
+                compact = False
+
             simplified_hotels = []
             for hotel in data["data"]["hotels"]:
                 property_info = hotel["property"]
-                avg_price = round(
-                    property_info["priceBreakdown"]["grossPrice"]["value"]
-                    / (datetime.strptime(departure_date, "%Y-%m-%d") - datetime.strptime(arrival_date, "%Y-%m-%d")).days,
-                    2,
-                )
-                simplified_hotels.append(
-                    {
-                        "hotel_id": hotel["hotel_id"],
-                        "name": property_info["name"],
-                        "rating": property_info.get("accuratePropertyClass") or property_info.get("propertyClass"),
-                        "review_score": property_info.get("reviewScore"),
-                        "review_count": property_info.get("reviewCount"),
-                        "location": {"latitude": property_info["latitude"], "longitude": property_info["longitude"]},
-                        "price": {
-                            "currency": property_info["priceBreakdown"]["grossPrice"]["currency"],
-                            "amount": property_info["priceBreakdown"]["grossPrice"]["value"],
-                            "price_per_night": avg_price,
-                        },
-                    }
+                avg_price = round(property_info["priceBreakdown"]["grossPrice"]["value"] / nights, 2)
+                gross_price = property_info["priceBreakdown"]["grossPrice"]
+                hotel_record = build(
+                    Hotel,
+                    compact,
+                    hotel_id=hotel["hotel_id"],
+                    name=property_info["name"],
+                    rating=property_info.get("accuratePropertyClass") or property_info.get("propertyClass"),
+                    review_score=property_info.get("reviewScore"),
+                    review_count=property_info.get("reviewCount"),
+                    location=build(GeoPoint, compact, latitude=property_info["latitude"], longitude=property_info["longitude"]),
+                    price=build(HotelPrice, compact, currency=gross_price["currency"], amount=gross_price["value"], price_per_night=avg_price),
                 )
+                simplified_hotels.append(hotel_record if compact else selector.apply(hotel_record))
 
             return {"success": True, "data": {"hotels": simplified_hotels}}
 
         except Exception as e:
             error_msg = f"Error occurred while searching hotels: {str(e)}"
-            logger.error(error_msg)
-            logger.exception(e)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
 
     async def search_hotels_by_dest_name(
@@ -518,6 +728,8 @@ class BookingSource(BaseAPI):
         currency_code: str = "USD",
         sort_by: str = "bayesian_review_score",
         categories_filter: Optional[str] = None,
+        compact: bool = False,
+        fields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Search for hotels by destination name
@@ -545,6 +757,8 @@ class BookingSource(BaseAPI):
             categories_filter(Optional[str]): Star rating filter, options:
                 - class::1: One star, ..., class::5: Five stars
                 - Multiple selection allowed, comma separated, e.g.: class::1,class::2
+            compact(bool): Return hotels as memory-compact records (dict-like, convert with `.to_dict()`), default False
+            fields(Optional[List[str]]): Only return these fields of each hotel, e.g. ["hotel_id", "price.amount"], default None (all fields)
 
         Returns:
             Dict[str, Any]: Dictionary containing hotel search results, e.g.
@@ -593,16 +807,12 @@ class BookingSource(BaseAPI):
         #     ...     print(f"Search successful")
         # """
         try:
-            # 先搜索目的地信息
-            dest_result = await self._search_hotel_destinations(dest_name)
+            # 先解析目的地信息
+            dest_result = await self._resolve_destination(dest_name)
             if not dest_result["success"]:
                 return dest_result
 
-            if not dest_result["data"]["destinations"]:
-                return {"success": False, "error": f"No matching destination found: {dest_name}"}
-
-            # 使用第一个匹配的目的地
-            destination = dest_result["data"]["destinations"][0]
+            destination = dest_result["data"]
             dest_id = destination["dest_id"]
             search_type = destination["search_type"].upper()
 
@@ -622,6 +832,8 @@ class BookingSource(BaseAPI):
                 currency_code=currency_code,
                 sort_by=sort_by,
                 categories_filter=categories_filter,
+                compact=compact,
+                fields=fields,
             )
 
             if not hotels_result["success"]:
@@ -642,10 +854,36 @@ class BookingSource(BaseAPI):
 
         except Exception as e:
             error_msg = f"Error occurred while searching hotels: {str(e)}"
-            logger.error(error_msg)
-            logger.exception(e)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
 
+    async def _resolve_destination(self, dest_name: str) -> Dict[str, Any]:
+        """
+        Resolve a destination name to its first matching destination, using the destination cache
+
+        Args:
+            dest_name(str): Destination name, e.g.: shanghai
+
+        Returns:
+            Dict[str, Any]: {"success": True, "data": {"name": ..., "dest_id": ..., "search_type": ...}} or an error result
+        """
+        destination = self._dest_cache.get(dest_name)
+        if destination is not None:
+            return {"success": True, "data": destination}
+
+        dest_result = await self._search_hotel_destinations(dest_name)
+        if not dest_result["success"]:
+            return dest_result
+
+        if not dest_result["data"]["destinations"]:
+            return {"success": False, "error": f"No matching destination found: {dest_name}"}
+
+        # 使用第一个匹配的目的地
+        first = dest_result["data"]["destinations"][0]
+        destination = {"name": first["name"], "dest_id": first["dest_id"], "search_type": first["search_type"]}
+        self._dest_cache.set(dest_name, destination)
+        return {"success": True, "data": destination}
+
     async def search_hotel_details(
         self,
         hotel_id: str,
@@ -658,6 +896,7 @@ class BookingSource(BaseAPI):
         temperature_unit: str = "c",
         languagecode: str = "en-us",
         currency_code: str = "EUR",
+        fields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Search for hotel details by hotel ID
@@ -673,6 +912,7 @@ class BookingSource(BaseAPI):
             temperature_unit(str): Temperature unit, default is c, options: c or f, where c = Celsius, f = Fahrenheit
             languagecode(str): Language code, default en-us
             currency_code(str): Currency code, default EUR
+            fields(Optional[List[str]]): Only return these fields, dotted paths allowed for room fields, e.g. ["hotel_name", "rooms.description"], default None (all fields)
 
         Returns:
             Dict[str, Any]: Dictionary containing hotel details, e.g.
@@ -764,88 +1004,174 @@ class BookingSource(BaseAPI):
 
             request_url = f"{self.proxy_url}/api/v1/hotels/getHotelDetails"
 
+            selector = FieldSelector(fields)
+            body = None
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # 检查响应状态
-                        response.raise_for_status()
-                        data = await response.json()
-
-            except asyncio.TimeoutError:
+                if streaming.available() and not (selector.wants("rooms") and selector.wants("facilities")):
+                    # fields 不需要房间或设施时边接收边解码，跳过这些大块子结构；
+                    # 完整响应的逐块解码比缓冲后在执行器中解析更占用事件循环
+                    data = await self._request(
+                        "GET",
+                        request_url,
+                        params=params,
+                        headers=self.headers,
+                        timeout=self._timeout,
+                        decode=pipeline.DECODE_STREAM,
+                        keep=self._hotel_detail_keep(selector),
+                    )
+                else:
+                    body = await self._request("GET", request_url, params=params, headers=self.headers, timeout=self._timeout, decode=pipeline.DECODE_BYTES)
+
+            except asyncio.TimeoutError as e:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
-                logger.error(error_msg)
+                errors.log_failure(logger, error_msg, e)
                 return {"success": False, "error": error_msg}
             except aiohttp.ClientError as e:
                 error_msg = f"Request failed: {str(e)}"
-                logger.error(error_msg)
-                return {"success": False, "error": error_msg}
-
-            # 检查API响应中是否有错误
-            if not data.get("status"):
-                error_msg = data.get("message", "Unknown error")
-                logger.error(f"API returned error: {error_msg}")
+                errors.log_failure(logger, error_msg, e)
                 return {"success": False, "error": error_msg}
 
-            hotel_detail = self._parse_hotel_detail(data.get("data", {}))
-            return {"success": True, "data": hotel_detail}
+            if body is None:
+                # 投影后的数据只含请求的字段，按小负载处理
+                result = await run_parse(self._parse_hotel_detail_response, data, selector, size=0)
+            else:
+                # 大响应（房间、图片较多）在解析线程池/进程池中解析
+                result = await run_parse(self._parse_hotel_detail_payload, body, selector, size=len(body))
+            if not result["success"]:
+                logger.error(f"API returned error: {result['error']}")
+            return result
         except Exception as e:
             error_msg = f"Error occurred while searching hotel details: {str(e)}"
-            logger.error(error_msg)
-            logger.exception(e)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
 
-    def _parse_hotel_detail(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """解析酒店详情"""
-        facilities = []
-        for facility in data.get("facilities_block", {}).get("facilities", []):
-            facility_name = facility.get("name", "")
-            if len(facility_name) > 0:
-                facilities.append(facility_name)
+    async def search_multiple_hotel_details(
+        self,
+        hotel_ids: List[str],
+        arrival_date: str,
+        departure_date: str,
+        adults: int = 1,
+        children_age: Optional[str] = None,
+        room_qty: int = 1,
+        units: str = "metric",
+        temperature_unit: str = "c",
+        languagecode: str = "en-us",
+        currency_code: str = "EUR",
+        fields: Optional[List[str]] = None,
+        max_concurrency: int = 5,
+    ) -> Dict[str, Any]:
+        """
+        Search for details of multiple hotels concurrently, e.g. to enrich the top hotels of search_hotels_by_dest_name
 
-        hotel_important_information = []
-        for item in data.get("hotel_important_information_with_codes", []):
-            info = item.get("phrase", "")
-            if len(info) > 0:
-                hotel_important_information.append(info)
+        Args:
+            hotel_ids(List[str]): Hotel ID list
+            arrival_date(str): Check-in date, format: YYYY-MM-DD
+            departure_date(str): Check-out date, format: YYYY-MM-DD
+            adults(int): Number of adults, default is 1
+            children_age(Optional[str]): Children's ages, comma separated, e.g.: 0,17
+            room_qty(int): Number of rooms, default is 1
+            units(str): Units, default is metric
+            temperature_unit(str): Temperature unit, default is c, options: c or f
+            languagecode(str): Language code, default en-us
+            currency_code(str): Currency code, default EUR
+            fields(Optional[List[str]]): Only return these fields of each hotel, same as search_hotel_details, default None (all fields)
+            max_concurrency(int): Maximum number of hotels requested at the same time, default is 5
 
-        rooms = {}
-        for roomId, roomInfo in data.get("rooms", {}).items():
-            room = {}
-            photos_data = roomInfo.get("photos", [])
-            photos = []
-            for photo in photos_data:
-                url = photo.get("url_max1280", "")
-                if len(url) == 0:
-                    url = photo.get("url_original", "")
-                if len(url) > 0:
-                    photos.append(url)
+        Returns:
+            Dict[str, Any]: Dictionary containing the hotel details in input order, e.g.
+            {
+                "success": True,                   # Whether at least one hotel was fetched
+                "data": {
+                    "count": 2,                    # Number of hotels fetched
+                    "hotels": [...],               # Details of each hotel, same as search_hotel_details data
+                    "failed_hotels": [             # Hotels that could not be fetched
+                        {"hotel_id": "191605", "error": "..."}
+                    ]
+                }
+            }
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def fetch(hotel_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.search_hotel_details(
+                    hotel_id=hotel_id,
+                    arrival_date=arrival_date,
+                    departure_date=departure_date,
+                    adults=adults,
+                    children_age=children_age,
+                    room_qty=room_qty,
+                    units=units,
+                    temperature_unit=temperature_unit,
+                    languagecode=languagecode,
+                    currency_code=currency_code,
+                    fields=fields,
+                )
 
-            children_and_beds_text = {}
-            for key, value in roomInfo.get("children_and_beds_text", {}).items():
-                if isinstance(value, list):
-                    children_and_beds_text[key] = []
-                    for item in value:
-                        if len(item.get("text", "")) > 0:
-                            children_and_beds_text[key].append(item.get("text", ""))
-                elif isinstance(value, int):
-                    children_and_beds_text[key] = value
+        results = await asyncio.gather(*(fetch(hotel_id) for hotel_id in hotel_ids))
 
-            description = roomInfo.get("description", "")
+        hotels = []
+        failed_hotels = []
+        for hotel_id, result in zip(hotel_ids, results):
+            if result["success"]:
+                # search_hotel_details 的 data 外层还包了一层 {"success", "data"}
+                hotels.append(result["data"]["data"])
+            else:
+                failed_hotels.append({"hotel_id": str(hotel_id), "error": result["error"]})
 
-            bed_configurations = []
-            for bed_config in roomInfo.get("bed_configurations", []):
-                for bed_type in bed_config.get("bed_types", []):
-                    bed_name_cnt = bed_type.get("name_with_count", "")
-                    bed_desc = bed_type.get("description", "")
-                    bed_configurations.append({"name_with_count": bed_name_cnt, "description": bed_desc})
+        if hotel_ids and not hotels:
+            error_msg = "All hotel details retrieval failed:\n" + "\n".join(f"{item['hotel_id']}: {item['error']}" for item in failed_hotels)
+            return {"success": False, "error": error_msg}
 
-            room = {
-                "photos": photos,
-                "children_and_beds_text": children_and_beds_text,
-                "description": description,
-                "bed_configurations": bed_configurations,
-            }
-            rooms[roomId] = room
+        return {"success": True, "data": {"count": len(hotels), "hotels": hotels, "failed_hotels": failed_hotels}}
+
+    @staticmethod
+    def _parse_hotel_detail_payload(body: bytes, selector: FieldSelector) -> Dict[str, Any]:
+        """解码并解析酒店详情响应，需可序列化以便在解析进程池中执行"""
+        return BookingSource._parse_hotel_detail_response(json.loads(body), selector)
+
+    @staticmethod
+    def _parse_hotel_detail_response(data: Dict[str, Any], selector: FieldSelector) -> Dict[str, Any]:
+        # 检查API响应中是否有错误
+        if not data.get("status"):
+            return {"success": False, "error": data.get("message", "Unknown error")}
+
+        return {"success": True, "data": BookingSource._parse_hotel_detail(data.get("data", {}), selector)}
+
+    @staticmethod
+    def _hotel_detail_keep(selector: FieldSelector) -> Dict[str, set]:
+        """流式解码酒店详情时需要构建的键，见 streaming.load_json；未被 selector 请求的大块子结构不构建"""
+        data_keys = set(HOTEL_DETAIL_KEYS)
+        for field, key in (("facilities", "facilities_block"), ("hotel_important_information", "hotel_important_information_with_codes"), ("rooms", "rooms")):
+            if not selector.wants(field):
+                data_keys.discard(key)
+        return {"": {"status", "message", "data"}, "data": data_keys, "data.raw_data": {"reviewScore"}, "data.facilities_block": {"facilities"}}
+
+    @staticmethod
+    def _parse_hotel_detail(data: Dict[str, Any], selector: Optional[FieldSelector] = None) -> Dict[str, Any]:
+        """解析酒店详情，未被 selector 请求的子结构（设施、房间照片等）不做解析"""
+        if selector is None:
+            selector = FieldSelector()
+
+        facilities = []
+        if selector.wants("facilities"):
+            for facility in data.get("facilities_block", {}).get("facilities", []):
+                facility_name = facility.get("name", "")
+                if len(facility_name) > 0:
+                    facilities.append(facility_name)
+
+        hotel_important_information = []
+        if selector.wants("hotel_important_information"):
+            for item in data.get("hotel_important_information_with_codes", []):
+                info = item.get("phrase", "")
+                if len(info) > 0:
+                    hotel_important_information.append(info)
+
+        rooms = {}
+        if selector.wants("rooms"):
+            room_selector = selector.child("rooms")
+            for roomId, roomInfo in data.get("rooms", {}).items():
+                rooms[roomId] = BookingSource._parse_room(roomInfo, room_selector)
 
         hotel_detail = {
             "hotel_id": data.get("hotel_id", ""),  # 酒店 id
@@ -879,8 +1205,52 @@ class BookingSource(BaseAPI):
             "hotel_important_information": hotel_important_information,
             "rooms": rooms,
         }
+        if not selector.selects_all:
+            # rooms 已按子字段解析，这里只裁剪顶层字段
+            hotel_detail = {key: value for key, value in hotel_detail.items() if selector.wants(key)}
         return {"success": True, "data": hotel_detail}
 
+    @staticmethod
+    def _parse_room(roomInfo: Dict[str, Any], selector: FieldSelector) -> Dict[str, Any]:
+        """解析单个房间信息"""
+        photos = []
+        if selector.wants("photos"):
+            for photo in roomInfo.get("photos", []):
+                url = photo.get("url_max1280", "")
+                if len(url) == 0:
+                    url = photo.get("url_original", "")
+                if len(url) > 0:
+                    photos.append(url)
+
+        children_and_beds_text = {}
+        if selector.wants("children_and_beds_text"):
+            for key, value in roomInfo.get("children_and_beds_text", {}).items():
+                if isinstance(value, list):
+                    children_and_beds_text[key] = []
+                    for item in value:
+                        if len(item.get("text", "")) > 0:
+                            children_and_beds_text[key].append(item.get("text", ""))
+                elif isinstance(value, int):
+                    children_and_beds_text[key] = value
+
+        description = roomInfo.get("description", "")
+
+        bed_configurations = []
+        if selector.wants("bed_configurations"):
+            for bed_config in roomInfo.get("bed_configurations", []):
+                for bed_type in bed_config.get("bed_types", []):
+                    bed_name_cnt = bed_type.get("name_with_count", "")
+                    bed_desc = bed_type.get("description", "")
+                    bed_configurations.append({"name_with_count": bed_name_cnt, "description": bed_desc})
+
+        room = {
+            "photos": photos,
+            "children_and_beds_text": children_and_beds_text,
+            "description": description,
+            "bed_configurations": bed_configurations,
+        }
+        return selector.apply(room)
+
     def _format_duration(self, seconds: int) -> str:
         """Convert seconds to hours and minutes format"""
         hours = seconds // 3600
@@ -889,8 +1259,6 @@ class BookingSource(BaseAPI):
 
 
 if __name__ == "__main__":
-    import json
-
     from external_api.data_sources.client import get_client
 
     async def main():
@@ -0,0 +1,228 @@
+"""
+Small in-process TTL cache for data source lookups
+
+Used for upstream lookups whose results rarely change (e.g. Booking destination
+IDs). Keys are normalized before use so "Shanghai ", "shanghai" and "SHANGHAI"
+share one entry, and a lookup that misses can optionally reuse the entry of a
+key that only differs in whitespace and punctuation ("new-york" vs "newyork",
+"st. john's" vs "st johns"). Similar-looking keys are never merged otherwise:
+"kingston" and "kingstown" are different places.
+
+When ``path`` is given the cache is persisted to a JSON file so entries survive
+process restarts. Writes are deferred: ``set`` only marks the cache dirty and a
+background timer writes all changes made within ``save_delay`` seconds at
+once, off the event loop. Pending writes are flushed at interpreter exit, or
+explicitly with ``flush``.
+"""
+
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+from . import metrics
+
+logger = logging.getLogger("data_sources_cache")
+
+_SEPARATORS = re.compile(r"[\s,.\-_/]+")
+_NON_ALNUM = re.compile(r"[\W_]+")
+
+# 有未写入修改的持久化缓存，退出时写入
+_pending: "weakref.WeakSet[TTLCache]" = weakref.WeakSet()
+
+
+def normalize_key(key: str) -> str:
+    """
+    Normalize a free-text lookup key
+
+    Args:
+        key: Raw key, e.g. " New-York, "
+
+    Returns:
+        str: Case-folded key with unicode, whitespace and separators normalized, e.g. "new york"
+    """
+    key = unicodedata.normalize("NFKC", str(key)).casefold()
+    return _SEPARATORS.sub(" ", key).strip()
+
+
+def _loose_key(normalized: str) -> str:
+    """宽松匹配用的键：去掉所有空白和标点"""
+    return _NON_ALNUM.sub("", normalized)
+
+
+class TTLCache:
+    """
+    Thread-safe TTL cache with normalized keys and optional loose matching
+
+    Entries expire ``ttl`` seconds after they were set. When the cache is full
+    the entry closest to expiry is evicted.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int = 1024,
+        loose_match: bool = False,
+        path: Optional[str] = None,
+        name: Optional[str] = None,
+        save_delay: float = 1.0,
+    ):
+        """
+        Args:
+            ttl: Default time to live of an entry, in seconds
+            max_entries: Maximum number of entries kept
+            loose_match: On a miss, reuse the entry of a key that only differs in
+                whitespace and punctuation
+            path: JSON file to load entries from and persist them to; None keeps
+                the cache in memory only
+            name: Name under which hit/miss counters are exported in metrics
+            save_delay: Seconds changes are collected before they are written to ``path``
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.loose_match = loose_match
+        self.path = path
+        self.save_delay = save_delay
+        self._lock = threading.Lock()
+        # 串行化文件写入，写入时不持有 _lock
+        self._save_lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        self._dirty = False
+        # key -> (过期时间戳, 值)，使用墙上时间以便持久化
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self._load(path)
+        if name:
+            metrics.register_cache(name, self)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get the value cached for ``key``
+
+        Args:
+            key: Lookup key, normalized before use
+            default: Value returned on a miss
+
+        Returns:
+            Any: The cached value, or ``default``
+        """
+        normalized = normalize_key(key)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(normalized)
+            if entry is not None:
+                if entry[0] > now:
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[normalized]
+
+            loose = _loose_key(normalized) if self.loose_match else ""
+            if loose:
+                for candidate, (expires_at, value) in self._entries.items():
+                    if expires_at > now and _loose_key(candidate) == loose:
+                        logger.debug(f"Loose cache hit: {normalized!r} -> {candidate!r}")
+                        self.hits += 1
+                        return value
+
+            self.misses += 1
+            return default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Cache ``value`` for ``key``
+
+        Args:
+            key: Lookup key, normalized before use
+            value: Value to cache; must be JSON serializable when the cache is persisted
+            ttl: Time to live in seconds, defaults to the cache ttl
+        """
+        normalized = normalize_key(key)
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[normalized] = (expires_at, value)
+            if len(self._entries) > self.max_entries:
+                self._evict()
+            if self.path:
+                self._schedule_save()
+
+    def clear(self) -> None:
+        """Remove all entries (and the persisted file content)"""
+        with self._lock:
+            self._entries.clear()
+            if self.path:
+                self._schedule_save()
+
+    def flush(self) -> None:
+        """Write pending changes to ``path`` now"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty or not self.path:
+                return
+            self._dirty = False
+            _pending.discard(self)
+            path = self.path
+            snapshot = {key: [expires_at, value] for key, (expires_at, value) in self._entries.items()}
+        with self._save_lock:
+            self._save(path, snapshot)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self) -> None:
+        now = time.time()
+        self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+        overflow = len(self._entries) - self.max_entries
+        if overflow > 0:
+            for key, _ in sorted(self._entries.items(), key=lambda item: item[1][0])[:overflow]:
+                del self._entries[key]
+
+    def _load(self, path: str) -> None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load cache file {path}: {str(e)}")
+            return
+
+        now = time.time()
+        self._entries = {key: (expires_at, value) for key, (expires_at, value) in raw.items() if expires_at > now}
+
+    def _schedule_save(self) -> None:
+        # 调用方持有 _lock；合并 save_delay 内的修改，由定时器线程写入，不阻塞事件循环
+        self._dirty = True
+        _pending.add(self)
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _save(self, path: str, snapshot: Dict[str, Any]) -> None:
+        # 先写临时文件再替换，避免写入中断导致文件损坏
+        tmp_path = f"{path}.tmp"
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Failed to persist cache file {path}: {str(e)}")
+
+
+@atexit.register
+def _flush_pending() -> None:
+    for cache in list(_pending):
+        cache.flush()
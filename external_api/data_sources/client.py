@@ -2,18 +2,23 @@
 统一的数据源访问客户端
 """
 
+import asyncio
+import contextlib
 import importlib
 import inspect
+import json
 import logging
 import os
 import pkgutil
 import threading
+import weakref
 from enum import Enum
 from pathlib import Path
-from typing import Dict
+from typing import Any, AsyncIterator, Dict, Optional, cast
 
 from docstring_parser import parse
 
+from . import errors, executor, fixtures, instrumentation, metrics, payload_log, pipeline, streaming, tracing, transport
 from .base import EXCLUDE_METHODS, BaseAPI
 
 # 用于在shell中设置LLM_GATEWAY_BASE_URL环境变量
@@ -39,6 +44,56 @@ config = {
     "serper_base_url": "google.serper.dev",
     "external_api_proxy_url": get_external_api_proxy_url(),
     "timeout": 60,
+    # Booking 目的地ID缓存，path 为空时仅缓存在内存中
+    "booking_dest_cache_ttl": 7 * 24 * 3600,
+    "booking_dest_cache_path": os.getenv("BOOKING_DEST_CACHE_PATH"),
+    # Booking 航班按 (航线, 日期) 的短期缓存
+    "booking_flight_cache_ttl": 10 * 60,
+    # Twitter 增量获取（since_last_seen）记录的每个查询/用户最新推文 ID：保留秒数与持久化文件，path 为空时仅保存在内存中
+    "twitter_since_id_ttl": 30 * 24 * 3600,
+    "twitter_since_id_path": os.getenv("TWITTER_SINCE_ID_PATH"),
+    # 增量获取时最多翻页数，达到后仍未遇到已见过的推文时结果标记为 truncated
+    "twitter_since_max_pages": 10,
+    # 大响应解析使用的执行器: thread / process / none，超过 parse_offload_bytes 的响应才会交给执行器
+    "parse_executor": os.getenv("PARSE_EXECUTOR", "thread"),
+    "parse_executor_workers": 4,
+    "parse_offload_bytes": 256 * 1024,
+    # 事件循环监控：慢回调检测（归因到具体数据源方法）与循环延迟采样
+    "loop_monitor": os.getenv("DATA_SOURCES_LOOP_MONITOR", "").lower() in ("1", "true"),
+    "slow_callback_ms": 50,
+    "loop_lag_interval": 0.25,
+    # 调用延迟直方图、上游字节数/状态码等指标
+    "metrics_enabled": True,
+    # 调用与请求阶段（连接/发送/等待/下载/解析）的 tracing，trace_file 为 JSONL 输出文件
+    "tracing": os.getenv("DATA_SOURCES_TRACING", "").lower() in ("1", "true"),
+    "trace_file": os.getenv("DATA_SOURCES_TRACE_FILE"),
+    # 上游响应录制/回放：record 将响应写入 fixtures_path，replay 从中读取且不访问网络
+    "fixtures_mode": os.getenv("DATA_SOURCES_FIXTURES") or None,
+    "fixtures_path": os.getenv("DATA_SOURCES_FIXTURES_PATH"),
+    # 上游响应负载的调试日志（logger "data_sources_payload" 开启 DEBUG 时生效）：截断长度与采样比例
+    "payload_log_max_chars": int(os.getenv("DATA_SOURCES_PAYLOAD_LOG_MAX_CHARS", "2000")),
+    "payload_log_sample_rate": float(os.getenv("DATA_SOURCES_PAYLOAD_LOG_SAMPLE_RATE", "1.0")),
+    # 失败日志按 (logger, 错误类型) 限流：每 error_log_interval 秒最多 error_log_burst 条；解析/内部错误附带的堆栈帧数，0 为不附带
+    "error_log_interval": 60,
+    "error_log_burst": 10,
+    "error_traceback_frames": int(os.getenv("DATA_SOURCES_ERROR_TRACEBACK_FRAMES", "5")),
+    # 大响应（酒店详情、学术搜索）在安装了 ijson 时边接收边解码，只构建用到的字段；
+    # 逐块解码在事件循环上执行，默认关闭，酒店详情也只在 fields 不需要房间/设施时使用
+    "stream_json": os.getenv("DATA_SOURCES_STREAM_JSON", "").lower() in ("1", "true"),
+    "stream_json_chunk_size": 64 * 1024,
+    # 请求上游压缩响应（zstd/br/gzip/deflate 中本机可解码的格式），传输字节与解压后字节按调用记录在指标中
+    "upstream_compression": os.getenv("DATA_SOURCES_UPSTREAM_COMPRESSION", "true").lower() in ("1", "true"),
+    # 打开连接池的事件循环（SyncApiClient、批量任务）通过 HTTP/2 多路复用访问上游，需要安装 h2
+    "upstream_http2": os.getenv("DATA_SOURCES_UPSTREAM_HTTP2", "").lower() in ("1", "true"),
+    # 连接池缓存上游域名解析结果的秒数（0 为不缓存）；连接池创建时在后台预先建立的上游连接数（0 为不预热）
+    "upstream_dns_ttl": 300,
+    "upstream_warm_connections": int(os.getenv("DATA_SOURCES_UPSTREAM_WARM_CONNECTIONS", "0")),
+    # 请求管道（见 pipeline）：幂等请求在超时/网络错误/429/5xx 时的重试次数与初始退避秒数，
+    # 按数据源名的每秒请求数上限，GET 响应的默认缓存秒数（0 为不缓存）
+    "pipeline_retries": int(os.getenv("DATA_SOURCES_PIPELINE_RETRIES", "0")),
+    "pipeline_retry_backoff": 0.2,
+    "pipeline_rate_limits": {},
+    "pipeline_cache_ttl": 0,
 }
 
 
@@ -53,6 +108,10 @@ class ApiClient:
     负责管理和调用所有数据源
 
     使用单例模式，全局只初始化一次，线程安全
+    连接池等资源按事件循环隔离，通过 ApiClient.open() 绑定到当前事件循环并在退出时关闭:
+
+        async with ApiClient.open() as client:
+            result = await client.booking.search_flights(...)
     """
 
     _exclude_sources = []
@@ -61,6 +120,10 @@ class ApiClient:
     _lock = threading.Lock()
     _initialized = False
 
+    # 事件循环 -> [嵌套 open() 的层数, 连接池是否由 open() 打开]
+    _loop_refs: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, list]" = weakref.WeakKeyDictionary()
+    _loop_lock = threading.Lock()
+
     def __new__(cls):
         if cls._instance is None:
             with cls._lock:
@@ -78,6 +141,17 @@ class ApiClient:
                 return
             self._sources: Dict[str, BaseAPI] = {}
             self._functions: Dict[str, BaseAPI] = {}
+            executor.configure_from(config)
+            errors.configure_from(config)
+            fixtures.configure_from(config)
+            payload_log.configure_from(config)
+            pipeline.configure_from(config)
+            streaming.configure_from(config)
+            transport.configure_from(config)
+            metrics.enabled = config.get("metrics_enabled", True)
+            tracing.configure(enabled=config.get("tracing", False), trace_file=config.get("trace_file"))
+            if config.get("loop_monitor"):
+                instrumentation.enable_loop_monitor(config["slow_callback_ms"], config["loop_lag_interval"])
             self._load_data_sources()
             self._initialized = True
 
@@ -105,11 +179,133 @@ class ApiClient:
                         and item.__name__ not in self._exclude_sources
                     ):
                         source = item(config)
+                        instrumentation.instrument_source(source, exclude=EXCLUDE_METHODS)
                         type_dict[source.source_name] = source
             except Exception as e:
                 logger.error(f"加载数据源模块 {module_info.name} 失败: {str(e)}\n")
                 logger.exception(e)
 
+    @classmethod
+    @contextlib.asynccontextmanager
+    async def open(
+        cls,
+        pool_size: int = 100,
+        pool_size_per_host: int = 0,
+        http2: Optional[bool] = None,
+        warm_connections: Optional[int] = None,
+    ) -> AsyncIterator["ApiClient"]:
+        """
+        Use the client with pooled upstream connections bound to the running event loop
+
+        Every event loop (thread) gets its own pool; nested or concurrent
+        ``open()`` blocks on the same loop share it, and the pool, the HTTP/2
+        client and the function proxy sessions of the loop are closed when the
+        outermost block exits. A pool opened by someone else on the loop
+        (e.g. ``SyncApiClient``) is used but left open.
+
+        Args:
+            pool_size: int - maximum number of pooled upstream connections, 0 for no limit
+            pool_size_per_host: int - maximum number of pooled connections per upstream host, 0 for no limit
+            http2: Optional[bool] - multiplex requests over HTTP/2, None for the upstream_http2 config
+            warm_connections: Optional[int] - connections to open in the background, None for the upstream_warm_connections config
+
+        Returns:
+            AsyncIterator[ApiClient]: The global client
+        """
+        client = cls()
+        loop = asyncio.get_running_loop()
+        with cls._loop_lock:
+            refs = cls._loop_refs.get(loop)
+            first = refs is None
+            if refs is None:
+                refs = cls._loop_refs[loop] = [0, transport.get_pool() is None]
+            refs[0] += 1
+        if first and refs[1]:
+            transport.open_pool(limit=pool_size, limit_per_host=pool_size_per_host, http2=http2, warm_connections=warm_connections)
+        try:
+            yield client
+        finally:
+            with cls._loop_lock:
+                refs[0] -= 1
+                last = refs[0] == 0
+                if last:
+                    cls._loop_refs.pop(loop, None)
+            if last and refs[1]:
+                await client._close_loop_resources()
+
+    async def _close_loop_resources(self) -> None:
+        """关闭当前事件循环的连接池、HTTP/2 客户端与函数代理的会话"""
+        # function_utils 依赖 data_sources，延迟导入避免循环引用
+        from ..function_utils import close_function_transports
+
+        try:
+            await transport.close_pool()
+        finally:
+            await close_function_transports()
+
+    def enable_loop_monitor(self, slow_callback_ms: float = 50, lag_interval: float = 0.25) -> None:
+        """
+        Enable event loop lag sampling and slow-callback detection
+
+        Args:
+            slow_callback_ms: float - callbacks blocking the loop at least this long are attributed to the running source method
+            lag_interval: float - sampling interval of the loop lag, in seconds
+        """
+        instrumentation.enable_loop_monitor(slow_callback_ms, lag_interval)
+
+    def get_loop_stats(self) -> Dict[str, Any]:
+        """
+        Get the event loop lag and the blocking time per source method
+
+        Returns:
+            Dict[str, Any]: See instrumentation.get_loop_stats
+        """
+        return instrumentation.get_loop_stats()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get latency histograms, error rates, upstream bytes/status codes and cache hit ratios of all calls
+
+        Returns:
+            Dict[str, Any]: See metrics.snapshot, plus the event loop statistics under "loop"
+        """
+        snapshot = metrics.snapshot()
+        snapshot["loop"] = instrumentation.get_loop_stats()
+        return snapshot
+
+    def export_metrics(self, format: str = "prometheus") -> str:
+        """
+        Export all metrics as text
+
+        Args:
+            format: str - "prometheus" (text exposition format) or "json"
+
+        Returns:
+            str: The rendered metrics
+        """
+        if format == "json":
+            return json.dumps(self.get_metrics(), ensure_ascii=False)
+        if format == "prometheus":
+            return metrics.to_prometheus(instrumentation.get_loop_stats())
+        raise ValueError(f"Unknown metrics format: {format}, options: prometheus, json")
+
+    async def warm_up(self, connections: Optional[int] = None) -> int:
+        """
+        Resolve the proxy host and open warm upstream connections on the running event loop
+
+        Opens the connection pool of the loop first if none is open (close it
+        with transport.close_pool), so the first calls reuse the connections
+        instead of paying for DNS resolution and TCP/TLS handshakes.
+
+        Args:
+            connections: Optional[int] - connections to open, defaults to the upstream_warm_connections config (at least 1)
+
+        Returns:
+            int: Number of connections opened
+        """
+        transport.open_pool(warm_connections=0)
+        return await transport.warm_up(cast(Optional[str], config.get("external_api_proxy_url")), connections)
+
     def get_function_desc(self, function_name: str) -> str:
         """
         Get a brief description and usage example of the specified function
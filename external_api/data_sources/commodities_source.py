@@ -3,12 +3,12 @@ Commodities data source implementation
 """
 
 import asyncio
-import json
 import logging
 from typing import Any, Dict
 
 import aiohttp
 
+from . import errors, payload_log, pipeline
 from .base import BaseAPI
 
 logger = logging.getLogger("commodities_source")
@@ -77,40 +77,30 @@ class CommoditiesSource(BaseAPI):
         try:
             request_url = f"{self.proxy_url}/v1/supported"
 
-            # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self._headers, timeout=self._timeout) as response:
-                    response.raise_for_status()
-
-                    # Parse the response
-                    data = await response.json(content_type=None)
-
-            if isinstance(data, str):
-                data = json.loads(data)
+            data = await self._request("GET", request_url, headers=self._headers, timeout=self._timeout, decode=pipeline.DECODE_LENIENT_JSON)
 
             if not isinstance(data, dict):
-                raise ValueError(f"Invalid API response format: {data}")
+                raise ValueError(f"Invalid API response format: {payload_log.preview(data)}")
 
             if not data.get("success", False):
-                raise ValueError(f"API response failed: {data}")
+                raise ValueError(f"API response failed: {payload_log.preview(data)}")
 
             return {
                 "success": True,
                 "data": {"commodities": data.get("supported_commodities", {}), "currencies": data.get("supported_currencies", {})},
             }
 
-        except asyncio.TimeoutError:
+        except asyncio.TimeoutError as e:
             error_msg = f"Request timeout (timeout={self._timeout}s)"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except aiohttp.ClientError as e:
             error_msg = f"HTTP request error: {str(e)}"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except Exception as e:
             error_msg = f"Error occurred while getting supported commodities: {str(e)}"
-            logger.error(error_msg)
-            logger.exception(e)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
 
     async def get_commodities_price(
@@ -164,37 +154,27 @@ class CommoditiesSource(BaseAPI):
 
             request_url = f"{self.proxy_url}/v1/market-data"
 
-            # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self._headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-
-                    # Parse the response
-                    data = await response.json(content_type=None)
-
-            if isinstance(data, str):
-                data = json.loads(data)
+            data = await self._request("GET", request_url, params=params, headers=self._headers, timeout=self._timeout, decode=pipeline.DECODE_LENIENT_JSON)
 
             if not isinstance(data, dict):
-                raise ValueError(f"Invalid API response format: {data}")
+                raise ValueError(f"Invalid API response format: {payload_log.preview(data)}")
 
             if not data.get("success", False):
-                raise ValueError(f"API response failed: {data}")
+                raise ValueError(f"API response failed: {payload_log.preview(data)}")
 
             return {"success": True, "data": {"base_currency": data.get("base_currency", ""), "rates": data.get("rates", {})}}
 
-        except asyncio.TimeoutError:
+        except asyncio.TimeoutError as e:
             error_msg = f"Request timeout (timeout={self._timeout}s)"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except aiohttp.ClientError as e:
             error_msg = f"HTTP request error: {str(e)}"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except Exception as e:
             error_msg = f"Error occurred while getting commodity price: {str(e)}"
-            logger.error(error_msg)
-            logger.exception(e)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
 
 
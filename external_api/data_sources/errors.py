@@ -0,0 +1,227 @@
+"""
+Error classification and cheap failure logging
+
+During an upstream outage every call fails, and formatting a full traceback
+plus a log record per failure becomes a CPU hotspot of its own. Sources and
+``FunctionProxy`` report failures through this module instead:
+
+- ``classify`` maps an exception to an ``ErrorKind`` (timeout, upstream 4xx,
+  upstream 5xx, rate limited, parse, network, internal), counted per call in
+  ``metrics``;
+- ``log_failure`` logs at most ``log_burst`` records per logger and kind every
+  ``log_interval`` seconds and reports how many were suppressed;
+- tracebacks are only formatted for unexpected errors (parse, internal), only
+  for records that are actually emitted, and limited to the innermost
+  ``traceback_frames`` frames (0 disables them).
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+import traceback
+from enum import Enum
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+import httpx
+
+from . import metrics
+from .instrumentation import current_call
+
+
+class ErrorKind(Enum):
+    TIMEOUT = "timeout"
+    RATE_LIMITED = "rate_limited"
+    UPSTREAM_4XX = "upstream_4xx"
+    UPSTREAM_5XX = "upstream_5xx"
+    NETWORK = "network"
+    PARSE = "parse"
+    INTERNAL = "internal"
+
+
+# 预期内的上游故障不需要堆栈，只有解析错误与内部错误才附带
+_TRACEBACK_KINDS = (ErrorKind.PARSE, ErrorKind.INTERNAL)
+
+_settings: Dict[str, Any] = {
+    "log_interval": 60.0,
+    "log_burst": 10,
+    "traceback_frames": 5,
+}
+# (logger 名, 错误类型) -> [窗口起始时间, 窗口内已输出条数, 窗口内被抑制条数]
+_windows: Dict[Tuple[str, ErrorKind], list] = {}
+_lock = threading.Lock()
+
+
+def configure(log_interval: Optional[float] = None, log_burst: Optional[int] = None, traceback_frames: Optional[int] = None) -> None:
+    """
+    Configure failure logging
+
+    Args:
+        log_interval: Length in seconds of the rate limiting window
+        log_burst: Records logged per logger and error kind within a window, further ones are suppressed
+        traceback_frames: Innermost frames of the traceback logged for parse and internal errors, 0 for none
+    """
+    with _lock:
+        if log_interval is not None:
+            _settings["log_interval"] = max(0.0, log_interval)
+        if log_burst is not None:
+            _settings["log_burst"] = max(1, log_burst)
+        if traceback_frames is not None:
+            _settings["traceback_frames"] = max(0, traceback_frames)
+        _windows.clear()
+
+
+def configure_from(config: Dict[str, Any]) -> None:
+    """
+    Configure failure logging from the data source config dict
+
+    Args:
+        config: Config with the optional keys error_log_interval, error_log_burst and error_traceback_frames
+    """
+    configure(
+        log_interval=config.get("error_log_interval"),
+        log_burst=config.get("error_log_burst"),
+        traceback_frames=config.get("error_traceback_frames"),
+    )
+
+
+def classify_status(status: int) -> ErrorKind:
+    """
+    Classify an upstream HTTP error status
+
+    Args:
+        status: HTTP status code, at least 400
+
+    Returns:
+        ErrorKind: RATE_LIMITED for 429, UPSTREAM_4XX / UPSTREAM_5XX otherwise
+    """
+    if status == 429:
+        return ErrorKind.RATE_LIMITED
+    if status >= 500:
+        return ErrorKind.UPSTREAM_5XX
+    return ErrorKind.UPSTREAM_4XX
+
+
+def classify(exc: BaseException) -> ErrorKind:
+    """
+    Classify an exception raised by a data source or function call
+
+    Args:
+        exc: The exception
+
+    Returns:
+        ErrorKind: Kind of the failure
+    """
+    if isinstance(exc, (asyncio.TimeoutError, httpx.TimeoutException)):
+        return ErrorKind.TIMEOUT
+    if isinstance(exc, aiohttp.ClientResponseError) and exc.status >= 400:
+        return classify_status(exc.status)
+    if isinstance(exc, httpx.HTTPStatusError):
+        return classify_status(exc.response.status_code)
+    if isinstance(exc, (aiohttp.ContentTypeError, json.JSONDecodeError, httpx.DecodingError)):
+        return ErrorKind.PARSE
+    if isinstance(exc, (aiohttp.ClientError, httpx.TransportError)):
+        return ErrorKind.NETWORK
+    if isinstance(exc, (ValueError, KeyError, IndexError, TypeError)):
+        return ErrorKind.PARSE
+    return ErrorKind.INTERNAL
+
+
+def record(kind: ErrorKind) -> None:
+    """
+    Count a failure of the running call by kind
+
+    Args:
+        kind: Kind of the failure
+    """
+    metrics.record_error_kind(current_call.get(), kind.value)
+
+
+def format_traceback(exc: BaseException, frames: Optional[int] = None) -> str:
+    """
+    Format the innermost frames of an exception's traceback
+
+    Args:
+        exc: The exception
+        frames: Number of innermost frames, defaults to the configured traceback_frames
+
+    Returns:
+        str: The formatted traceback, "" when frames is 0
+    """
+    frames = _settings["traceback_frames"] if frames is None else frames
+    if frames <= 0:
+        return ""
+    return "".join(traceback.format_exception(type(exc), exc, exc.__traceback__, limit=-frames, chain=False))
+
+
+def format_error(exc: BaseException) -> str:
+    """
+    Describe an exception for an error result, with a truncated traceback for parse and internal errors
+
+    Args:
+        exc: The exception
+
+    Returns:
+        str: e.g. "Error (upstream_5xx): 503, message='Service Unavailable', url='...'"
+    """
+    kind = classify(exc)
+    message = f"Error ({kind.value}): {str(exc)}"
+    if kind in _TRACEBACK_KINDS:
+        stack = format_traceback(exc)
+        if stack:
+            message = f"{message}\n{stack.rstrip()}"
+    return message
+
+
+def _admit(logger_name: str, kind: ErrorKind) -> Tuple[bool, int]:
+    """按 (logger, 错误类型) 限流，返回 (是否输出, 此前被抑制的条数)"""
+    now = time.monotonic()
+    with _lock:
+        window = _windows.get((logger_name, kind))
+        if window is None or now - window[0] >= _settings["log_interval"]:
+            suppressed = window[2] if window is not None else 0
+            _windows[(logger_name, kind)] = [now, 1, 0]
+            return True, suppressed
+        if window[1] < _settings["log_burst"]:
+            window[1] += 1
+            return True, 0
+        window[2] += 1
+        return False, 0
+
+
+def log_failure(logger: logging.Logger, message: str, exc: BaseException, level: int = logging.ERROR) -> ErrorKind:
+    """
+    Classify, count and log (rate limited) a failed call
+
+    Args:
+        logger: Logger of the source
+        message: Error message, e.g. "Error occurred while searching flights: ..."
+        exc: The exception that made the call fail
+        level: Log level
+
+    Returns:
+        ErrorKind: Kind of the failure
+    """
+    kind = classify(exc)
+    record(kind)
+    if not logger.isEnabledFor(level):
+        return kind
+    emit, suppressed = _admit(logger.name, kind)
+    if not emit:
+        return kind
+    if suppressed:
+        message = f"{message} ({suppressed} similar {kind.value} errors suppressed)"
+    if kind in _TRACEBACK_KINDS:
+        stack = format_traceback(exc)
+        if stack:
+            message = f"{message}\n{stack.rstrip()}"
+    logger.log(level, message)
+    return kind
+
+
+def reset() -> None:
+    """Reset the rate limiting windows"""
+    with _lock:
+        _windows.clear()
@@ -0,0 +1,140 @@
+"""
+Worker pool for CPU-heavy response parsing
+
+Decoding and simplifying a large upstream payload (hotel details with dozens of
+rooms, 1m Yahoo charts, 100-tweet pages) can take tens of milliseconds, during
+which every other coroutine on the event loop is stalled. Sources hand such
+work to ``run_parse``: payloads below ``offload_bytes`` are parsed inline (the
+hand-off would cost more than it saves), larger ones run on a shared executor.
+
+The executor kind is configurable:
+    - "thread": ThreadPoolExecutor, cheap hand-off; json decoding releases the
+      event loop but still competes for the GIL
+    - "process": ProcessPoolExecutor, true parallelism; the callable and its
+      arguments must be picklable, so sources pass the raw response bytes and
+      get back only the simplified result; workers are started with "spawn",
+      so scripts must guard their entry point with ``if __name__ == "__main__"``
+    - "none": always parse inline
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from . import tracing
+
+logger = logging.getLogger("data_sources_executor")
+
+EXECUTOR_KINDS = ("thread", "process", "none")
+
+_settings: Dict[str, Any] = {
+    "kind": "thread",
+    "max_workers": min(4, os.cpu_count() or 1),
+    "offload_bytes": 256 * 1024,
+}
+_executor: Optional[Executor] = None
+_lock = threading.Lock()
+
+
+def configure(kind: Optional[str] = None, max_workers: Optional[int] = None, offload_bytes: Optional[int] = None) -> None:
+    """
+    Configure the parse executor; a running executor is replaced on next use
+
+    Args:
+        kind: One of "thread", "process", "none"
+        max_workers: Number of workers of the pool
+        offload_bytes: Payloads of at least this many bytes are parsed on the executor
+    """
+    global _executor
+    if kind is not None and kind not in EXECUTOR_KINDS:
+        raise ValueError(f"Unknown parse executor kind: {kind}, options: {list(EXECUTOR_KINDS)}")
+
+    with _lock:
+        if kind is not None:
+            _settings["kind"] = kind
+        if max_workers is not None:
+            _settings["max_workers"] = max(1, max_workers)
+        if offload_bytes is not None:
+            _settings["offload_bytes"] = offload_bytes
+        old_executor, _executor = _executor, None
+
+    if old_executor is not None:
+        old_executor.shutdown(wait=False)
+
+
+def configure_from(config: Dict[str, Any]) -> None:
+    """
+    Configure the parse executor from the data source config dict
+
+    Args:
+        config: Config with the optional keys parse_executor, parse_executor_workers and parse_offload_bytes
+    """
+    configure(
+        kind=config.get("parse_executor"),
+        max_workers=config.get("parse_executor_workers"),
+        offload_bytes=config.get("parse_offload_bytes"),
+    )
+
+
+def get_executor() -> Optional[Executor]:
+    """
+    Get the shared parse executor, creating it on first use
+
+    Returns:
+        Optional[Executor]: The executor, or None when the kind is "none"
+    """
+    global _executor
+    if _executor is not None or _settings["kind"] == "none":
+        return _executor
+
+    with _lock:
+        if _executor is None:
+            if _settings["kind"] == "process":
+                # spawn 避免在已有线程/事件循环的进程中 fork
+                _executor = ProcessPoolExecutor(max_workers=_settings["max_workers"], mp_context=multiprocessing.get_context("spawn"))
+            else:
+                _executor = ThreadPoolExecutor(max_workers=_settings["max_workers"], thread_name_prefix="parse")
+            logger.info(f"Started {_settings['kind']} parse executor with {_settings['max_workers']} workers")
+    return _executor
+
+
+def shutdown(wait: bool = True) -> None:
+    """
+    Shut down the shared parse executor
+
+    Args:
+        wait: Whether to wait for pending parses to finish
+    """
+    global _executor
+    with _lock:
+        old_executor, _executor = _executor, None
+    if old_executor is not None:
+        old_executor.shutdown(wait=wait)
+
+
+async def run_parse(func: Callable[..., Any], *args: Any, size: int, **kwargs: Any) -> Any:
+    """
+    Run a parse function, on the executor if the payload is large
+
+    Args:
+        func: Parse function; must be picklable for the process executor, i.e. a module function or staticmethod
+            (source instances are not picklable: ApiClient installs instrumentation wrappers on them)
+        *args: Positional arguments of func
+        size: Payload size in bytes, compared with the configured offload_bytes
+        **kwargs: Keyword arguments of func
+
+    Returns:
+        Any: The return value of func; exceptions raised by func are propagated
+    """
+    executor = get_executor() if size >= _settings["offload_bytes"] else None
+    with tracing.start_span("parse", {"payload.bytes": size, "parse.offloaded": executor is not None}):
+        if executor is None:
+            return func(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
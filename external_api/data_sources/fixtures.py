@@ -0,0 +1,419 @@
+"""
+Record / replay of upstream responses
+
+In record mode every upstream response (status, headers and decoded body) is
+appended to a fixture store, one gzip-compressed JSONL file per call
+(``booking.search_hotel_details.jsonl.gz``, ...). In replay mode the sessions
+returned by ``BaseAPI._client_session`` / ``BaseAPI._http_client`` answer from
+the store in-process without touching the network, so parsing changes can be
+benchmarked and compared across commits on realistic payloads:
+
+    fixtures.configure("record", "fixtures/")   # run the calls once against the real upstream
+    fixtures.configure("replay", "fixtures/")   # later: same calls, no network
+
+Requests are matched on method, path, query and body (the upstream host is
+ignored); a request without an exact match falls back to the most recent
+response recorded for the same method and path.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from .instrumentation import current_call
+
+logger = logging.getLogger("data_sources_fixtures")
+
+RECORD = "record"
+REPLAY = "replay"
+FIXTURE_MODES = (RECORD, REPLAY)
+
+# 响应体已解码保存，这些头不再与之对应
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive", "set-cookie"}
+_UNSAFE_FILENAME = re.compile(r"[^\w.\-]+")
+
+mode: Optional[str] = None
+_store: Optional["FixtureStore"] = None
+
+
+def _body_digest(body: Optional[bytes]) -> str:
+    """请求体摘要，JSON 请求体按排序后的键计算，不受序列化顺序影响"""
+    if not body:
+        return ""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode("utf-8")
+    except ValueError:
+        pass
+    return hashlib.sha1(body).hexdigest()[:16]
+
+
+def request_key(method: str, url: Any, body: Optional[bytes] = None) -> str:
+    """
+    Build the lookup key of a request
+
+    Args:
+        method: HTTP method
+        url: Request url including the query; the scheme and host are ignored
+        body: Request body
+
+    Returns:
+        str: e.g. "GET /api/v1/hotels/getHotelDetails?arrival_date=2025-06-01&hotel_id=191605"
+    """
+    url = URL(str(url))
+    query = "&".join(f"{name}={value}" for name, value in sorted(url.query.items()))
+    key = f"{method.upper()} {url.path}"
+    if query:
+        key = f"{key}?{query}"
+    digest = _body_digest(body)
+    if digest:
+        key = f"{key}#{digest}"
+    return key
+
+
+class FixtureStore:
+    """
+    Directory of recorded responses, one ``<call>.jsonl.gz`` file per call
+
+    Each line holds one response:
+    {"call": ..., "key": ..., "status": 200, "headers": {...}, "body": ..., "encoding": "utf-8" | "base64", "recorded_at": ...}
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Fixture directory, created on first write
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        self._fallback: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def _file(self, call_name: str) -> str:
+        return os.path.join(self.path, f"{_UNSAFE_FILENAME.sub('_', call_name)}.jsonl.gz")
+
+    def add(self, call_name: Optional[str], key: str, status: int, headers: Any, body: bytes) -> None:
+        """
+        Append a response to the store
+
+        Args:
+            call_name: Call the response belongs to, None if outside of any call
+            key: Request key, see ``request_key``
+            status: HTTP status code
+            headers: Response headers
+            body: Decoded response body
+        """
+        try:
+            text, encoding = body.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            text, encoding = base64.b64encode(body).decode("ascii"), "base64"
+        entry: Dict[str, Any] = {
+            "call": call_name or "unattributed",
+            "key": key,
+            "status": status,
+            "headers": {name: value for name, value in headers.items() if name.lower() not in _DROPPED_HEADERS},
+            "body": text,
+            "encoding": encoding,
+            "recorded_at": time.time(),
+        }
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            # gzip 支持多成员追加，读取时会依次解压
+            with gzip.open(self._file(entry["call"]), "ab") as f:
+                f.write(line)
+            if self._index is not None:
+                self._add_to_index(entry)
+
+    def entries(self, call_name: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over recorded responses
+
+        Args:
+            call_name: Only responses of this call, e.g. "twitter.get_user_tweets"; None for all calls
+
+        Returns:
+            Iterator[Dict[str, Any]]: Entries in recording order, with the body decoded back to bytes
+        """
+        if call_name is not None:
+            files = [self._file(call_name)]
+        elif os.path.isdir(self.path):
+            files = sorted(os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith(".jsonl.gz"))
+        else:
+            files = []
+
+        for file in files:
+            if not os.path.exists(file):
+                continue
+            with gzip.open(file, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    entry["body"] = base64.b64decode(entry["body"]) if entry.get("encoding") == "base64" else entry["body"].encode("utf-8")
+                    yield entry
+
+    def find(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the response recorded for a request
+
+        Args:
+            key: Request key, see ``request_key``
+
+        Returns:
+            Optional[Dict[str, Any]]: The exact match, else the latest response with the same method and path, else None
+        """
+        with self._lock:
+            if self._index is None:
+                self._index = {}
+                for recorded in self.entries():
+                    self._add_to_index(recorded)
+            entry = self._index.get(key)
+            if entry is None:
+                entry = self._fallback.get(self._route(key))
+                if entry is not None:
+                    logger.debug(f"No exact fixture for {key}, replaying {entry['key']}")
+            return entry
+
+    def _add_to_index(self, entry: Dict[str, Any]) -> None:
+        if self._index is None:
+            return
+        if isinstance(entry["body"], str):
+            entry = dict(entry, body=base64.b64decode(entry["body"]) if entry["encoding"] == "base64" else entry["body"].encode("utf-8"))
+        self._index[entry["key"]] = entry
+        self._fallback[self._route(entry["key"])] = entry
+
+    @staticmethod
+    def _route(key: str) -> Tuple[str, str]:
+        method, _, target = key.partition(" ")
+        return method, target.split("?", 1)[0].split("#", 1)[0]
+
+
+def configure(fixture_mode: Optional[str] = None, path: Optional[str] = None) -> None:
+    """
+    Switch record / replay on or off for all data sources
+
+    Args:
+        fixture_mode: "record", "replay" or None to talk to the upstream normally
+        path: Fixture directory, required when a mode is set
+    """
+    global mode, _store
+    if fixture_mode is not None and fixture_mode not in FIXTURE_MODES:
+        raise ValueError(f"Unknown fixture mode {fixture_mode!r}, expected one of {FIXTURE_MODES}")
+    if fixture_mode is not None and not path:
+        raise ValueError("A fixture directory is required to record or replay")
+    mode = fixture_mode
+    _store = FixtureStore(path) if fixture_mode and path else None
+
+
+def configure_from(config: Dict[str, Any]) -> None:
+    """
+    Configure record / replay from the client config
+
+    Args:
+        config: Client config with the ``fixtures_mode`` and ``fixtures_path`` keys
+    """
+    configure(config.get("fixtures_mode") or None, config.get("fixtures_path"))
+
+
+def get_store() -> Optional[FixtureStore]:
+    """Get the active fixture store, None when neither recording nor replaying"""
+    return _store
+
+
+def _request_body(kwargs: Dict[str, Any]) -> Optional[bytes]:
+    """按 aiohttp 的方式取得请求体字节，用于匹配录制的响应"""
+    if kwargs.get("json") is not None:
+        return json.dumps(kwargs["json"]).encode("utf-8")
+    data = kwargs.get("data")
+    if isinstance(data, str):
+        return data.encode("utf-8")
+    return data if isinstance(data, bytes) else None
+
+
+class _SessionRequest:
+    """Awaitable / async context manager returned by ``get`` / ``post`` / ``request`` of the fixture sessions"""
+
+    def __init__(self, session: Any, method: str, url: Any, kwargs: Dict[str, Any]):
+        self._session = session
+        self._method = method
+        self._url = url
+        self._kwargs = kwargs
+        self._response: Any = None
+
+    def __await__(self) -> Any:
+        return self._session._request(self._method, self._url, **self._kwargs).__await__()
+
+    async def __aenter__(self) -> Any:
+        self._response = await self._session._request(self._method, self._url, **self._kwargs)
+        return self._response
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self._response.release()
+
+
+class _FixtureSession:
+    """``get`` / ``post`` / ``request`` and the async context manager protocol shared by the fixture sessions"""
+
+    async def _request(self, method: str, str_or_url: Any, **kwargs: Any) -> Any:
+        raise NotImplementedError
+
+    def request(self, method: str, url: Any, **kwargs: Any) -> _SessionRequest:
+        return _SessionRequest(self, method, url, kwargs)
+
+    def get(self, url: Any, **kwargs: Any) -> _SessionRequest:
+        return _SessionRequest(self, "GET", url, kwargs)
+
+    def post(self, url: Any, **kwargs: Any) -> _SessionRequest:
+        return _SessionRequest(self, "POST", url, kwargs)
+
+    async def close(self) -> None:
+        pass
+
+    async def __aenter__(self) -> "_FixtureSession":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+
+class RecordingSession(_FixtureSession):
+    """
+    ``aiohttp.ClientSession`` wrapper appending every response it receives to the fixture store
+
+    The body is read eagerly, so ``read()`` / ``json()`` of the returned
+    response are served from memory.
+    """
+
+    def __init__(self, **kwargs: Any):
+        """
+        Args:
+            **kwargs: Arguments of ``aiohttp.ClientSession``
+        """
+        self._session = aiohttp.ClientSession(**kwargs)
+
+    @property
+    def closed(self) -> bool:
+        return self._session.closed
+
+    async def _request(self, method: str, str_or_url: Any, **kwargs: Any) -> aiohttp.ClientResponse:
+        response = await self._session.request(method, str_or_url, **kwargs)
+        body = await response.read()
+        store = _store
+        if store is not None:
+            store.add(current_call.get(), request_key(method, response.url, _request_body(kwargs)), response.status, response.headers, body)
+        return response
+
+    async def close(self) -> None:
+        await self._session.close()
+
+
+class _ReplayResponse:
+    """Subset of ``aiohttp.ClientResponse`` used by the data sources, backed by a fixture"""
+
+    def __init__(self, method: str, url: URL, status: int, headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.url = url
+        self.status = status
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self.content_type = self.headers.get("Content-Type", "application/json").split(";", 1)[0].strip()
+        self._body = body
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            request_info = aiohttp.RequestInfo(self.url, self.method, self.headers, self.url)
+            raise aiohttp.ClientResponseError(request_info, (), status=self.status, message="Replayed error response", headers=self.headers)
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding: Optional[str] = None) -> str:
+        return self._body.decode(encoding or "utf-8")
+
+    async def json(self, *, encoding: Optional[str] = None, loads: Any = json.loads, content_type: Optional[str] = "application/json") -> Any:
+        if content_type is not None and content_type not in self.content_type:
+            request_info = aiohttp.RequestInfo(self.url, self.method, self.headers, self.url)
+            raise aiohttp.ContentTypeError(request_info, (), status=self.status, message=f"Attempt to decode JSON with unexpected mimetype: {self.content_type}")
+        return loads(self._body.decode(encoding or "utf-8"))
+
+    def release(self) -> None:
+        pass
+
+
+class ReplaySession(_FixtureSession):
+    """
+    Drop-in for ``aiohttp.ClientSession`` answering from the fixture store
+
+    A request without a recorded response gets a 404, which surfaces as
+    ``aiohttp.ClientResponseError`` from ``raise_for_status`` like a real
+    upstream error.
+    """
+
+    def __init__(self, **kwargs: Any):
+        self.closed = False
+
+    async def _request(self, method: str, str_or_url: Any, **kwargs: Any) -> _ReplayResponse:
+        if self.closed:
+            raise RuntimeError("Session is closed")
+        url = URL(str(str_or_url))
+        if kwargs.get("params"):
+            url = url.extend_query({name: str(value) for name, value in dict(kwargs["params"]).items()})
+
+        key = request_key(method, url, _request_body(kwargs))
+        entry = _store.find(key) if _store is not None else None
+        if entry is None:
+            logger.warning(f"No fixture recorded for {key}")
+            return _ReplayResponse(method, url, 404, {"Content-Type": "application/json"}, b'{"message": "No fixture recorded"}')
+        return _ReplayResponse(method, url, entry["status"], entry["headers"], entry["body"])
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+async def record_httpx_response(response: Any) -> None:
+    """httpx response event hook appending the response to the fixture store"""
+    store = _store
+    if store is None:
+        return
+    body = await response.aread()
+    store.add(current_call.get(), request_key(response.request.method, response.request.url, response.request.content), response.status_code, response.headers, body)
+
+
+def replay_httpx_request(request: Any) -> Any:
+    """``httpx.MockTransport`` handler answering from the fixture store"""
+    import httpx
+
+    key = request_key(request.method, request.url, request.content)
+    entry = _store.find(key) if _store is not None else None
+    if entry is None:
+        logger.warning(f"No fixture recorded for {key}")
+        return httpx.Response(404, json={"message": "No fixture recorded"})
+    return httpx.Response(entry["status"], headers=entry["headers"], content=entry["body"])
+
+
+def load_bodies(path: str, call_name: str) -> List[bytes]:
+    """
+    Load the recorded response bodies of one call, e.g. to benchmark its parser
+
+    Args:
+        path: Fixture directory
+        call_name: Call name, e.g. "booking.search_hotel_details"
+
+    Returns:
+        List[bytes]: Bodies of the successful responses in recording order
+    """
+    return [entry["body"] for entry in FixtureStore(path).entries(call_name) if entry["status"] < 400]
@@ -0,0 +1,179 @@
+"""
+HTTP/2 transport for the aiohttp based data sources
+
+All data sources talk to the same ``external_api_proxy_url`` host. Over
+HTTP/1.1 every request in flight needs its own connection; over HTTP/2 many
+concurrent requests are multiplexed over one connection. aiohttp only speaks
+HTTP/1.1, so with HTTP/2 enabled (``upstream_http2`` config key or
+``transport.open_pool(http2=True)``) ``BaseAPI._client_session`` returns an
+``Http2Session``: a drop-in for the subset of ``aiohttp.ClientSession`` the
+sources use, backed by a shared ``httpx.AsyncClient(http2=True)`` of the
+event loop. Errors are mapped to the exceptions the sources already handle
+(``asyncio.TimeoutError``, ``aiohttp.ClientError``).
+
+HTTP/2 needs the optional ``h2`` package; without it the pooled HTTP/1.1
+path is used.
+"""
+
+import asyncio
+import importlib.util
+import json
+from typing import Any, Dict, Optional
+
+import aiohttp
+import httpx
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from .instrumentation import httpx_event_hooks
+
+
+def available() -> bool:
+    """
+    Whether HTTP/2 can be used
+
+    Returns:
+        bool: True when the ``h2`` package is installed
+    """
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_client(limit: int = 10, keepalive_timeout: float = 30, prior_knowledge: bool = False, headers: Optional[Dict[str, str]] = None) -> httpx.AsyncClient:
+    """
+    Create the shared HTTP/2 client of an event loop
+
+    Args:
+        limit: Maximum number of connections, 0 for no limit; each HTTP/2 connection multiplexes many requests
+        keepalive_timeout: Seconds an idle connection is kept open
+        prior_knowledge: Speak HTTP/2 without negotiation, needed for plain http:// upstreams
+        headers: Default request headers, e.g. Accept-Encoding
+
+    Returns:
+        httpx.AsyncClient: Client with the metrics event hooks
+    """
+    limits = httpx.Limits(max_connections=limit or None, max_keepalive_connections=limit or None, keepalive_expiry=keepalive_timeout)
+    return httpx.AsyncClient(http1=not prior_knowledge, http2=True, limits=limits, headers=headers, event_hooks=httpx_event_hooks(), trust_env=True)
+
+
+def _timeout_seconds(timeout: Any) -> Optional[float]:
+    if isinstance(timeout, aiohttp.ClientTimeout):
+        return timeout.total
+    return timeout
+
+
+class Http2Response:
+    """Subset of ``aiohttp.ClientResponse`` used by the data sources, backed by an httpx response"""
+
+    def __init__(self, method: str, response: httpx.Response):
+        self.method = method
+        self.url = URL(str(response.url))
+        self.status = response.status_code
+        self.headers = CIMultiDictProxy(CIMultiDict(response.headers.multi_items()))
+        self.content_type = self.headers.get("Content-Type", "application/octet-stream").split(";", 1)[0].strip()
+        self.http_version = response.http_version
+        self._response = response
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    def _request_info(self) -> aiohttp.RequestInfo:
+        return aiohttp.RequestInfo(self.url, self.method, self.headers, self.url)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise aiohttp.ClientResponseError(self._request_info(), (), status=self.status, message=self._response.reason_phrase, headers=self.headers)
+
+    async def read(self) -> bytes:
+        return self._response.content
+
+    async def text(self, encoding: Optional[str] = None) -> str:
+        return self._response.content.decode(encoding or self._response.encoding or "utf-8")
+
+    async def json(self, *, encoding: Optional[str] = None, loads: Any = json.loads, content_type: Optional[str] = "application/json") -> Any:
+        if content_type is not None and content_type not in self.content_type:
+            raise aiohttp.ContentTypeError(self._request_info(), (), status=self.status, message=f"Attempt to decode JSON with unexpected mimetype: {self.content_type}")
+        return loads(self._response.content.decode(encoding or "utf-8"))
+
+    def release(self) -> None:
+        pass
+
+
+class _Http2Request:
+    """Awaitable / async context manager returned by ``get`` / ``post`` / ``request`` of ``Http2Session``"""
+
+    def __init__(self, session: "Http2Session", method: str, url: Any, kwargs: Dict[str, Any]):
+        self._session = session
+        self._method = method
+        self._url = url
+        self._kwargs = kwargs
+
+    def __await__(self) -> Any:
+        return self._session._request(self._method, self._url, **self._kwargs).__await__()
+
+    async def __aenter__(self) -> Http2Response:
+        return await self._session._request(self._method, self._url, **self._kwargs)
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        pass
+
+
+class Http2Session:
+    """
+    Drop-in for ``aiohttp.ClientSession`` sending requests over the shared HTTP/2 client
+
+    Closing the session does not close the shared client.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, timeout: Any = None, **kwargs: Any):
+        """
+        Args:
+            client: Shared HTTP/2 client of the event loop
+            timeout: Default total timeout in seconds or ``aiohttp.ClientTimeout``
+            **kwargs: Other ``aiohttp.ClientSession`` arguments, ignored
+        """
+        self._client = client
+        self._timeout = timeout
+        self.closed = False
+
+    async def _request(self, method: str, str_or_url: Any, **kwargs: Any) -> Http2Response:
+        if self.closed:
+            raise RuntimeError("Session is closed")
+        timeout = _timeout_seconds(kwargs.get("timeout", self._timeout))
+        data = kwargs.get("data")
+        request = self._client.request(
+            method,
+            str(str_or_url),
+            params=kwargs.get("params"),
+            headers=kwargs.get("headers"),
+            json=kwargs.get("json"),
+            data=data if isinstance(data, dict) else None,
+            content=None if isinstance(data, dict) else data,
+            timeout=None if timeout else httpx.USE_CLIENT_DEFAULT,
+        )
+        try:
+            # 与 aiohttp 一致，timeout 为整个请求（含读取响应体）的总超时
+            response = await asyncio.wait_for(request, timeout) if timeout else await request
+        except httpx.TimeoutException as e:
+            raise asyncio.TimeoutError(str(e)) from e
+        except httpx.HTTPError as e:
+            raise aiohttp.ClientConnectionError(str(e)) from e
+        return Http2Response(method, response)
+
+    def request(self, method: str, url: Any, **kwargs: Any) -> _Http2Request:
+        return _Http2Request(self, method, url, kwargs)
+
+    def get(self, url: Any, **kwargs: Any) -> _Http2Request:
+        return _Http2Request(self, "GET", url, kwargs)
+
+    def post(self, url: Any, **kwargs: Any) -> _Http2Request:
+        return _Http2Request(self, "POST", url, kwargs)
+
+    async def close(self) -> None:
+        self.closed = True
+
+    async def __aenter__(self) -> "Http2Session":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
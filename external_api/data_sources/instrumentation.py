@@ -0,0 +1,437 @@
+"""
+Event-loop instrumentation for data source calls
+
+``ApiClient`` wraps every public async source method (and ``FunctionProxy``
+wraps each function call) so that the name of the running call
+(``"booking.search_flights"``) is kept in the ``current_call`` context variable
+while it runs, including in the tasks it spawns. The wrapper records the call
+latency and outcome in ``metrics``, and the HTTP hooks returned by
+``session_trace_configs`` / ``httpx_event_hooks`` attribute upstream bytes and
+status codes to the same call.
+
+Two optional monitors build on that:
+    - the slow-callback detector turns on the debug mode of the monitored loops
+      (``slow_callback_duration`` set to the threshold) and attributes the
+      callbacks asyncio reports as slow to the call whose context they ran in
+      (or to the coroutine, outside of any call)
+    - the loop-lag monitor periodically measures how late the loop wakes up a
+      sleeping task, i.e. how long other coroutines had to wait
+
+Both are disabled by default and only touch the loops that run instrumented
+calls; enable them with ``enable_loop_monitor`` (or the ``loop_monitor``
+config key), read the results with ``get_loop_stats`` and turn them off with
+``disable_loop_monitor``, which restores the debug settings of the loops.
+Debug mode adds some overhead to every callback, so keep the detector for
+diagnosis rather than always on.
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import threading
+import time
+import weakref
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from . import metrics, tracing
+
+if TYPE_CHECKING:
+    from .base import BaseAPI
+
+logger = logging.getLogger("data_sources_instrumentation")
+
+# 当前正在执行的数据源调用，格式为 "<source_name>.<method_name>"
+current_call: ContextVar[Optional[str]] = ContextVar("data_sources_current_call", default=None)
+
+UNATTRIBUTED = "<unattributed>"
+
+def instrument_source(source: "BaseAPI", exclude: Iterable[str] = ()) -> None:
+    """
+    Wrap the public async methods of a source instance so they set ``current_call`` and record metrics
+
+    Args:
+        source: Data source instance; wrappers are installed as instance attributes,
+            so docstrings, signatures and source code stay inspectable
+        exclude: Method names not to wrap
+    """
+    for method_name in dir(type(source)):
+        if method_name.startswith("_") or method_name in exclude:
+            continue
+        if not inspect.iscoroutinefunction(getattr(type(source), method_name, None)):
+            continue
+        method = getattr(source, method_name)
+        setattr(source, method_name, _wrap_call(f"{source.source_name}.{method_name}", method))
+
+
+def _wrap_call(call_name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(method)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await run_instrumented(call_name, method, *args, **kwargs)
+
+    return wrapper
+
+
+async def run_instrumented(call_name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Await ``func(*args, **kwargs)`` as the call ``call_name``
+
+    Sets ``current_call`` while the call runs, records its latency and
+    outcome and opens a tracing span for it; a call fails if it raises,
+    returns ``{"success": False, ...}`` or returns a ``ToolResult`` with
+    ``is_error``.
+
+    Args:
+        call_name: Call name, e.g. "booking.search_flights"
+        func: Async function to call
+        *args: Positional arguments of func
+        **kwargs: Keyword arguments of func
+
+    Returns:
+        Any: The return value of func
+    """
+    if _lag_monitor.enabled:
+        _lag_monitor.ensure_started()
+    if _slow_callback_detector.enabled:
+        _slow_callback_detector.enter(call_name)
+    token = current_call.set(call_name)
+    start = time.perf_counter()
+    error = True
+    try:
+        with tracing.start_span(call_name) as span:
+            result = await func(*args, **kwargs)
+            error = (isinstance(result, dict) and result.get("success") is False) or getattr(result, "is_error", False) is True
+            if error and span is not None:
+                span.status = "error"
+        return result
+    finally:
+        metrics.record_call(call_name, time.perf_counter() - start, error)
+        current_call.reset(token)
+
+
+async def _on_request_chunk_sent(session: aiohttp.ClientSession, context: Any, params: aiohttp.TraceRequestChunkSentParams) -> None:
+    metrics.record_bytes(current_call.get(), bytes_out=len(params.chunk))
+
+
+def _content_encoding(headers: Any) -> str:
+    return headers.get("Content-Encoding", "").strip().lower() or "identity"
+
+
+def record_response_body(headers: Any, size: int) -> None:
+    """
+    Record the decompressed body bytes of an upstream response read by the current call
+
+    The transferred bytes are taken from Content-Length when the response
+    headers arrive; without it they equal the body bytes for uncompressed
+    responses and are unknown (not counted) for compressed chunked ones.
+
+    Args:
+        headers: Response headers
+        size: Body bytes after decompression
+    """
+    wire = 0
+    if "Content-Length" not in headers and _content_encoding(headers) == "identity":
+        wire = size
+    metrics.record_bytes(current_call.get(), bytes_in=size, bytes_in_wire=wire)
+
+
+async def _on_response_chunk_received(session: aiohttp.ClientSession, context: Any, params: aiohttp.TraceResponseChunkReceivedParams) -> None:
+    # aiohttp 只在 read() 时发送该信号，chunk 为解压后的完整响应体
+    record_response_body(getattr(context, "response_headers", {}), len(params.chunk))
+
+
+async def _on_request_end(session: aiohttp.ClientSession, context: Any, params: aiohttp.TraceRequestEndParams) -> None:
+    call_name = current_call.get()
+    headers = params.response.headers
+    context.response_headers = headers
+    metrics.record_status(call_name, params.response.status)
+    metrics.record_encoding(call_name, _content_encoding(headers))
+    content_length = headers.get("Content-Length")
+    if content_length and content_length.isdigit():
+        metrics.record_bytes(call_name, bytes_in_wire=int(content_length))
+
+
+async def _on_request_exception(session: aiohttp.ClientSession, context: Any, params: aiohttp.TraceRequestExceptionParams) -> None:
+    metrics.record_status(current_call.get(), "exception")
+
+
+# aiohttp 的 Signal 类型标注与当前 aiosignal 的泛型不一致，append 处忽略 arg-type
+_trace_config = aiohttp.TraceConfig()
+_trace_config.on_request_chunk_sent.append(_on_request_chunk_sent)  # type: ignore[arg-type]
+_trace_config.on_response_chunk_received.append(_on_response_chunk_received)  # type: ignore[arg-type]
+_trace_config.on_request_end.append(_on_request_end)  # type: ignore[arg-type]
+_trace_config.on_request_exception.append(_on_request_exception)  # type: ignore[arg-type]
+
+
+def session_trace_configs() -> List[aiohttp.TraceConfig]:
+    """
+    Get the trace configs to pass to ``aiohttp.ClientSession`` for upstream metrics
+
+    Returns:
+        List[aiohttp.TraceConfig]: Trace configs recording bytes and status codes of the current call,
+            and the request phase spans when tracing is enabled
+    """
+    return [_trace_config, tracing.trace_config]
+
+
+async def _on_httpx_request(request: Any) -> None:
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        metrics.record_bytes(current_call.get(), bytes_out=int(content_length))
+
+
+async def _on_httpx_response(response: Any) -> None:
+    call_name = current_call.get()
+    metrics.record_status(call_name, response.status_code)
+    metrics.record_encoding(call_name, _content_encoding(response.headers))
+    # 数据源总会读取完整响应体，这里提前读取以得到传输字节数与解压后字节数
+    await response.aread()
+    metrics.record_bytes(call_name, bytes_in=len(response.content), bytes_in_wire=response.num_bytes_downloaded)
+
+
+def httpx_event_hooks() -> Dict[str, List[Callable[..., Any]]]:
+    """
+    Get the event hooks to pass to ``httpx.AsyncClient`` for upstream metrics
+
+    Returns:
+        Dict[str, List[Callable]]: httpx event hooks recording bytes and status codes of the current call
+    """
+    return {"request": [_on_httpx_request], "response": [_on_httpx_response]}
+
+
+class _BlockingStats:
+    """按调用方汇总的阻塞事件循环的回调耗时"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, owner: str, duration: float) -> None:
+        with self._lock:
+            stats = self._stats.get(owner)
+            if stats is None:
+                stats = self._stats[owner] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+            duration_ms = duration * 1000
+            stats["count"] += 1
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {owner: dict(stats) for owner, stats in sorted(self._stats.items(), key=lambda item: -item[1]["total_ms"])}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+class _SlowCallbackDetector(logging.Filter):
+    """借助事件循环自身的调试模式（slow_callback_duration）统计阻塞事件循环的回调"""
+
+    def __init__(self, stats: _BlockingStats):
+        super().__init__()
+        self.stats = stats
+        self.threshold = 0.05
+        self.enabled = False
+        self._lock = threading.Lock()
+        # 已开启调试模式的事件循环 -> 开启前的 (debug, slow_callback_duration)，关闭时恢复
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[bool, float]]" = weakref.WeakKeyDictionary()
+        # 回调 -> 该回调执行期间进入的第一个数据源调用（调用可能在同一回调内开始并结束）
+        self._entered: "weakref.WeakKeyDictionary[asyncio.Handle, str]" = weakref.WeakKeyDictionary()
+
+    def install(self, threshold: float) -> None:
+        self.threshold = threshold
+        with self._lock:
+            loops = list(self._loops)
+        for loop in loops:
+            loop.slow_callback_duration = threshold  # type: ignore[attr-defined]
+        if not self.enabled:
+            self.enabled = True
+            logging.getLogger("asyncio").addFilter(self)
+        self.attach()
+
+    def attach(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        with self._lock:
+            if loop in self._loops:
+                return
+            self._loops[loop] = (loop.get_debug(), getattr(loop, "slow_callback_duration", 0.1))
+        loop.slow_callback_duration = self.threshold  # type: ignore[attr-defined]
+        loop.set_debug(True)
+
+    def uninstall(self) -> None:
+        if not self.enabled:
+            return
+        self.enabled = False
+        logging.getLogger("asyncio").removeFilter(self)
+        with self._lock:
+            loops = list(self._loops.items())
+            self._loops.clear()
+            self._entered.clear()
+        for loop, (debug, duration) in loops:
+            if loop.is_closed():
+                continue
+            loop.slow_callback_duration = duration  # type: ignore[attr-defined]
+            loop.set_debug(debug)
+
+    def enter(self, call_name: str) -> None:
+        self.attach()
+        # 调试模式下事件循环在执行回调期间记录 _current_handle
+        handle = getattr(asyncio.get_running_loop(), "_current_handle", None)
+        if handle is not None:
+            with self._lock:
+                self._entered.setdefault(handle, call_name)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # asyncio 在回调仍为 _current_handle 时同步输出 "Executing %s took %.3f seconds"
+        if record.msg != "Executing %s took %.3f seconds" or not isinstance(record.args, tuple) or len(record.args) != 2:
+            return True
+        duration = record.args[1]
+        if not isinstance(duration, float):
+            return True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return True
+        with self._lock:
+            previous = self._loops.get(loop)
+            handle = getattr(loop, "_current_handle", None)
+            entered = self._entered.pop(handle, None) if handle is not None else None
+        if previous is None:
+            return True
+        context = getattr(handle, "_context", None)
+        running_call = context.get(current_call) if context is not None else None
+        self._report(handle, running_call or entered, duration)
+        # 调试模式由本模块开启时，不再重复输出 asyncio 自身的警告
+        return previous[0]
+
+    def _report(self, handle: Optional[asyncio.Handle], call_name: Optional[str], duration: float) -> None:
+        owner = call_name or self._owner(handle)
+        self.stats.record(owner, duration)
+        logger.warning(f"Event loop blocked for {duration * 1000:.1f} ms by {owner}")
+
+    @staticmethod
+    def _owner(handle: Optional[asyncio.Handle]) -> str:
+        # 不在数据源调用中时，尽量用协程名标识
+        callback = getattr(handle, "_callback", None)
+        task = getattr(callback, "__self__", None)
+        if isinstance(task, asyncio.Task):
+            return f"{UNATTRIBUTED} {getattr(task.get_coro(), '__qualname__', task.get_name())}"
+        return f"{UNATTRIBUTED} {getattr(callback, '__qualname__', repr(callback))}"
+
+
+class _LoopLagMonitor:
+    """在每个事件循环上运行一个周期性任务，测量唤醒延迟"""
+
+    def __init__(self):
+        self.enabled = False
+        self.interval = 0.25
+        self._lock = threading.Lock()
+        self._tasks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task]" = weakref.WeakKeyDictionary()
+        self._stats = {"samples": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+
+    def ensure_started(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = self._tasks.get(loop)
+        if task is None or task.done():
+            self._tasks[loop] = loop.create_task(self._run(), name="data_sources_loop_lag_monitor")
+
+    def stop(self) -> None:
+        for loop, task in list(self._tasks.items()):
+            if task.done() or loop.is_closed():
+                continue
+            # 任务只能在其所属的事件循环中取消
+            loop.call_soon_threadsafe(task.cancel)
+        self._tasks.clear()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self.enabled:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self._record(max(0.0, loop.time() - start - self.interval))
+
+    def _record(self, lag: float) -> None:
+        lag_ms = lag * 1000
+        with self._lock:
+            self._stats["samples"] += 1
+            self._stats["total_ms"] += lag_ms
+            self._stats["max_ms"] = max(self._stats["max_ms"], lag_ms)
+            self._stats["last_ms"] = lag_ms
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["mean_ms"] = stats["total_ms"] / stats["samples"] if stats["samples"] else 0.0
+        return stats
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {"samples": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+
+
+_blocking_stats = _BlockingStats()
+_slow_callback_detector = _SlowCallbackDetector(_blocking_stats)
+_lag_monitor = _LoopLagMonitor()
+
+
+def enable_loop_monitor(slow_callback_ms: float = 50, lag_interval: float = 0.25) -> None:
+    """
+    Enable the slow-callback detector and the loop-lag monitor
+
+    Both start on the running loop (if any) and on every loop that later runs
+    an instrumented source call; the detector puts those loops in debug mode.
+
+    Args:
+        slow_callback_ms: Callbacks running at least this long are recorded as blocking
+        lag_interval: Sampling interval of the loop-lag monitor, in seconds
+    """
+    _slow_callback_detector.install(slow_callback_ms / 1000)
+    _lag_monitor.interval = lag_interval
+    _lag_monitor.enabled = True
+    _lag_monitor.ensure_started()
+
+
+def disable_loop_monitor() -> None:
+    """Disable the slow-callback detector, restore the debug settings of the loops and stop the loop-lag monitors"""
+    _slow_callback_detector.uninstall()
+    _lag_monitor.enabled = False
+    _lag_monitor.stop()
+
+
+def get_loop_stats() -> Dict[str, Any]:
+    """
+    Get the collected event loop statistics
+
+    Returns:
+        Dict[str, Any]: e.g.
+        {
+            "enabled": True,
+            "slow_callback_ms": 50.0,
+            "lag": {"samples": 120, "mean_ms": 0.8, "max_ms": 212.4, "last_ms": 0.3, "total_ms": 96.0},
+            "blocking": {                   # Sorted by total blocking time
+                "metal.get_metal_price": {"count": 3, "total_ms": 310.2, "max_ms": 150.7}
+            }
+        }
+    """
+    return {
+        "enabled": _slow_callback_detector.enabled,
+        "slow_callback_ms": _slow_callback_detector.threshold * 1000,
+        "lag": _lag_monitor.snapshot(),
+        "blocking": _blocking_stats.snapshot(),
+    }
+
+
+def reset_loop_stats() -> None:
+    """Clear the collected event loop statistics"""
+    _blocking_stats.reset()
+    _lag_monitor.reset()
@@ -3,13 +3,12 @@ Metal data source implementation
 """
 
 import asyncio
-import json
 import logging
-from datetime import datetime
 from typing import Any, Dict
 
 import aiohttp
 
+from . import errors, payload_log, pipeline, timeconv
 from .base import BaseAPI
 
 logger = logging.getLogger("metal_source")
@@ -88,20 +87,12 @@ class MetalSource(BaseAPI):
 
             request_url = f"{self.proxy_url}/web-crawling/api/gold-index"
 
-            # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.post(request_url, headers=self._headers, params=params, json=payload, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # Parse the response
-                    data = await response.json(content_type=None)
-
-            if isinstance(data, str):
-                data = json.loads(data)
+            # Send request through the request pipeline
+            data = await self._request("POST", request_url, params=params, headers=self._headers, json=payload, timeout=self._timeout, decode=pipeline.DECODE_LENIENT_JSON)
 
             if not isinstance(data, dict):
-                raise ValueError(f"Invalid API response format: {data}")
+                raise ValueError(f"Invalid API response format: {payload_log.preview(data)}")
 
-            print(data)
             result = {}
             for metal, info in data.get("data", {}).items():
                 metal_info = {
@@ -123,25 +114,24 @@ class MetalSource(BaseAPI):
 
             return {"success": True, "data": {"base_currency": currency_code, "data": result}}
 
-        except asyncio.TimeoutError:
+        except asyncio.TimeoutError as e:
             error_msg = f"Request timeout (timeout={self._timeout}s)"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except aiohttp.ClientError as e:
             error_msg = f"HTTP request error: {str(e)}"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except Exception as e:
             error_msg = f"Error occurred while getting metal price: {str(e)}"
-            logger.error(error_msg)
-            logger.exception(e)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
 
     def _parse_time(self, time_str: str) -> str:
         """Parse time string"""
         # "2025-04-25T17:00:00Z"
         # Convert to "2025-04-25 17:00:00"
-        return datetime.strptime(time_str, "%Y-%m-%dT%H:%M:%SZ").strftime("%Y-%m-%d %H:%M:%S")
+        return timeconv.to_datetime_string(time_str, timeconv.ISO_Z)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,378 @@
+"""
+In-process metrics for data source and function calls
+
+Every call wrapped by ``instrumentation`` records its latency into an HDR-style
+histogram and counts errors; the HTTP trace hooks add request/response bytes
+(response bytes both as transferred and after decompression), upstream status
+codes, content encodings and retries for the call they belong to. ``snapshot``
+returns everything as a JSON-serializable dict and ``to_prometheus`` renders
+the Prometheus text exposition format, so the metrics can be read without any
+external service.
+"""
+
+import math
+import threading
+import weakref
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+UNATTRIBUTED = "<unattributed>"
+
+# 导出的延迟分位数
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear latency histogram
+
+    Values are recorded in microseconds. Each power-of-two range is split into
+    ``2 ** sub_bucket_bits`` linear sub-buckets, so every recorded value is
+    reported with a relative error below ``2 ** -sub_bucket_bits`` (about 6%
+    with the default 4 bits) using a few hundred counters at most.
+    """
+
+    __slots__ = ("_sub_bucket_bits", "_sub_buckets", "_counts", "count", "total", "min", "max")
+
+    def __init__(self, sub_bucket_bits: int = 4):
+        self._sub_bucket_bits = sub_bucket_bits
+        self._sub_buckets = 1 << sub_bucket_bits
+        self._counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """
+        Record one latency value
+
+        Args:
+            seconds: Latency in seconds
+        """
+        index = self._index(max(0, int(seconds * 1_000_000)))
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, quantile: float) -> float:
+        """
+        Get the latency at a quantile
+
+        Args:
+            quantile: Quantile between 0 and 1, e.g. 0.99
+
+        Returns:
+            float: Upper bound of the bucket containing the quantile, in seconds (0 if empty)
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(quantile * self.count))
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= rank:
+                return min(self._upper_bound(index) / 1_000_000, self.max)
+        return self.max
+
+    def _index(self, value: int) -> int:
+        if value < 2 * self._sub_buckets:
+            return value
+        shift = value.bit_length() - self._sub_bucket_bits - 1
+        return shift * self._sub_buckets + (value >> shift)
+
+    def _upper_bound(self, index: int) -> int:
+        if index < 2 * self._sub_buckets:
+            return index
+        shift = index // self._sub_buckets - 1
+        mantissa = index - shift * self._sub_buckets
+        return ((mantissa + 1) << shift) - 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summary of the histogram in milliseconds"""
+        summary = {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "min_ms": self.min * 1000 if self.count else 0.0,
+            "max_ms": self.max * 1000,
+        }
+        for quantile in QUANTILES:
+            summary[f"p{quantile * 100:g}_ms"] = self.percentile(quantile) * 1000
+        return summary
+
+
+class _CallMetrics:
+    """单个调用（数据源方法或 function）的指标"""
+
+    __slots__ = ("latency", "calls", "errors", "bytes_in", "bytes_in_wire", "bytes_out", "status_codes", "content_encodings", "retries", "error_kinds")
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.calls = 0
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_in_wire = 0
+        self.bytes_out = 0
+        self.status_codes: Counter = Counter()
+        self.content_encodings: Counter = Counter()
+        self.retries = 0
+        self.error_kinds: Counter = Counter()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": self.errors / self.calls if self.calls else 0.0,
+            "latency": self.latency.to_dict(),
+            "bytes_in": self.bytes_in,
+            "bytes_in_wire": self.bytes_in_wire,
+            "compression_ratio": self.bytes_in / self.bytes_in_wire if self.bytes_in_wire else 0.0,
+            "bytes_out": self.bytes_out,
+            "status_codes": {str(status): count for status, count in sorted(self.status_codes.items(), key=lambda item: str(item[0]))},
+            "content_encodings": dict(sorted(self.content_encodings.items())),
+            "retries": self.retries,
+            "error_kinds": dict(sorted(self.error_kinds.items())),
+        }
+
+
+_lock = threading.Lock()
+_calls: Dict[str, _CallMetrics] = {}
+_caches: "weakref.WeakValueDictionary[str, Any]" = weakref.WeakValueDictionary()
+
+enabled = True
+
+
+def _get(call_name: Optional[str]) -> _CallMetrics:
+    call_name = call_name or UNATTRIBUTED
+    metrics = _calls.get(call_name)
+    if metrics is None:
+        metrics = _calls.setdefault(call_name, _CallMetrics())
+    return metrics
+
+
+def record_call(call_name: str, duration: float, error: bool) -> None:
+    """
+    Record a finished call
+
+    Args:
+        call_name: Call name, e.g. "booking.search_flights" or "function.web_search"
+        duration: Call duration in seconds
+        error: Whether the call failed (exception or error result)
+    """
+    if not enabled:
+        return
+    with _lock:
+        metrics = _get(call_name)
+        metrics.calls += 1
+        metrics.errors += int(error)
+        metrics.latency.record(duration)
+
+
+def record_bytes(call_name: Optional[str], bytes_in: int = 0, bytes_out: int = 0, bytes_in_wire: int = 0) -> None:
+    """
+    Record bytes received from / sent to upstream for a call
+
+    Args:
+        call_name: Call name, None if outside of any call
+        bytes_in: Response body bytes received, after decompression
+        bytes_out: Request bytes sent
+    """
+    if not enabled:
+        return
+    with _lock:
+        metrics = _get(call_name)
+        metrics.bytes_in += bytes_in
+        metrics.bytes_in_wire += bytes_in_wire
+        metrics.bytes_out += bytes_out
+
+
+def record_status(call_name: Optional[str], status: Any) -> None:
+    """
+    Record an upstream response status code (or "exception" for failed requests)
+
+    Args:
+        call_name: Call name, None if outside of any call
+        status: HTTP status code
+    """
+    if not enabled:
+        return
+    with _lock:
+        _get(call_name).status_codes[status] += 1
+
+
+def record_encoding(call_name: Optional[str], encoding: str) -> None:
+    """
+    Record the content encoding of an upstream response
+
+    Args:
+        call_name: Call name, None if outside of any call
+        encoding: Content-Encoding of the response, "identity" for uncompressed responses
+    """
+    if not enabled:
+        return
+    with _lock:
+        _get(call_name).content_encodings[encoding] += 1
+
+
+def record_retry(call_name: Optional[str]) -> None:
+    """
+    Record a retried upstream request
+
+    Args:
+        call_name: Call name, None if outside of any call
+    """
+    if not enabled:
+        return
+    with _lock:
+        _get(call_name).retries += 1
+
+
+def record_error_kind(call_name: Optional[str], kind: str) -> None:
+    """
+    Record a failed call by error kind
+
+    Args:
+        call_name: Call name, None if outside of any call
+        kind: Error kind, e.g. "timeout" or "upstream_5xx" (see ``errors.ErrorKind``)
+    """
+    if not enabled:
+        return
+    with _lock:
+        _get(call_name).error_kinds[kind] += 1
+
+
+def register_cache(name: str, cache: Any) -> None:
+    """
+    Register a cache exposing ``hits`` and ``misses`` counters for export
+
+    Args:
+        name: Cache name, e.g. "booking_destinations"
+        cache: Cache object, held by weak reference
+    """
+    _caches[name] = cache
+
+
+def snapshot() -> Dict[str, Any]:
+    """
+    Get all metrics as a JSON-serializable dict
+
+    Returns:
+        Dict[str, Any]: e.g.
+        {
+            "calls": {
+                "booking.search_flights": {
+                    "calls": 12, "errors": 1, "error_rate": 0.083,
+                    "latency": {"count": 12, "mean_ms": 812.0, "p50_ms": 790.0, "p99_ms": 1530.0, ...},
+                    "bytes_in": 1830211, "bytes_in_wire": 203411, "compression_ratio": 9.0, "bytes_out": 0,
+                    "status_codes": {"200": 11, "429": 1}, "content_encodings": {"gzip": 11},
+                    "retries": 0,
+                    "error_kinds": {"rate_limited": 1}
+                }
+            },
+            "caches": {
+                "booking_destinations": {"hits": 30, "misses": 4, "hit_ratio": 0.88, "size": 4}
+            }
+        }
+    """
+    with _lock:
+        calls = {name: metrics.to_dict() for name, metrics in sorted(_calls.items())}
+    caches = {}
+    for name, cache in sorted(_caches.items()):
+        lookups = cache.hits + cache.misses
+        caches[name] = {
+            "hits": cache.hits,
+            "misses": cache.misses,
+            "hit_ratio": cache.hits / lookups if lookups else 0.0,
+            "size": len(cache),
+        }
+    return {"calls": calls, "caches": caches}
+
+
+def reset() -> None:
+    """Clear all call metrics"""
+    with _lock:
+        _calls.clear()
+
+
+def _label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_prometheus(loop_stats: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Render all metrics in the Prometheus text exposition format
+
+    Args:
+        loop_stats: Optional event loop statistics (``instrumentation.get_loop_stats()``) to include
+
+    Returns:
+        str: Prometheus text format
+    """
+    data = snapshot()
+    lines: List[str] = []
+
+    def family(name: str, kind: str, help_text: str) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    with _lock:
+        histograms = {name: (metrics.latency.total, metrics.latency.count, [(q, metrics.latency.percentile(q)) for q in QUANTILES]) for name, metrics in sorted(_calls.items())}
+
+    family("data_source_call_duration_seconds", "summary", "Latency of data source and function calls")
+    for name, (total, count, quantiles) in histograms.items():
+        for quantile, value in quantiles:
+            lines.append(f'data_source_call_duration_seconds{{call="{_label(name)}",quantile="{quantile}"}} {value:.6f}')
+        lines.append(f'data_source_call_duration_seconds_sum{{call="{_label(name)}"}} {total:.6f}')
+        lines.append(f'data_source_call_duration_seconds_count{{call="{_label(name)}"}} {count}')
+
+    family("data_source_calls_total", "counter", "Data source and function calls by outcome")
+    for name, call in data["calls"].items():
+        lines.append(f'data_source_calls_total{{call="{_label(name)}",outcome="ok"}} {call["calls"] - call["errors"]}')
+        lines.append(f'data_source_calls_total{{call="{_label(name)}",outcome="error"}} {call["errors"]}')
+
+    family("data_source_response_bytes_total", "counter", "Bytes received from upstream, after decompression")
+    for name, call in data["calls"].items():
+        lines.append(f'data_source_response_bytes_total{{call="{_label(name)}"}} {call["bytes_in"]}')
+
+    family("data_source_response_wire_bytes_total", "counter", "Bytes received from upstream as transferred, before decompression")
+    for name, call in data["calls"].items():
+        lines.append(f'data_source_response_wire_bytes_total{{call="{_label(name)}"}} {call["bytes_in_wire"]}')
+
+    family("data_source_request_bytes_total", "counter", "Bytes sent to upstream")
+    for name, call in data["calls"].items():
+        lines.append(f'data_source_request_bytes_total{{call="{_label(name)}"}} {call["bytes_out"]}')
+
+    family("data_source_upstream_responses_total", "counter", "Upstream responses by status code")
+    for name, call in data["calls"].items():
+        for status, count in call["status_codes"].items():
+            lines.append(f'data_source_upstream_responses_total{{call="{_label(name)}",status="{_label(status)}"}} {count}')
+
+    family("data_source_upstream_response_encodings_total", "counter", "Upstream responses by content encoding")
+    for name, call in data["calls"].items():
+        for encoding, count in call["content_encodings"].items():
+            lines.append(f'data_source_upstream_response_encodings_total{{call="{_label(name)}",encoding="{_label(encoding)}"}} {count}')
+
+    family("data_source_retries_total", "counter", "Retried upstream requests")
+    for name, call in data["calls"].items():
+        lines.append(f'data_source_retries_total{{call="{_label(name)}"}} {call["retries"]}')
+
+    family("data_source_errors_total", "counter", "Failed calls by error kind")
+    for name, call in data["calls"].items():
+        for kind, count in call["error_kinds"].items():
+            lines.append(f'data_source_errors_total{{call="{_label(name)}",kind="{_label(kind)}"}} {count}')
+
+    family("data_source_cache_lookups_total", "counter", "Cache lookups by result")
+    for name, cache in data["caches"].items():
+        lines.append(f'data_source_cache_lookups_total{{cache="{_label(name)}",result="hit"}} {cache["hits"]}')
+        lines.append(f'data_source_cache_lookups_total{{cache="{_label(name)}",result="miss"}} {cache["misses"]}')
+
+    if loop_stats:
+        family("data_source_loop_blocking_seconds_total", "counter", "Time callbacks blocked the event loop, by responsible call")
+        for owner, stats in loop_stats["blocking"].items():
+            lines.append(f'data_source_loop_blocking_seconds_total{{owner="{_label(owner)}"}} {stats["total_ms"] / 1000:.6f}')
+        family("data_source_loop_lag_max_seconds", "gauge", "Maximum observed event loop lag")
+        lines.append(f'data_source_loop_lag_max_seconds {loop_stats["lag"]["max_ms"] / 1000:.6f}')
+
+    return "\n".join(lines) + "\n"
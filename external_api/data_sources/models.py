@@ -0,0 +1,316 @@
+"""
+Compact result models for high-volume records
+
+Sources return plain nested dicts by default. When a method is called with
+``compact=True`` the per-item records are built as ``__slots__`` dataclasses
+instead: they use a fraction of the memory of the equivalent dict tree, support
+fast attribute access for filtering (``tweet.public_metrics.like_count``) and
+still behave like read-only mappings (``tweet["text"]``). Call ``to_dict()`` on
+a record, or ``to_plain()`` on a whole result, to get the regular dict shape.
+"""
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, ClassVar, Dict, Iterator, List, Optional, Tuple, Type
+
+
+class CompactRecord(Mapping):
+    """
+    Base class of all compact records
+
+    Subclasses are ``@dataclass(slots=True)`` classes; their field names are the
+    keys of the dict representation, except for the names listed in
+    ``_renames`` (used for keys that are not valid identifiers, e.g. ``from``).
+    Fields listed in ``_omit_none`` are left out of the mapping while ``None``,
+    mirroring optional keys of the dict shape.
+    """
+
+    __slots__ = ()
+
+    _renames: ClassVar[Dict[str, str]] = {}
+    _omit_none: ClassVar[Tuple[str, ...]] = ()
+
+    def _items(self) -> Iterator[Tuple[str, Any]]:
+        for name in self.__match_args__:  # type: ignore[attr-defined]
+            value = getattr(self, name)
+            if value is None and name in self._omit_none:
+                continue
+            yield self._renames.get(name, name), value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the record (recursively) to the plain dict representation"""
+        return {key: to_plain(value) for key, value in self._items()}
+
+    def __getitem__(self, key: str) -> Any:
+        name = key
+        if self._renames:
+            if key in self._renames:  # raw field name such as "from_" is not a key
+                raise KeyError(key)
+            name = next((field for field, renamed in self._renames.items() if renamed == key), key)
+        if name not in self.__match_args__:  # type: ignore[attr-defined]
+            raise KeyError(key)
+        value = getattr(self, name)
+        if value is None and name in self._omit_none:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key, _ in self._items())
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._items())
+
+
+def to_plain(value: Any) -> Any:
+    """
+    Convert a value that may contain compact records into plain dicts/lists
+
+    Args:
+        value: A record, a list/dict possibly containing records, or any other value
+
+    Returns:
+        Any: The same structure with every record replaced by its dict representation
+    """
+    if isinstance(value, CompactRecord):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [to_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_plain(item) for key, item in value.items()}
+    return value
+
+
+def build(cls: Type[CompactRecord], compact: bool, **fields: Any) -> Any:
+    """
+    Build a record either as a compact record or as its plain dict representation
+
+    Sources parse each item shape with a single builder and pick the
+    representation here, so the compact and dict shapes cannot drift apart.
+
+    Args:
+        cls: The compact record class
+        compact: Whether to return a ``cls`` instance instead of a dict
+        **fields: The field values, in the field order of ``cls``; nested values must already be built with the same ``compact``
+
+    Returns:
+        Any: The record, or the dict ``cls(**fields).to_dict()`` would return
+    """
+    if compact:
+        return cls(**fields)
+    return {cls._renames.get(name, name): value for name, value in fields.items() if value is not None or name not in cls._omit_none}
+
+
+# ---------------------------------------------------------------------------
+# Twitter
+# ---------------------------------------------------------------------------
+
+
+@dataclass(slots=True)
+class TweetMetrics(CompactRecord):
+    retweet_count: int
+    reply_count: int
+    like_count: int
+    quote_count: int
+    view_count: int
+    bookmark_count: int
+
+
+@dataclass(slots=True)
+class TweetAuthor(CompactRecord):
+    id: str
+    name: Optional[str]
+    username: Optional[str]
+    followers_count: int
+    is_verified: bool
+    is_blue_verified: bool
+
+
+@dataclass(slots=True)
+class Tweet(CompactRecord):
+    """Tweet as returned by ``TwitterSource.search_tweets``"""
+
+    id: str
+    created_at: Optional[str]
+    text: str
+    media_urls: List[str]
+    video_urls: List[str]
+    author: TweetAuthor
+    public_metrics: TweetMetrics
+
+
+@dataclass(slots=True)
+class TwitterUserMetrics(CompactRecord):
+    followers_count: int
+    following_count: int
+    tweet_count: int
+    listed_count: int
+    like_count: int
+
+
+@dataclass(slots=True)
+class TwitterUser(CompactRecord):
+    id: str
+    username: Optional[str]
+    name: Optional[str]
+    created_at: Optional[str]
+    description: Optional[str]
+    location: Optional[str]
+    url: Optional[str]
+    profile_image_url: Optional[str]
+    profile_banner_url: Optional[str]
+    public_metrics: TwitterUserMetrics
+    verified: bool
+    blue_verified: bool
+    private: bool
+    bot: bool
+
+
+@dataclass(slots=True)
+class TimelineTweet(CompactRecord):
+    """Tweet as returned by ``TwitterSource.get_user_tweets``"""
+
+    _omit_none: ClassVar[Tuple[str, ...]] = ("referenced_tweets",)
+
+    id: str
+    created_at: Optional[str]
+    text: str
+    language: Optional[str]
+    media_urls: List[str]
+    video_urls: List[str]
+    public_metrics: TweetMetrics
+    user: TwitterUser
+    # Rare (replies / retweets / quotes only), kept as a plain dict
+    referenced_tweets: Optional[Dict[str, Any]] = None
+
+
+# ---------------------------------------------------------------------------
+# Pinterest
+# ---------------------------------------------------------------------------
+
+
+@dataclass(slots=True)
+class PinImage(CompactRecord):
+    url: str
+
+
+@dataclass(slots=True)
+class Pinner(CompactRecord):
+    id: str
+    image_url: str
+    follower_count: int
+    username: str
+    full_name: str
+
+
+@dataclass(slots=True)
+class Pin(CompactRecord):
+    id: str
+    title: str
+    description: str
+    alt_text: str
+    auto_alt_text: str
+    images: PinImage
+    videos: Dict[str, Any]
+    created_at: str
+    likes: int
+    pinner: Pinner
+
+
+# ---------------------------------------------------------------------------
+# Booking
+# ---------------------------------------------------------------------------
+
+
+@dataclass(slots=True)
+class FlightSegment(CompactRecord):
+    _renames: ClassVar[Dict[str, str]] = {"from_": "from"}
+
+    flight_number: str
+    from_: str
+    to: str
+    departure: str
+    arrival: str
+    total_time: str
+
+
+@dataclass(slots=True)
+class FlightPrice(CompactRecord):
+    currency: str
+    amount: float
+
+
+@dataclass(slots=True)
+class Flight(CompactRecord):
+    stops: int
+    segments: List[FlightSegment]
+    total_time: str
+    price: FlightPrice
+
+
+@dataclass(slots=True)
+class GeoPoint(CompactRecord):
+    latitude: float
+    longitude: float
+
+
+@dataclass(slots=True)
+class HotelPrice(CompactRecord):
+    currency: str
+    amount: float
+    price_per_night: float
+
+
+@dataclass(slots=True)
+class Hotel(CompactRecord):
+    hotel_id: Any
+    name: str
+    rating: Any
+    review_score: Any
+    review_count: Any
+    location: GeoPoint
+    price: HotelPrice
+
+
+# ---------------------------------------------------------------------------
+# Yahoo Finance
+# ---------------------------------------------------------------------------
+
+
+@dataclass(slots=True)
+class PriceBar(CompactRecord):
+    date: str
+    open: Optional[float]
+    high: Optional[float]
+    low: Optional[float]
+    close: Optional[float]
+    volume: int
+
+
+# ---------------------------------------------------------------------------
+# Scholar / Patents
+# ---------------------------------------------------------------------------
+
+
+@dataclass(slots=True)
+class Paper(CompactRecord):
+    title: Optional[str]
+    snippet: Optional[str]
+    link: Optional[str]
+    publicationInfo: Optional[str]
+    year: Any
+    citedBy: Any
+    pdfUrl: Optional[str]
+
+
+@dataclass(slots=True)
+class Patent(CompactRecord):
+    title: Optional[str]
+    snippet: Optional[str]
+    link: Optional[str]
+    priorityDate: Optional[str]
+    filingDate: Optional[str]
+    grantDate: Optional[str]
+    inventor: Any
+    assignee: Any
+    publicationNumber: Optional[str]
+    pdfUrl: Optional[str]
@@ -5,11 +5,12 @@
 import asyncio
 import logging
 import math
-from typing import Any, Dict, Optional
-
-import aiohttp
+from typing import Any, Dict, List, Optional
 
+from . import errors
 from .base import BaseAPI
+from .models import Patent, build
+from .projection import FieldSelector
 
 logger = logging.getLogger("patents_source")
 
@@ -54,6 +55,8 @@ class PatentSource(BaseAPI):
         page: int,
         start_time: Optional[str],
         end_time: Optional[str],
+        compact: bool = False,
+        fields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         获取单页专利数据
@@ -65,6 +68,8 @@ class PatentSource(BaseAPI):
             page(int): 页码
             start_time(str): 开始时间
             end_time(str): 结束时间
+            compact(bool): 是否返回紧凑记录
+            fields(List[str]): 只返回指定字段
 
         Returns:
             Dict[str, Any]: 单页搜索结果
@@ -80,31 +85,31 @@ class PatentSource(BaseAPI):
         request_url = f"{self.proxy_url}/patents"
 
         try:
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.post(request_url, headers=self.headers, json=payload, timeout=self.timeout) as response:
-                    response.raise_for_status()
-                    data = await response.json()
+            data = await self._request("POST", request_url, headers=self.headers, json=payload, timeout=self.timeout)
 
             organic = data.get("organic", [])
+            selector = FieldSelector(fields)
+            compact = compact and selector.selects_all
             results = []
             for item in organic:
-                results.append(
-                    {
-                        "title": item.get("title"),
-                        "snippet": item.get("snippet"),
-                        "link": item.get("link"),
-                        "priorityDate": item.get("priorityDate"),
-                        "filingDate": item.get("filingDate"),
-                        "grantDate": item.get("grantDate"),
-                        "inventor": item.get("inventor"),
-                        "assignee": item.get("assignee"),
-                        "publicationNumber": item.get("publicationNumber"),
-                        "pdfUrl": item.get("pdfUrl"),
-                    }
+                record = build(
+                    Patent,
+                    compact,
+                    title=item.get("title"),
+                    snippet=item.get("snippet"),
+                    link=item.get("link"),
+                    priorityDate=item.get("priorityDate"),
+                    filingDate=item.get("filingDate"),
+                    grantDate=item.get("grantDate"),
+                    inventor=item.get("inventor"),
+                    assignee=item.get("assignee"),
+                    publicationNumber=item.get("publicationNumber"),
+                    pdfUrl=item.get("pdfUrl"),
                 )
+                results.append(record if compact else selector.apply(record))
             return {"success": True, "data": results}
         except Exception as e:
-            logger.error(f"_fetch_patents_page error: page={page}, error={e}")
+            errors.log_failure(logger, f"_fetch_patents_page error: page={page}, error={e}", e)
             return {"success": False, "error": str(e)}
 
     async def search_patents(
@@ -114,6 +119,8 @@ class PatentSource(BaseAPI):
         num_results: int = 10,
         start_time: Optional[str] = None,
         end_time: Optional[str] = None,
+        compact: bool = False,
+        fields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Search for patents.
@@ -124,6 +131,8 @@ class PatentSource(BaseAPI):
             num_results(int): Number of results to return, default is 10, max is 500
             start_time(str): Start date YYYYMMDD, optional.
             end_time(str): End date YYYYMMDD, optional.
+            compact(bool): Return patents as memory-compact records (dict-like, convert with `.to_dict()`), default is False.
+            fields(List[str]): Only return these fields of each patent, e.g. ["title", "publicationNumber"], default is None (all fields).
 
         Returns:
             Dict[str, Any]: Search results, format:
@@ -196,6 +205,8 @@ class PatentSource(BaseAPI):
                         page=page,
                         start_time=start_time,
                         end_time=end_time,
+                        compact=compact,
+                        fields=fields,
                     )
                 )
 
@@ -223,5 +234,5 @@ class PatentSource(BaseAPI):
 
             return {"success": True, "data": {"patents": all_patents}}
         except Exception as e:
-            logger.error(f"search_patents error: {e}")
+            errors.log_failure(logger, f"search_patents error: {e}", e)
             return {"success": False, "error": str(e)}
@@ -0,0 +1,121 @@
+"""
+Level-gated debug logging of upstream payloads
+
+Sources hand every decoded upstream response to ``log_payload``. Unless the
+``data_sources_payload`` logger is enabled for DEBUG this returns after a
+single level check, so production runs do not serialize, format or write any
+payload. When enabled, payloads are:
+
+- sampled: only a ``sample_rate`` fraction of calls is logged;
+- formatted lazily: serialization happens only when a handler emits the record;
+- truncated to ``max_chars`` characters.
+
+Enable it with e.g.::
+
+    logging.getLogger("data_sources_payload").setLevel(logging.DEBUG)
+
+``preview`` gives the same bounded rendering for error and warning messages
+that quote a payload.
+"""
+
+import json
+import logging
+import random
+from typing import Any, Dict, Optional
+
+from .instrumentation import current_call
+
+logger = logging.getLogger("data_sources_payload")
+
+_settings: Dict[str, Any] = {
+    "max_chars": 2000,
+    "sample_rate": 1.0,
+}
+_random = random.Random()
+
+
+def configure(max_chars: Optional[int] = None, sample_rate: Optional[float] = None) -> None:
+    """
+    Configure payload logging
+
+    Args:
+        max_chars: Maximum characters of a logged payload, longer payloads are truncated
+        sample_rate: Fraction of payloads logged when the logger is enabled, 0 to 1
+    """
+    if sample_rate is not None and not 0 <= sample_rate <= 1:
+        raise ValueError(f"sample_rate must be between 0 and 1, got {sample_rate}")
+    if max_chars is not None:
+        _settings["max_chars"] = max(0, max_chars)
+    if sample_rate is not None:
+        _settings["sample_rate"] = sample_rate
+
+
+def configure_from(config: Dict[str, Any]) -> None:
+    """
+    Configure payload logging from the data source config dict
+
+    Args:
+        config: Config with the optional keys payload_log_max_chars and payload_log_sample_rate
+    """
+    configure(max_chars=config.get("payload_log_max_chars"), sample_rate=config.get("payload_log_sample_rate"))
+
+
+def preview(payload: Any, max_chars: Optional[int] = None) -> str:
+    """
+    Render a payload for a log or error message, truncated
+
+    Args:
+        payload: Decoded JSON, raw bytes or any other value
+        max_chars: Maximum characters, defaults to the configured max_chars
+
+    Returns:
+        str: e.g. '{"data": [{"id": "1"}, ...' followed by "... (52311 chars)" when truncated
+    """
+    if max_chars is None:
+        max_chars = _settings["max_chars"]
+    if isinstance(payload, (bytes, bytearray)):
+        # 只解码需要展示的部分
+        text = bytes(payload[: max_chars * 4]).decode("utf-8", errors="replace")
+        total = len(payload)
+    elif isinstance(payload, str):
+        text = payload
+        total = len(text)
+    else:
+        try:
+            text = json.dumps(payload, ensure_ascii=False, default=str)
+        except (TypeError, ValueError):
+            text = repr(payload)
+        total = len(text)
+    if total <= max_chars and len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... ({total} {'bytes' if isinstance(payload, (bytes, bytearray)) else 'chars'})"
+
+
+class _Preview:
+    """日志记录的惰性参数，仅在处理器真正输出时才序列化负载"""
+
+    __slots__ = ("payload", "max_chars")
+
+    def __init__(self, payload: Any, max_chars: int):
+        self.payload = payload
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        return preview(self.payload, self.max_chars)
+
+
+def log_payload(payload: Any, label: Optional[str] = None, level: int = logging.DEBUG) -> None:
+    """
+    Log an upstream payload if the payload logger is enabled for level and the call is sampled
+
+    Args:
+        payload: Decoded JSON or raw response bytes
+        label: What the payload is, defaults to the running data source call, e.g. "pinterest.search_pins"
+        level: Log level
+    """
+    if not logger.isEnabledFor(level):
+        return
+    sample_rate = _settings["sample_rate"]
+    if sample_rate < 1 and _random.random() >= sample_rate:
+        return
+    logger.log(level, "%s payload: %s", label or current_call.get() or "upstream", _Preview(payload, _settings["max_chars"]))
@@ -3,14 +3,15 @@ Pinterest data source implementation
 """
 
 import asyncio
-import json
 import logging
-from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import aiohttp
 
+from . import errors, payload_log, pipeline, timeconv
 from .base import BaseAPI
+from .models import Pin, PinImage, Pinner, build
+from .projection import FieldSelector
 
 logger = logging.getLogger("pinterest_source")
 
@@ -37,7 +38,13 @@ class PinterestSource(BaseAPI):
         return {"name": self.source_name, "description": "Pinterest data source, provides user and pin search features for Pinterest."}
 
     async def search_pins(
-        self, keyword: str, num: int = 10, nextPageCursor: Optional[str] = None, sort: str = "relevance"
+        self,
+        keyword: str,
+        num: int = 10,
+        nextPageCursor: Optional[str] = None,
+        sort: str = "relevance",
+        compact: bool = False,
+        fields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Search related pins.
@@ -49,6 +56,8 @@ class PinterestSource(BaseAPI):
             num(int): Number of results per page, e.g. 10
             nextPageCursor(str): Pagination cursor for next page, default None for first page
             sort(str): Sort order, default "relevance", options: "relevance" or "recent"
+            compact(bool): Return pins as memory-compact records (dict-like, convert with `.to_dict()`), default False
+            fields(List[str]): Only return these fields of each pin, e.g. ["id", "title", "images.url"], default None (all fields)
 
         Returns:
             Dict[str, Any]: Dictionary containing pin search results, e.g.
@@ -115,47 +124,39 @@ class PinterestSource(BaseAPI):
 
             request_url = f"{self.proxy_url}/pinterest/pins/advance"
 
-            # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.post(request_url, headers=self._headers, json=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # Parse the response
-                    data = await response.json(content_type=None)
-
-            # The API returns a JSON string, need to parse it first
-            if isinstance(data, str):
-                data = json.loads(data)
+            # Send request through the request pipeline
+            data = await self._request("POST", request_url, headers=self._headers, json=params, timeout=self._timeout, decode=pipeline.DECODE_LENIENT_JSON)
 
             if not isinstance(data, dict):
-                raise ValueError(f"Invalid API response format: {data}")
+                raise ValueError(f"Invalid API response format: {payload_log.preview(data)}")
 
             if "data" not in data:
-                raise ValueError(f"API response missing data field: {data}")
+                raise ValueError(f"API response missing data field: {payload_log.preview(data)}")
 
-            pins = self._parse_pins(data)
+            pins = self._parse_pins(data, compact=compact, selector=FieldSelector(fields))
 
             return {"success": True, "data": {"keyword": keyword, "count": len(pins), "pins": pins, "cursor": data.get("nextPageCursor")}}
 
-        except asyncio.TimeoutError:
+        except asyncio.TimeoutError as e:
             error_msg = f"Request timeout (timeout={self._timeout}s)"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except aiohttp.ClientError as e:
             error_msg = f"HTTP request error: {str(e)}"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except Exception as e:
             error_msg = f"Error occurred while searching pins: {str(e)}"
-            logger.error(error_msg)
-            logger.exception(e)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
 
-    async def get_user_info(self, username: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+    async def get_user_info(self, username: str, user_id: Optional[str] = None, fields: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Get detailed information of a Pinterest user.
 
         Args:
             username (str): Pinterest username, not display name
+            fields (List[str]): Only return these fields, e.g. ["full_name", "follower_count"], default None (all fields)
 
         Returns:
             Dict[str, Any]: Dictionary containing user info, e.g.
@@ -192,35 +193,26 @@ class PinterestSource(BaseAPI):
             # Set request parameters
             params = {"keyword": username}
 
-            # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self._headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # Parse the response
-                    data = await response.json(content_type=None)
-
-            # Parse response data
-            if isinstance(data, str):
-                data = json.loads(data)
+            # Send request through the request pipeline
+            data = await self._request("GET", request_url, params=params, headers=self._headers, timeout=self._timeout, decode=pipeline.DECODE_LENIENT_JSON)
 
             if not isinstance(data, dict):
-                raise ValueError(f"Invalid API response format: {data}")
+                raise ValueError(f"Invalid API response format: {payload_log.preview(data)}")
 
             # Build return data
-            return {"success": True, "data": self._parse_user_info(data)}
+            return {"success": True, "data": self._parse_user_info(data, FieldSelector(fields))}
 
-        except asyncio.TimeoutError:
+        except asyncio.TimeoutError as e:
             error_msg = f"Request timeout (timeout={self._timeout}s)"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except aiohttp.ClientError as e:
             error_msg = f"HTTP request error: {str(e)}"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except Exception as e:
             error_msg = f"Error occurred while getting user info: {str(e)}"
-            logger.error(error_msg)
-            logger.exception(e)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
 
     def _format_date(self, date_str: Optional[str]) -> Optional[str]:
@@ -230,23 +222,24 @@ class PinterestSource(BaseAPI):
         try:
             # New API date format example: "Thu Mar 13 18:08:35 +0000 2025"
             # New API date format example: "Tue, 04 Mar 2025 12:26:23 +0000",
-            dt = datetime.strptime(date_str, "%a, %d %b %Y %H:%M:%S %z")
-            return dt.strftime("%Y-%m-%d %H:%M:%S")
+            return timeconv.to_datetime_string(date_str, timeconv.RFC_2822)
         except Exception:
             return date_str
 
-    def _parse_pins(self, data: dict[str, Any]) -> list[dict[str, Any]]:
-        print(f"xwy-pins, {data}")
-        print("-" * 100)
-        print("\n")
+    def _parse_pins(self, data: dict[str, Any], compact: bool = False, selector: Optional[FieldSelector] = None) -> list[Any]:
+        if selector is None:
+            selector = FieldSelector()
+        if not selector.selects_all:
+            compact = False
+
         pins = []
         for pin_data in data.get("data", []):
             if not isinstance(pin_data, dict):
-                logger.warning(f"Skip invalid pin data: {pin_data}")
+                logger.warning(f"Skip invalid pin data: {payload_log.preview(pin_data)}")
                 continue
 
             video = {"has_video": False}
-            if pin_data.get("videos", None):
+            if pin_data.get("videos", None) and selector.wants("videos"):
                 V_HLSV4 = None
                 if pin_data.get("videos", {}).get("video_list", {}).get("V_HLSV4", None):
                     V_HLSV4 = {
@@ -271,53 +264,62 @@ class PinterestSource(BaseAPI):
             if len(image_url) <= 0:
                 image_url = pin_data.get("images", {}).get("orig", {}).get("url", "")
 
-            pin = {
-                "id": pin_data.get("id", ""),
-                "title": pin_data.get("title", ""),
-                "description": pin_data.get("description", ""),
-                "alt_text": pin_data.get("alt_text", ""),
-                "auto_alt_text": pin_data.get("auto_alt_text", ""),
-                "images": {"url": image_url},
-                "videos": video,
-                "created_at": "2024-03-21 08:29:49",  # 创建时间
-                "likes": pin_data.get("reaction_counts", {}).get("1", 0),
-                "pinner": {
-                    "id": pin_data.get("pinner", {}).get("id", ""),
-                    "image_url": pin_data.get("pinner", {}).get("image_large_url", ""),
-                    "follower_count": pin_data.get("pinner", {}).get("follower_count", 0),
-                    "username": pin_data.get("pinner", {}).get("username", ""),
-                    "full_name": pin_data.get("pinner", {}).get("full_name", ""),
-                },
-            }
-            pins.append(pin)
+            pinner = pin_data.get("pinner", {})
+            pin = build(
+                Pin,
+                compact,
+                id=pin_data.get("id", ""),
+                title=pin_data.get("title", ""),
+                description=pin_data.get("description", ""),
+                alt_text=pin_data.get("alt_text", ""),
+                auto_alt_text=pin_data.get("auto_alt_text", ""),
+                images=build(PinImage, compact, url=image_url),
+                videos=video,
+                created_at="2024-03-21 08:29:49",  # 创建时间
+                likes=pin_data.get("reaction_counts", {}).get("1", 0),
+                pinner=build(
+                    Pinner,
+                    compact,
+                    id=pinner.get("id", ""),
+                    image_url=pinner.get("image_large_url", ""),
+                    follower_count=pinner.get("follower_count", 0),
+                    username=pinner.get("username", ""),
+                    full_name=pinner.get("full_name", ""),
+                )
+                if selector.wants("pinner")
+                else None,
+            )
+            pins.append(pin if selector.selects_all else selector.apply(pin))
         return pins
 
-    def _parse_user_info(self, resp: dict[str, Any]) -> dict[str, Any]:
+    def _parse_user_info(self, resp: dict[str, Any], selector: Optional[FieldSelector] = None) -> dict[str, Any]:
         data = resp.get("data", [])
-        print(f"xwy-user, {data}")
-        print("-" * 100)
-        print("\n")
         if len(data) <= 0:
             return {}
 
         data = data[0]
 
+        if selector is None:
+            selector = FieldSelector()
+
         recent_pin_images = []
-        if data.get("recent_pin_images", None):
+        if data.get("recent_pin_images", None) and selector.wants("recent_pin_images"):
             key = list(data.get("recent_pin_images", {}).keys())[-1]
             for image_info in data.get("recent_pin_images", {}).get(key, {}):
                 recent_pin_images.append(image_info.get("url", ""))
 
-        return {
-            "id": data.get("id", ""),  # User id
-            "full_name": data.get("full_name", ""),  # User display name
-            "username": data.get("username", ""),  # Username, can be used for search
-            "image_url": data.get("image_large_url", ""),  # User avatar url
-            "pin_count": data.get("pin_count", 0),  # Number of pins published by user
-            "follower_count": data.get("follower_count", 0),  # Number of followers
-            "last_pin_save_time": self._format_date(data.get("last_pin_save_time", "")),  # Last pin publish time
-            "recent_pin_images": recent_pin_images,  # Recent pin image urls
-        }
+        return selector.apply(
+            {
+                "id": data.get("id", ""),  # User id
+                "full_name": data.get("full_name", ""),  # User display name
+                "username": data.get("username", ""),  # Username, can be used for search
+                "image_url": data.get("image_large_url", ""),  # User avatar url
+                "pin_count": data.get("pin_count", 0),  # Number of pins published by user
+                "follower_count": data.get("follower_count", 0),  # Number of followers
+                "last_pin_save_time": self._format_date(data.get("last_pin_save_time", "")),  # Last pin publish time
+                "recent_pin_images": recent_pin_images,  # Recent pin image urls
+            }
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,380 @@
+"""
+Shared request pipeline of the data sources
+
+Sources send upstream requests with ``BaseAPI._request`` instead of opening
+sessions themselves. A request passes through a chain of middleware stages
+before it reaches the transport, so features like caching, rate limiting and
+retries apply to every source at once:
+
+    cache -> rate_limit -> retry -> observe -> send (+ decode)
+
+- ``cache``: GET responses are cached for ``cache_ttl`` seconds (per request,
+  or the pipeline_cache_ttl setting; off by default);
+- ``rate_limit``: requests of a source are spaced to at most
+  ``rate_limits[source]`` per second, and requests of all sources together to
+  ``rate_limits["*"]`` per second (none by default);
+- ``retry``: idempotent requests failing with a timeout, network error, 429 or
+  5xx are retried ``retries`` times with exponential backoff (0 by default),
+  counted as retries in ``metrics``;
+- ``observe``: debug logging of the decoded payload, see ``payload_log``;
+- ``send``: opens the source's session (``BaseAPI._client_session``, or
+  ``_http_client`` for httpx requests), raises for HTTP error statuses and
+  decodes the body (strict JSON, lenient JSON, raw bytes, or incrementally
+  with ``streaming``).
+
+Errors propagate with the exception types of the underlying client
+(``asyncio.TimeoutError``, ``aiohttp.ClientResponseError``,
+``httpx.HTTPStatusError``, ...), so the sources' error handling is unchanged.
+Request metrics and tracing stay on the session hooks of ``instrumentation``.
+
+Further stages are added with ``use``:
+
+    async def add_header(request: Request, call_next: Handler) -> Response:
+        request.headers = {**(request.headers or {}), "X-Trace": "1"}
+        return await call_next(request)
+
+    pipeline.use(add_header)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from . import errors, metrics, payload_log, streaming
+from .cache import TTLCache
+from .instrumentation import current_call
+
+if TYPE_CHECKING:
+    from .base import BaseAPI
+
+logger = logging.getLogger("data_sources_pipeline")
+
+# 响应体解码方式
+DECODE_JSON = "json"  # response.json()，Content-Type 须为 JSON
+DECODE_LENIENT_JSON = "lenient_json"  # 忽略 Content-Type，并再次解码字符串形式的 JSON 负载
+DECODE_BYTES = "bytes"  # 原始响应体，供 run_parse 在执行器中解析
+DECODE_STREAM = "stream"  # streaming.load_json 逐块解码，只构建 keep 中的字段
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+# rate_limits 中限制所有数据源请求总和的键
+ALL_SOURCES = "*"
+RETRYABLE_KINDS = (errors.ErrorKind.TIMEOUT, errors.ErrorKind.NETWORK, errors.ErrorKind.RATE_LIMITED, errors.ErrorKind.UPSTREAM_5XX)
+
+_settings: Dict[str, Any] = {
+    "retries": 0,
+    "retry_backoff": 0.2,
+    "retry_max_backoff": 10.0,
+    "rate_limits": {},
+    "cache_ttl": 0,
+}
+
+
+@dataclass
+class Request:
+    """An upstream request passing through the pipeline; stages may modify it before calling the next stage"""
+
+    source: "BaseAPI"
+    method: str
+    url: str
+    params: Optional[Dict[str, Any]] = None
+    headers: Optional[Dict[str, str]] = None
+    json: Any = None
+    data: Any = None
+    timeout: Any = None
+    decode: str = DECODE_JSON
+    keep: Optional[streaming.Keep] = None
+    # 使用 httpx（BaseAPI._http_client）而不是 aiohttp 发送
+    use_httpx: bool = False
+    # 已打开的 httpx 客户端，为空时每次请求单独创建
+    client: Optional[httpx.AsyncClient] = None
+    idempotent: Optional[bool] = None
+    cache_ttl: Optional[float] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def is_idempotent(self) -> bool:
+        return self.method.upper() in IDEMPOTENT_METHODS if self.idempotent is None else self.idempotent
+
+
+@dataclass
+class Response:
+    """Decoded upstream response"""
+
+    status: int
+    headers: Any
+    data: Any
+    from_cache: bool = False
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+Middleware = Callable[[Request, Handler], Awaitable[Response]]
+
+
+def configure(
+    retries: Optional[int] = None,
+    retry_backoff: Optional[float] = None,
+    rate_limits: Optional[Dict[str, float]] = None,
+    cache_ttl: Optional[float] = None,
+) -> None:
+    """
+    Configure the pipeline stages
+
+    Args:
+        retries: Retries of a failed idempotent request, 0 for none
+        retry_backoff: Delay in seconds before the first retry, doubled for each further retry
+        rate_limits: Source name (or ALL_SOURCES) -> maximum requests per second
+        cache_ttl: Seconds GET responses are cached by default, 0 for no caching
+    """
+    if retries is not None:
+        _settings["retries"] = max(0, retries)
+    if retry_backoff is not None:
+        _settings["retry_backoff"] = max(0.0, retry_backoff)
+    if rate_limits is not None:
+        _settings["rate_limits"] = dict(rate_limits)
+        _limiters.clear()
+    if cache_ttl is not None:
+        _settings["cache_ttl"] = max(0, cache_ttl)
+
+
+def configure_from(config: Dict[str, Any]) -> None:
+    """
+    Configure the pipeline stages from the data source config dict
+
+    Args:
+        config: Config with the optional keys pipeline_retries, pipeline_retry_backoff, pipeline_rate_limits and pipeline_cache_ttl
+    """
+    configure(
+        retries=config.get("pipeline_retries"),
+        retry_backoff=config.get("pipeline_retry_backoff"),
+        rate_limits=config.get("pipeline_rate_limits"),
+        cache_ttl=config.get("pipeline_cache_ttl"),
+    )
+
+
+# ---- cache ----
+
+_cache = TTLCache(ttl=60, max_entries=1024, name="pipeline")
+
+
+def _cache_key(request: Request) -> str:
+    raw = json.dumps([request.source.source_name, request.url, request.params, request.decode, request.keep], sort_keys=True, default=str)
+    # 摘要作为键，TTLCache 的键归一化不会合并不同的请求
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+async def cache(request: Request, call_next: Handler) -> Response:
+    """Serve GET requests from the response cache; cached data is shared between callers and must not be modified"""
+    ttl = _settings["cache_ttl"] if request.cache_ttl is None else request.cache_ttl
+    if not ttl or request.method.upper() != "GET":
+        return await call_next(request)
+    key = _cache_key(request)
+    cached = _cache.get(key)
+    if cached is not None:
+        return Response(cached.status, cached.headers, cached.data, from_cache=True)
+    response = await call_next(request)
+    _cache.set(key, response, ttl)
+    return response
+
+
+# ---- rate_limit ----
+
+
+class _RateLimiter:
+    """按固定间隔放行请求；用线程锁而不是 asyncio.Lock，可在多个事件循环间共享"""
+
+    def __init__(self, rate: float):
+        self._interval = 1 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    async def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self._interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_limiters: Dict[str, _RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+async def rate_limit(request: Request, call_next: Handler) -> Response:
+    """Space the requests of a source, and of all sources together, according to the configured rate limits"""
+    for name in (ALL_SOURCES, request.source.source_name):
+        rate = _settings["rate_limits"].get(name)
+        if not rate:
+            continue
+        with _limiters_lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                limiter = _limiters[name] = _RateLimiter(rate)
+        await limiter.acquire()
+    return await call_next(request)
+
+
+# ---- retry ----
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """429 响应的 Retry-After 秒数"""
+    headers = getattr(exc, "headers", None) or getattr(getattr(exc, "response", None), "headers", None)
+    value = headers.get("Retry-After") if headers else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+async def retry(request: Request, call_next: Handler) -> Response:
+    """Retry idempotent requests failing with a timeout, network error, 429 or 5xx"""
+    retries = _settings["retries"] if request.is_idempotent else 0
+    attempt = 0
+    while True:
+        try:
+            return await call_next(request)
+        except Exception as e:
+            if attempt >= retries or errors.classify(e) not in RETRYABLE_KINDS:
+                raise
+            delay = _settings["retry_backoff"] * (2**attempt) * random.uniform(0.5, 1.0)
+            retry_after = _retry_after(e)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            delay = min(delay, _settings["retry_max_backoff"])
+            attempt += 1
+            metrics.record_retry(current_call.get())
+            logger.debug(f"Retrying {request.method} {request.url} in {delay:.2f}s ({attempt}/{retries}): {e!r}")
+            await asyncio.sleep(delay)
+
+
+# ---- observe ----
+
+
+async def observe(request: Request, call_next: Handler) -> Response:
+    """Log the decoded payload, see payload_log"""
+    response = await call_next(request)
+    payload_log.log_payload(response.data)
+    return response
+
+
+# ---- send ----
+
+
+async def _decode(response: Any, request: Request) -> Any:
+    if request.decode == DECODE_BYTES:
+        return await response.read()
+    if request.decode == DECODE_STREAM:
+        return await streaming.load_json(response, keep=request.keep)
+    if request.decode == DECODE_LENIENT_JSON:
+        data = await response.json(content_type=None)
+        # 部分上游返回字符串形式的 JSON
+        return json.loads(data) if isinstance(data, str) else data
+    return await response.json()
+
+
+def _decode_httpx(response: httpx.Response, request: Request) -> Any:
+    if request.decode == DECODE_BYTES:
+        return response.content
+    data = response.json()
+    if request.decode == DECODE_LENIENT_JSON and isinstance(data, str):
+        return json.loads(data)
+    return data
+
+
+async def _send_httpx(request: Request, client: httpx.AsyncClient) -> Response:
+    kwargs: Dict[str, Any] = {"params": request.params, "headers": request.headers, "json": request.json}
+    if request.data is not None:
+        kwargs["data" if isinstance(request.data, dict) else "content"] = request.data
+    if request.timeout is not None:
+        kwargs["timeout"] = request.timeout
+    response = await client.request(request.method, request.url, **kwargs)
+    response.raise_for_status()
+    return Response(response.status_code, response.headers, _decode_httpx(response, request))
+
+
+async def send(request: Request) -> Response:
+    """Send the request with the source's session and decode the response; the last stage of the pipeline"""
+    if request.use_httpx:
+        if request.client is not None:
+            return await _send_httpx(request, request.client)
+        async with request.source._http_client() as client:
+            return await _send_httpx(request, client)
+
+    kwargs: Dict[str, Any] = {"params": request.params, "headers": request.headers, "json": request.json, "data": request.data}
+    if request.timeout is not None:
+        kwargs["timeout"] = request.timeout
+    async with request.source._client_session() as session:
+        async with session.request(request.method, request.url, **{k: v for k, v in kwargs.items() if v is not None}) as response:
+            response.raise_for_status()
+            return Response(response.status, response.headers, await _decode(response, request))
+
+
+# ---- chain ----
+
+middlewares: List[Middleware] = [cache, rate_limit, retry, observe]
+_chain: Optional[Handler] = None
+_chain_key: Optional[List[Middleware]] = None
+
+
+def use(middleware: Middleware, index: Optional[int] = None) -> None:
+    """
+    Add a middleware stage
+
+    Args:
+        middleware: ``async (request, call_next) -> Response``
+        index: Position in the chain, None to append (closest to the transport)
+    """
+    middlewares.insert(len(middlewares) if index is None else index, middleware)
+
+
+def remove(middleware: Middleware) -> None:
+    """
+    Remove a middleware stage
+
+    Args:
+        middleware: A stage added with ``use`` or one of the default stages
+    """
+    middlewares.remove(middleware)
+
+
+def _build_chain() -> Handler:
+    global _chain, _chain_key
+    if _chain is None or _chain_key != middlewares:
+        handler: Handler = send
+        for middleware in reversed(middlewares):
+
+            def bind(middleware: Middleware, call_next: Handler) -> Handler:
+                return lambda request: middleware(request, call_next)
+
+            handler = bind(middleware, handler)
+        _chain, _chain_key = handler, list(middlewares)
+    return _chain
+
+
+async def execute(request: Request) -> Response:
+    """
+    Run a request through all middleware stages
+
+    Args:
+        request: The request
+
+    Returns:
+        Response: The decoded response
+    """
+    return await _build_chain()(request)
+
+
+def reset() -> None:
+    """Clear the response cache and the rate limiters"""
+    _cache.clear()
+    with _limiters_lock:
+        _limiters.clear()
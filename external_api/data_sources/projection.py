@@ -0,0 +1,89 @@
+"""
+Field projection for data source results
+
+Data source methods accept ``fields=[...]`` to return only the requested fields
+of each result item. Paths may be dotted to select inside nested dicts, e.g.
+``["hotel_id", "price.amount"]``. Sources use ``FieldSelector.wants`` to skip
+parsing sub-structures nobody asked for (room photos, pinner info, ...), then
+``FieldSelector.apply`` to drop the remaining unrequested keys. Projected results
+are always plain dicts, so ``fields`` takes precedence over ``compact=True``.
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+# 叶子节点为 None，表示选中整个子树
+_Tree = Optional[Dict[str, Any]]
+
+
+class FieldSelector:
+    """
+    Parsed ``fields`` projection
+
+    An empty or missing ``fields`` list selects everything, in which case every
+    method behaves exactly as without projection.
+    """
+
+    __slots__ = ("_tree",)
+
+    def __init__(self, fields: Optional[Iterable[str]] = None):
+        self._tree: _Tree = None
+        if not fields:
+            return
+
+        tree: Dict[str, Any] = {}
+        for path in fields:
+            node = tree
+            parts = [part for part in str(path).split(".") if part]
+            for i, part in enumerate(parts):
+                if i == len(parts) - 1:
+                    node[part] = None
+                    break
+                if part in node and node[part] is None:  # 父路径已整体选中
+                    break
+                node = node.setdefault(part, {})
+        self._tree = tree or None
+
+    @classmethod
+    def _from_tree(cls, tree: _Tree) -> "FieldSelector":
+        selector = cls()
+        selector._tree = tree
+        return selector
+
+    @property
+    def selects_all(self) -> bool:
+        """Whether no projection is applied"""
+        return self._tree is None
+
+    def wants(self, name: str) -> bool:
+        """Whether the top-level field ``name`` (or something below it) is requested"""
+        return self._tree is None or name in self._tree
+
+    def child(self, name: str) -> "FieldSelector":
+        """Selector for the fields requested below ``name``"""
+        if self._tree is None:
+            return self
+        return FieldSelector._from_tree(self._tree.get(name))
+
+    def apply(self, record: Any) -> Any:
+        """
+        Drop unrequested fields from a record (or from each record of a list)
+
+        Args:
+            record: A dict, or a list of dicts
+
+        Returns:
+            Any: The projected record; non-dict values are returned unchanged
+        """
+        if self._tree is None:
+            return record
+        if isinstance(record, list):
+            return [self.apply(item) for item in record]
+        if not isinstance(record, dict):
+            return record
+
+        projected = {}
+        for name, sub_tree in self._tree.items():
+            if name in record:
+                value = record[name]
+                projected[name] = value if sub_tree is None else FieldSelector._from_tree(sub_tree).apply(value)
+        return projected
@@ -5,14 +5,20 @@
 import asyncio
 import logging
 import math
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import aiohttp
 
+from . import errors, pipeline
 from .base import BaseAPI
+from .models import Paper, build
+from .projection import FieldSelector
 
 logger = logging.getLogger("scholar_source")
 
+# 流式解码时只构建结果列表中用到的字段，见 streaming.load_json
+ORGANIC_KEEP = {"": {"organic"}, "organic.item": {"title", "snippet", "link", "publicationInfo", "year", "citedBy", "pdfUrl"}}
+
 
 class ScholarSource(BaseAPI):
     """Academic data source
@@ -56,6 +62,8 @@ class ScholarSource(BaseAPI):
         page: int,
         start_year: Optional[str],
         end_year: Optional[str],
+        compact: bool = False,
+        fields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         获取单页学术论文数据
@@ -66,6 +74,8 @@ class ScholarSource(BaseAPI):
             page(int): 页码
             start_year(str): 开始年份
             end_year(str): 结束年份
+            compact(bool): 是否返回紧凑记录
+            fields(List[str]): 只返回指定字段
 
         Returns:
             Dict[str, Any]: 单页搜索结果
@@ -79,36 +89,39 @@ class ScholarSource(BaseAPI):
         request_url = f"{self.proxy_url}/scholar"
 
         try:
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.post(request_url, headers=self.headers, json=payload, timeout=self.timeout) as response:
-                    response.raise_for_status()
-                    data = await response.json()
+            # 多页并发时逐块解码，只构建 organic 中用到的字段
+            data = await self._request(
+                "POST", request_url, headers=self.headers, json=payload, timeout=self.timeout, decode=pipeline.DECODE_STREAM, keep=ORGANIC_KEEP
+            )
 
             organic = data.get("organic", [])
 
+            selector = FieldSelector(fields)
+            compact = compact and selector.selects_all
             results = []
             for item in organic:
-                results.append(
-                    {
-                        "title": item.get("title"),
-                        "snippet": item.get("snippet"),
-                        "link": item.get("link"),
-                        "publicationInfo": item.get("publicationInfo"),
-                        "year": item.get("year"),
-                        "citedBy": item.get("citedBy"),
-                        "pdfUrl": item.get("pdfUrl"),
-                    }
+                record = build(
+                    Paper,
+                    compact,
+                    title=item.get("title"),
+                    snippet=item.get("snippet"),
+                    link=item.get("link"),
+                    publicationInfo=item.get("publicationInfo"),
+                    year=item.get("year"),
+                    citedBy=item.get("citedBy"),
+                    pdfUrl=item.get("pdfUrl"),
                 )
+                results.append(record if compact else selector.apply(record))
             return {"success": True, "data": results}
-        except asyncio.TimeoutError:
+        except asyncio.TimeoutError as e:
             error_msg = f"Request timeout (timeout={self.timeout}s)"
-            logger.error(f"_fetch_scholar_page error: page={page}, {error_msg}")
+            errors.log_failure(logger, f"_fetch_scholar_page error: page={page}, {error_msg}", e)
             return {"success": False, "error": error_msg}
         except aiohttp.ClientError as e:
-            logger.error(f"_fetch_scholar_page error: page={page}, error={e}")
+            errors.log_failure(logger, f"_fetch_scholar_page error: page={page}, error={e}", e)
             return {"success": False, "error": str(e)}
         except Exception as e:
-            logger.error(f"_fetch_scholar_page error: page={page}, error={e}")
+            errors.log_failure(logger, f"_fetch_scholar_page error: page={page}, error={e}", e)
             return {"success": False, "error": str(e)}
 
     async def search_scholar(
@@ -117,6 +130,8 @@ class ScholarSource(BaseAPI):
         num_results: int = 10,
         start_year: Optional[str] = None,
         end_year: Optional[str] = None,
+        compact: bool = False,
+        fields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Search for academic papers.
@@ -126,6 +141,8 @@ class ScholarSource(BaseAPI):
             num_results(int): Number of results to return, default is 10, max is 500.
             start_year(str): Start year, YYYY, default is None.
             end_year(str): End year, YYYY, default is None.
+            compact(bool): Return papers as memory-compact records (dict-like, convert with `.to_dict()`), default is False.
+            fields(List[str]): Only return these fields of each paper, e.g. ["title", "link", "year"], default is None (all fields).
 
         Returns:
             Dict[str, Any]: Search results, format:
@@ -188,6 +205,8 @@ class ScholarSource(BaseAPI):
                         page=page,
                         start_year=start_year,
                         end_year=end_year,
+                        compact=compact,
+                        fields=fields,
                     )
                 )
 
@@ -219,5 +238,5 @@ class ScholarSource(BaseAPI):
 
             return {"success": True, "data": {"papers": all_papers}}
         except Exception as e:
-            logger.error(f"search_scholar error: {e}")
+            errors.log_failure(logger, f"search_scholar error: {e}", e)
             return {"success": False, "error": str(e)}
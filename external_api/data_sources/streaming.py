@@ -0,0 +1,138 @@
+"""
+Incremental JSON decoding of large upstream responses
+
+``await response.json()`` buffers the whole body and then builds the whole
+object tree, so for large payloads (hotel details with dozens of rooms,
+multi-page scholar results) peak memory holds both. ``load_json`` instead
+feeds ``response.content`` chunk by chunk into ijson and only builds the
+object keys the caller asks for; the raw body is never held in full and
+skipped subtrees are never materialized:
+
+    data = await streaming.load_json(response, keep={"": {"status", "data"}, "data": {"hotel_id", "rooms"}})
+
+``keep`` maps the ijson prefix of an object (``""`` for the root,
+``"organic.item"`` for the items of the root's ``organic`` array) to the keys
+to build; objects at other prefixes are built completely.
+
+Decoding with ijson runs on the event loop, unlike ``executor.run_parse``,
+so it is opt-in (``stream_json`` config key) and pays off only when ``keep``
+skips most of the payload; otherwise buffering the body and parsing it on
+the executor blocks the loop far less.
+
+ijson is optional: without it (or with only its pure Python backend, which
+is slower than ``json.loads``), when streaming is disabled in the config or
+when responses are recorded / replayed by ``fixtures``, the body is read and
+decoded in full as before. Callers must therefore not rely on skipped keys
+being absent.
+"""
+
+import json
+from typing import Any, Collection, Dict, Optional
+
+from . import fixtures
+from .instrumentation import record_response_body
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# 纯 Python 后端比 json.loads 慢得多，只在编译后端可用时流式解析
+FAST_BACKENDS = ("yajl2_c", "yajl2_cffi", "yajl2")
+
+_settings: Dict[str, Any] = {"enabled": False, "chunk_size": 64 * 1024}
+
+Keep = Dict[str, Collection[str]]
+
+
+def configure(enabled: Optional[bool] = None, chunk_size: Optional[int] = None) -> None:
+    """
+    Configure streaming decoding
+
+    Args:
+        enabled: Whether to decode large responses incrementally when ijson is available, off by default
+        chunk_size: Bytes read from the response per step
+    """
+    if enabled is not None:
+        _settings["enabled"] = enabled
+    if chunk_size is not None:
+        _settings["chunk_size"] = max(1024, chunk_size)
+
+
+def configure_from(config: Dict[str, Any]) -> None:
+    """
+    Configure streaming decoding from the data source config dict
+
+    Args:
+        config: Config with the optional keys stream_json and stream_json_chunk_size
+    """
+    configure(enabled=config.get("stream_json"), chunk_size=config.get("stream_json_chunk_size"))
+
+
+def available() -> bool:
+    """
+    Whether ``load_json`` decodes incrementally
+
+    Returns:
+        bool: True when streaming is enabled, a compiled ijson backend is installed and fixtures are not in use
+    """
+    return _settings["enabled"] and ijson is not None and ijson.backend in FAST_BACKENDS and fixtures.mode is None
+
+
+async def load_json(response: Any, keep: Optional[Keep] = None) -> Any:
+    """
+    Decode the JSON body of a response, incrementally when possible
+
+    Args:
+        response: ``aiohttp.ClientResponse`` (or a fixture response) whose body was not read yet
+        keep: Object prefix -> keys to build, see the module docstring; None builds everything
+
+    Returns:
+        Any: The decoded body, without the skipped keys when decoded incrementally
+    """
+    if not available() or not hasattr(response, "content"):
+        return json.loads(await response.read())
+    # use_float: 与 json.loads 一致返回 float 而不是 Decimal
+    events = ijson.parse_async(_CountingReader(response), buf_size=_settings["chunk_size"], use_float=True)
+    return await _build(events, keep or {})
+
+
+class _CountingReader:
+    """记录读取的响应体字节数；流式读取不经过 read()，aiohttp 的 trace 信号不会触发"""
+
+    def __init__(self, response: Any):
+        self._content = response.content
+        self._headers = response.headers
+
+    async def read(self, n: int = -1) -> bytes:
+        chunk = await self._content.read(n)
+        if chunk:
+            record_response_body(self._headers, len(chunk))
+        return chunk
+
+
+async def _build(events: Any, keep: Keep) -> Any:
+    """由 ijson 事件构建对象，跳过 keep 中未列出的键对应的子树"""
+    builder = ijson.ObjectBuilder()
+    # 正在跳过的值：skip_next 表示下一个事件是被跳过的键的值，skip_depth 为跳过中的容器嵌套深度
+    skip_next = False
+    skip_depth = 0
+    async for prefix, event, value in events:
+        if skip_next:
+            skip_next = False
+            if event in ("start_map", "start_array"):
+                skip_depth = 1
+            continue
+        if skip_depth:
+            if event in ("start_map", "start_array"):
+                skip_depth += 1
+            elif event in ("end_map", "end_array"):
+                skip_depth -= 1
+            continue
+        if event == "map_key":
+            wanted = keep.get(prefix)
+            if wanted is not None and value not in wanted:
+                skip_next = True
+                continue
+        builder.event(event, value)
+    return builder.value
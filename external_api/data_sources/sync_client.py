@@ -0,0 +1,230 @@
+"""
+Synchronous facade over ApiClient
+
+Sync code that wraps every call in its own ``asyncio.run`` pays for a new event
+loop, a new session and new upstream connections per call, and cannot run
+calls concurrently. ``SyncApiClient`` runs one persistent event loop in a
+background thread with a shared connection pool (see ``transport``); calls are
+submitted to it thread-safely and return results or
+``concurrent.futures.Future`` objects:
+
+    client = get_sync_client()
+    result = client.yahoo_finance.get_stock_price("AAPL", "2025-01-01", "2025-02-01")
+    future = client.submit("booking", "search_flights", from_code="PVG", to_code="LAX", depart_date="2025-06-01")
+    results = client.batch([("yahoo_finance", "get_stock_info", {"symbol": s}) for s in symbols], max_concurrency=10)
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import functools
+import threading
+from typing import Any, Callable, Coroutine, Iterable, List, Optional, Sequence, Tuple
+
+from . import transport
+from .client import ApiClient, get_client
+
+# batch 的调用描述: (数据源名, 方法名, 关键字参数)
+Call = Tuple[str, str, dict]
+
+
+class _SyncSource:
+    """数据源的同步代理，方法调用阻塞直到结果返回"""
+
+    def __init__(self, client: "SyncApiClient", source_name: str):
+        self._client = client
+        self._source_name = source_name
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client.client.__getattr__(self._source_name), name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+            return self._client.call(self._source_name, name, *args, timeout=timeout, **kwargs)
+
+        return call
+
+
+class SyncApiClient:
+    """
+    Thread-safe synchronous access to all data sources through one background event loop
+
+    Data sources are accessed as attributes like on ``ApiClient``, with
+    blocking methods; ``submit`` and ``batch`` run calls concurrently.
+    """
+
+    def __init__(self, client: Optional[ApiClient] = None, pool_size: int = 100, pool_size_per_host: int = 0):
+        """
+        Args:
+            client: ApiClient whose data sources are called, defaults to the global client
+            pool_size: Maximum number of pooled upstream connections, 0 for no limit
+            pool_size_per_host: Maximum number of pooled connections per upstream host, 0 for no limit
+        """
+        self.client = client or get_client()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="data-sources-loop", daemon=True)
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._thread.start()
+        self._run(self._open_pool(pool_size, pool_size_per_host))
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    async def _open_pool(self, pool_size: int, pool_size_per_host: int) -> None:
+        transport.open_pool(limit=pool_size, limit_per_host=pool_size_per_host)
+
+    def _run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def _method(self, source_name: str, method_name: str) -> Callable[..., Any]:
+        method = getattr(self.client.__getattr__(source_name), method_name, None)
+        if method is None or not asyncio.iscoroutinefunction(method):
+            raise AttributeError(f"Data source {source_name} has no async method {method_name}")
+        return method
+
+    def submit(self, source_name: str, method_name: str, *args: Any, **kwargs: Any) -> concurrent.futures.Future:
+        """
+        Schedule a data source call on the background loop
+
+        Args:
+            source_name: Data source name, e.g. "yahoo_finance"
+            method_name: Method name, e.g. "get_stock_price"
+            *args: Positional arguments of the method
+            **kwargs: Keyword arguments of the method
+
+        Returns:
+            concurrent.futures.Future: Future of the method's return value
+        """
+        if self._closed:
+            raise RuntimeError("SyncApiClient is closed")
+        method = self._method(source_name, method_name)
+        return asyncio.run_coroutine_threadsafe(method(*args, **kwargs), self._loop)
+
+    def call(self, source_name: str, method_name: str, *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """
+        Call a data source method and wait for its result
+
+        Args:
+            source_name: Data source name, e.g. "yahoo_finance"
+            method_name: Method name, e.g. "get_stock_price"
+            *args: Positional arguments of the method
+            timeout: Seconds to wait for the result, None to wait indefinitely
+            **kwargs: Keyword arguments of the method
+
+        Returns:
+            Any: The method's return value
+
+        Raises:
+            concurrent.futures.TimeoutError: The result was not available within ``timeout``
+        """
+        future = self.submit(source_name, method_name, *args, **kwargs)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def batch(
+        self, calls: Iterable[Call], max_concurrency: Optional[int] = None, timeout: Optional[float] = None, return_exceptions: bool = False
+    ) -> List[Any]:
+        """
+        Run several data source calls concurrently and wait for all of them
+
+        Args:
+            calls: (source name, method name, keyword arguments) tuples
+            max_concurrency: Maximum number of calls in flight, None for no limit
+            timeout: Seconds to wait for all results, None to wait indefinitely
+            return_exceptions: Return raised exceptions in the result list instead of raising the first one
+
+        Returns:
+            List[Any]: Return values in the order of ``calls``
+        """
+        if self._closed:
+            raise RuntimeError("SyncApiClient is closed")
+        bound = [(self._method(source_name, method_name), kwargs) for source_name, method_name, kwargs in calls]
+        future = asyncio.run_coroutine_threadsafe(self._gather(bound, max_concurrency, return_exceptions), self._loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    async def _gather(self, bound: Sequence[Tuple[Callable[..., Any], dict]], max_concurrency: Optional[int], return_exceptions: bool) -> List[Any]:
+        if not max_concurrency:
+            return await asyncio.gather(*(method(**kwargs) for method, kwargs in bound), return_exceptions=return_exceptions)
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def limited(method: Callable[..., Any], kwargs: dict) -> Any:
+            async with semaphore:
+                return await method(**kwargs)
+
+        return await asyncio.gather(*(limited(method, kwargs) for method, kwargs in bound), return_exceptions=return_exceptions)
+
+    def close(self, timeout: Optional[float] = 10) -> None:
+        """
+        Close the connection pool and stop the background loop
+
+        Args:
+            timeout: Seconds to wait for the pool to close and the loop thread to exit
+        """
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            self._run(transport.close_pool(), timeout)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            if not self._thread.is_alive():
+                self._loop.close()
+
+    def __enter__(self) -> "SyncApiClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __getattr__(self, name: str) -> _SyncSource:
+        """
+        Get the synchronous proxy of a data source
+
+        Args:
+            name: Data source name
+
+        Returns:
+            _SyncSource: Proxy whose async methods block until their result is available
+
+        Raises:
+            AttributeError: data source does not exist
+        """
+        if name.startswith("_"):
+            raise AttributeError(name)
+        self.client.__getattr__(name)
+        return _SyncSource(self, name)
+
+
+# 全局默认同步实例
+_default_sync_client: Optional[SyncApiClient] = None
+_sync_client_lock = threading.Lock()
+
+
+def get_sync_client() -> SyncApiClient:
+    """
+    Get the default SyncApiClient instance, closed automatically at interpreter exit
+
+    Returns:
+        SyncApiClient: Default SyncApiClient instance
+    """
+    global _default_sync_client
+    if _default_sync_client is None:
+        with _sync_client_lock:
+            if _default_sync_client is None:  # Double-check
+                _default_sync_client = SyncApiClient()
+                atexit.register(_default_sync_client.close)
+    return _default_sync_client
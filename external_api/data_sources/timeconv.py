@@ -0,0 +1,197 @@
+"""
+Shared date/time conversion for data source parsers
+
+Upstream records carry timestamps in a handful of fixed formats, and
+``datetime.strptime`` per record is one of the most expensive per-item
+operations on large pages. This module converts them to the common output
+format ``"%Y-%m-%d %H:%M:%S"`` with:
+
+- fast-path parsers for the known input formats (slicing instead of the
+  generic ``strptime`` machinery), falling back to ``strptime`` for anything
+  they do not recognize so results and errors stay identical;
+- a bounded memo of converted values, since the same timestamps repeat a lot
+  (tweets of one minute, bars of the same trading days for many symbols);
+- ``epochs_to_dates`` for converting columns of epoch seconds (Yahoo bars).
+"""
+
+import functools
+from datetime import datetime, time, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+OUTPUT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 已知的上游格式
+ISO_Z = "%Y-%m-%dT%H:%M:%SZ"  # 2025-04-24T22:29:34Z (TripAdvisor 评论, 金属价格)
+ISO_MS_Z = "%Y-%m-%dT%H:%M:%S.%fZ"  # 2021-02-26T00:50:50.206Z (TripAdvisor 照片)
+TWITTER = "%a %b %d %H:%M:%S %z %Y"  # Thu Mar 13 18:08:35 +0000 2025
+RFC_2822 = "%a, %d %b %Y %H:%M:%S %z"  # Tue, 04 Mar 2025 12:26:23 +0000 (Pinterest)
+
+MEMO_SIZE = 8192
+
+_MONTHS = {name: index for index, name in enumerate(("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)}
+_WEEKDAYS = {"Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"}
+
+
+def _is_digits(value: str) -> bool:
+    # str.isdigit 也接受非 ASCII 数字（如 "٣"），strptime 不接受
+    return value.isascii() and value.isdigit()
+
+
+def _format(year: int, month: int, day: int, hour: int, minute: int, second: int) -> Optional[str]:
+    # strftime 不补齐 1000 年以前的年份，交给 strptime 处理
+    if year < 1000:
+        return None
+    # 构造 datetime 以与 strptime 一致地校验日期（如 2月30日）
+    datetime(year, month, day, hour, minute, second)
+    return f"{year:04d}-{month:02d}-{day:02d} {hour:02d}:{minute:02d}:{second:02d}"
+
+
+def _is_offset(value: str) -> bool:
+    # 与 strptime 的 %z 一致：小时须小于 24，分钟须小于 60
+    return len(value) == 5 and value[0] in "+-" and _is_digits(value[1:]) and int(value[1:3]) < 24 and int(value[3:5]) < 60
+
+
+def _parse_iso_z(value: str) -> Optional[str]:
+    if len(value) != 20 or value[19] != "Z":
+        return None
+    return _parse_iso(value)
+
+
+def _parse_iso_ms_z(value: str) -> Optional[str]:
+    if not 22 <= len(value) <= 27 or value[19] != "." or value[-1] != "Z" or not _is_digits(value[20:-1]):
+        return None
+    return _parse_iso(value)
+
+
+def _parse_iso(value: str) -> Optional[str]:
+    if value[4] != "-" or value[7] != "-" or value[10] != "T" or value[13] != ":" or value[16] != ":":
+        return None
+    digits = (value[0:4], value[5:7], value[8:10], value[11:13], value[14:16], value[17:19])
+    if not all(_is_digits(part) for part in digits):
+        return None
+    return _format(*(int(part) for part in digits))
+
+
+def _parse_clock(value: str) -> Optional[Tuple[int, int, int]]:
+    if len(value) != 8 or value[2] != ":" or value[5] != ":":
+        return None
+    parts = (value[0:2], value[3:5], value[6:8])
+    if not all(_is_digits(part) for part in parts):
+        return None
+    return int(parts[0]), int(parts[1]), int(parts[2])
+
+
+def _parse_twitter(value: str) -> Optional[str]:
+    parts = value.split(" ")
+    if len(parts) != 6 or parts[0] not in _WEEKDAYS or parts[1] not in _MONTHS or not _is_offset(parts[4]):
+        return None
+    day, year, clock = parts[2], parts[5], _parse_clock(parts[3])
+    if len(day) != 2 or not _is_digits(day) or len(year) != 4 or not _is_digits(year) or clock is None:
+        return None
+    return _format(int(year), _MONTHS[parts[1]], int(day), *clock)
+
+
+def _parse_rfc_2822(value: str) -> Optional[str]:
+    parts = value.split(" ")
+    if len(parts) != 6 or parts[0][:-1] not in _WEEKDAYS or parts[0][-1:] != "," or parts[2] not in _MONTHS or not _is_offset(parts[5]):
+        return None
+    day, year, clock = parts[1], parts[3], _parse_clock(parts[4])
+    if len(day) != 2 or not _is_digits(day) or len(year) != 4 or not _is_digits(year) or clock is None:
+        return None
+    return _format(int(year), _MONTHS[parts[2]], int(day), *clock)
+
+
+# 输入格式 -> 快速解析函数；返回 None 表示不符合快速路径，交给 strptime 处理
+_FAST_PARSERS: Dict[str, Callable[[str], Optional[str]]] = {
+    ISO_Z: _parse_iso_z,
+    ISO_MS_Z: _parse_iso_ms_z,
+    TWITTER: _parse_twitter,
+    RFC_2822: _parse_rfc_2822,
+}
+
+
+@functools.lru_cache(maxsize=MEMO_SIZE)
+def to_datetime_string(value: str, input_format: str) -> str:
+    """
+    Convert a date/time string to "%Y-%m-%d %H:%M:%S"
+
+    Same result as ``datetime.strptime(value, input_format).strftime("%Y-%m-%d %H:%M:%S")``
+    (wall-clock time as written, the UTC offset is not applied), memoized.
+
+    Args:
+        value: Date/time string, e.g. "Thu Mar 13 18:08:35 +0000 2025"
+        input_format: strptime format of value, e.g. ``TWITTER``
+
+    Returns:
+        str: e.g. "2025-03-13 18:08:35"
+
+    Raises:
+        ValueError: value does not match input_format
+    """
+    parser = _FAST_PARSERS.get(input_format)
+    if parser is not None:
+        try:
+            result = parser(value)
+        except ValueError:
+            result = None
+        if result is not None:
+            return result
+    return datetime.strptime(value, input_format).strftime(OUTPUT_FORMAT)
+
+
+@functools.lru_cache(maxsize=MEMO_SIZE)
+def epoch_to_date(timestamp: int) -> str:
+    """
+    Convert epoch seconds to a local date, like ``datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")``, memoized
+
+    Args:
+        timestamp: Epoch seconds
+
+    Returns:
+        str: e.g. "2025-04-25"
+    """
+    dt = datetime.fromtimestamp(timestamp)
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}"
+
+
+def _local_day_bounds(timestamp: int) -> Tuple[float, float]:
+    """时间戳所在本地日期的 [起始, 结束) 时间戳，按本地时区计算（含夏令时切换日）"""
+    day = datetime.fromtimestamp(timestamp).date()
+    return datetime.combine(day, time()).timestamp(), datetime.combine(day + timedelta(days=1), time()).timestamp()
+
+
+def epochs_to_dates(timestamps: Sequence[int]) -> List[str]:
+    """
+    Convert a column of epoch seconds to local dates
+
+    Daily bars hit the memo of ``epoch_to_date`` (the same trading days repeat
+    across symbols and calls); for intraday bars, once two consecutive
+    timestamps fall on the same day the bounds of that day are computed and
+    every following timestamp inside them reuses the date without conversion.
+
+    Args:
+        timestamps: Epoch seconds, typically ascending
+
+    Returns:
+        List[str]: Dates in the order of timestamps, e.g. ["2025-04-24", "2025-04-25"]
+    """
+    dates: List[str] = []
+    start = end = 0.0
+    window_date = previous_date = ""
+    for timestamp in timestamps:
+        if start <= timestamp < end:
+            dates.append(window_date)
+            continue
+        date = epoch_to_date(timestamp)
+        if date == previous_date:
+            start, end = _local_day_bounds(timestamp)
+            window_date = date
+        previous_date = date
+        dates.append(date)
+    return dates
+
+
+def clear_cache() -> None:
+    """Clear the memos, e.g. after the local time zone changed"""
+    to_datetime_string.cache_clear()
+    epoch_to_date.cache_clear()
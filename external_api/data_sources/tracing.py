@@ -0,0 +1,378 @@
+"""
+Structured tracing for data source and function calls
+
+When enabled, every instrumented call (``booking.search_flights``,
+``function.web_search``) opens a span, and each upstream HTTP request made
+through ``BaseAPI._client_session`` gets a child span broken down into the
+phases that tell where the time went:
+
+    queue     waiting for a free connection in the pool
+    dns       resolving the upstream host
+    connect   opening the TCP/TLS connection (absent when a connection is reused)
+    send      writing the request
+    wait      waiting for the response headers (proxy + upstream processing)
+    download  reading the response body
+    parse     decoding and simplifying the payload (see ``executor.run_parse``)
+
+Spans are buffered per trace and exported when the root span ends: to an
+in-memory ring buffer (``get_traces``), to a JSONL file (``trace_file``) and,
+if the ``opentelemetry`` package is installed, to the globally configured
+OpenTelemetry tracer. The ``request_id`` of a ``FunctionProxy`` call is
+attached to all its spans and sent upstream with a W3C ``traceparent`` header.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+import aiohttp
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+logger = logging.getLogger("data_sources_tracing")
+
+_settings: Dict[str, Any] = {"enabled": False, "trace_file": None, "otel": True}
+_file_lock = threading.Lock()
+_recent: Deque[List[Dict[str, Any]]] = deque(maxlen=100)
+
+# 当前 span 与当前请求ID（由 FunctionProxy 设置）
+current_span: ContextVar[Optional["Span"]] = ContextVar("data_sources_current_span", default=None)
+current_request_id: ContextVar[Optional[str]] = ContextVar("data_sources_current_request_id", default=None)
+
+
+class Span:
+    """A finished or running span; ids follow the W3C / OpenTelemetry format"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status", "_trace")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, start_ns: Optional[int] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id: str = parent.trace_id if parent else os.urandom(16).hex()
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "ok"
+        # 同一 trace 的所有 span，根 span 结束时统一导出
+        self._trace: List["Span"] = parent._trace if parent else []
+        self._trace.append(self)
+
+        request_id = current_request_id.get()
+        if request_id and "request_id" not in self.attributes:
+            self.attributes["request_id"] = request_id
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent header value for requests made inside this span"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        self.end_ns = end_ns if end_ns is not None else time.time_ns()
+        if self.parent_id is None:
+            _export(self._trace)
+
+    def to_dict(self) -> Dict[str, Any]:
+        end_ns = self.end_ns or self.start_ns
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time_ns": self.start_ns,
+            "end_time_ns": end_ns,
+            "duration_ms": (end_ns - self.start_ns) / 1_000_000,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def configure(enabled: Optional[bool] = None, trace_file: Optional[str] = None, otel: Optional[bool] = None) -> None:
+    """
+    Configure tracing
+
+    Args:
+        enabled: Whether spans are recorded
+        trace_file: JSONL file each finished trace is appended to (one span per line)
+        otel: Whether finished traces are also exported to OpenTelemetry when it is installed
+    """
+    if enabled is not None:
+        _settings["enabled"] = enabled
+    if trace_file is not None:
+        _settings["trace_file"] = trace_file or None
+    if otel is not None:
+        _settings["otel"] = otel
+
+
+def is_enabled() -> bool:
+    return _settings["enabled"]
+
+
+@contextmanager
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Optional[Span]]:
+    """
+    Open a span as child of the current span for the duration of the block
+
+    Args:
+        name: Span name
+        attributes: Span attributes
+
+    Returns:
+        Iterator[Optional[Span]]: The span, or None when tracing is disabled
+    """
+    if not _settings["enabled"]:
+        yield None
+        return
+
+    span = Span(name, parent=current_span.get(), attributes=attributes)
+    token = current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = "error"
+        span.attributes["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current_span.reset(token)
+        span.end()
+
+
+def bind_request_id(request_id: str) -> Token:
+    """
+    Attach a request ID to the current span and to all spans opened after it in this context
+
+    Args:
+        request_id: Request ID, e.g. the ``request_id`` sent by ``FunctionProxy``
+
+    Returns:
+        Token: Pass to ``current_request_id.reset`` when the request is done, so the ID does not leak into later requests of the same context
+    """
+    token = current_request_id.set(request_id)
+    span = current_span.get()
+    if span is not None:
+        span.attributes["request_id"] = request_id
+    return token
+
+
+def propagation_headers() -> Dict[str, str]:
+    """
+    Get the headers propagating the current trace and request ID to a downstream service
+
+    Returns:
+        Dict[str, str]: ``traceparent`` and ``X-Request-Id`` headers when available
+    """
+    headers = {}
+    span = current_span.get()
+    if span is not None:
+        headers["traceparent"] = span.traceparent
+    request_id = current_request_id.get()
+    if request_id:
+        headers["X-Request-Id"] = request_id
+    return headers
+
+
+def get_traces() -> List[List[Dict[str, Any]]]:
+    """
+    Get the most recent finished traces
+
+    Returns:
+        List[List[Dict[str, Any]]]: Up to 100 traces, oldest first, each a list of spans in start order
+    """
+    return list(_recent)
+
+
+def dump_traces(path: str) -> int:
+    """
+    Write the recent traces kept in memory to a JSONL file (one span per line)
+
+    Args:
+        path: Output file path
+
+    Returns:
+        int: Number of spans written
+    """
+    spans = [span for trace in get_traces() for span in trace]
+    with open(path, "w", encoding="utf-8") as f:
+        for span in spans:
+            f.write(json.dumps(span, ensure_ascii=False, default=str) + "\n")
+    return len(spans)
+
+
+def _export(trace: List[Span]) -> None:
+    spans = [span.to_dict() for span in trace]
+    _recent.append(spans)
+
+    trace_file = _settings["trace_file"]
+    if trace_file:
+        try:
+            with _file_lock, open(trace_file, "a", encoding="utf-8") as f:
+                for span in spans:
+                    f.write(json.dumps(span, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            logger.warning(f"Failed to write trace file {trace_file}: {str(e)}")
+
+    if otel_trace is not None and _settings["otel"]:
+        _export_otel(trace)
+
+
+def _export_otel(trace: List[Span]) -> None:
+    # span 按创建顺序排列，父 span 总是先于子 span 创建
+    tracer = otel_trace.get_tracer("external_api.data_sources")
+    otel_spans: Dict[str, Any] = {}
+    for span in trace:
+        parent = otel_spans.get(span.parent_id) if span.parent_id else None
+        context = otel_trace.set_span_in_context(parent) if parent is not None else None
+        attributes = {key: value if isinstance(value, (str, bool, int, float)) else str(value) for key, value in span.attributes.items()}
+        attributes["trace_id"] = span.trace_id
+        otel_spans[span.span_id] = tracer.start_span(span.name, context=context, start_time=span.start_ns, attributes=attributes)
+    for span in reversed(trace):
+        otel_span = otel_spans[span.span_id]
+        if span.status == "error":
+            otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR))
+        otel_span.end(end_time=span.end_ns or span.start_ns)
+
+
+# ---------------------------------------------------------------------------
+# aiohttp 请求阶段
+# ---------------------------------------------------------------------------
+
+
+def _phase(ctx: Any, name: str, start_ns: int, end_ns: int) -> Span:
+    span = Span(name, parent=ctx.span, start_ns=start_ns)
+    span.end_ns = end_ns
+    return span
+
+
+async def _on_request_start(session: aiohttp.ClientSession, ctx: Any, params: aiohttp.TraceRequestStartParams) -> None:
+    ctx.span = None
+    if not _settings["enabled"]:
+        return
+    url = params.url
+    ctx.span = Span(
+        f"HTTP {params.method}",
+        parent=current_span.get(),
+        attributes={"http.method": params.method, "server.address": url.host, "url.path": url.path},
+    )
+    ctx.ready_ns = ctx.span.start_ns
+    ctx.sent_ns = None
+    ctx.download = None
+    # 向下游传递 trace 与请求ID
+    params.headers["traceparent"] = ctx.span.traceparent
+    request_id = current_request_id.get()
+    if request_id:
+        params.headers["X-Request-Id"] = request_id
+
+
+async def _on_connection_queued_start(session: aiohttp.ClientSession, ctx: Any, params: Any) -> None:
+    if getattr(ctx, "span", None) is not None:
+        ctx.queued_ns = time.time_ns()
+
+
+async def _on_connection_queued_end(session: aiohttp.ClientSession, ctx: Any, params: Any) -> None:
+    if getattr(ctx, "span", None) is not None:
+        ctx.ready_ns = time.time_ns()
+        _phase(ctx, "queue", ctx.queued_ns, ctx.ready_ns)
+
+
+async def _on_dns_resolvehost_start(session: aiohttp.ClientSession, ctx: Any, params: Any) -> None:
+    if getattr(ctx, "span", None) is not None:
+        ctx.dns_ns = time.time_ns()
+
+
+async def _on_dns_resolvehost_end(session: aiohttp.ClientSession, ctx: Any, params: Any) -> None:
+    if getattr(ctx, "span", None) is not None:
+        _phase(ctx, "dns", ctx.dns_ns, time.time_ns())
+
+
+async def _on_connection_create_start(session: aiohttp.ClientSession, ctx: Any, params: Any) -> None:
+    if getattr(ctx, "span", None) is not None:
+        ctx.connect_ns = time.time_ns()
+
+
+async def _on_connection_create_end(session: aiohttp.ClientSession, ctx: Any, params: Any) -> None:
+    if getattr(ctx, "span", None) is not None:
+        ctx.ready_ns = time.time_ns()
+        ctx.span.attributes["connection.reused"] = False
+        _phase(ctx, "connect", ctx.connect_ns, ctx.ready_ns)
+
+
+async def _on_connection_reuseconn(session: aiohttp.ClientSession, ctx: Any, params: Any) -> None:
+    if getattr(ctx, "span", None) is not None:
+        ctx.ready_ns = time.time_ns()
+        ctx.span.attributes["connection.reused"] = True
+
+
+async def _on_request_headers_sent(session: aiohttp.ClientSession, ctx: Any, params: Any) -> None:
+    if getattr(ctx, "span", None) is not None:
+        ctx.sent_ns = time.time_ns()
+
+
+async def _on_request_chunk_sent(session: aiohttp.ClientSession, ctx: Any, params: Any) -> None:
+    if getattr(ctx, "span", None) is not None:
+        ctx.sent_ns = time.time_ns()
+
+
+async def _on_request_end(session: aiohttp.ClientSession, ctx: Any, params: aiohttp.TraceRequestEndParams) -> None:
+    if getattr(ctx, "span", None) is None:
+        return
+    now = time.time_ns()
+    sent_ns = ctx.sent_ns or ctx.ready_ns
+    _phase(ctx, "send", ctx.ready_ns, sent_ns)
+    _phase(ctx, "wait", sent_ns, now)
+    ctx.span.attributes["http.status_code"] = params.response.status
+    if params.response.status >= 400:
+        ctx.span.status = "error"
+    # 响应体读取没有结束事件，download 随每个数据块延长，在 trace 导出时定格
+    ctx.download = _phase(ctx, "download", now, now)
+    _finish(ctx, now)
+
+
+async def _on_response_chunk_received(session: aiohttp.ClientSession, ctx: Any, params: Any) -> None:
+    if getattr(ctx, "download", None) is None:
+        return
+    now = time.time_ns()
+    ctx.download.end_ns = now
+    ctx.download.attributes["bytes"] = ctx.download.attributes.get("bytes", 0) + len(params.chunk)
+    ctx.span.end_ns = now
+
+
+async def _on_request_exception(session: aiohttp.ClientSession, ctx: Any, params: aiohttp.TraceRequestExceptionParams) -> None:
+    if getattr(ctx, "span", None) is None:
+        return
+    ctx.span.status = "error"
+    ctx.span.attributes["error"] = f"{type(params.exception).__name__}: {params.exception}"
+    _finish(ctx, time.time_ns())
+
+
+def _finish(ctx: Any, end_ns: int) -> None:
+    if ctx.span.parent_id is None:
+        # 不在任何调用内的请求自成一个 trace，立即导出
+        ctx.span.end(end_ns)
+    else:
+        ctx.span.end_ns = end_ns
+
+
+# aiohttp 的 Signal 类型标注与当前 aiosignal 的泛型不一致，append 处忽略 arg-type
+trace_config = aiohttp.TraceConfig()
+trace_config.on_request_start.append(_on_request_start)  # type: ignore[arg-type]
+trace_config.on_connection_queued_start.append(_on_connection_queued_start)  # type: ignore[arg-type]
+trace_config.on_connection_queued_end.append(_on_connection_queued_end)  # type: ignore[arg-type]
+trace_config.on_dns_resolvehost_start.append(_on_dns_resolvehost_start)  # type: ignore[arg-type]
+trace_config.on_dns_resolvehost_end.append(_on_dns_resolvehost_end)  # type: ignore[arg-type]
+trace_config.on_connection_create_start.append(_on_connection_create_start)  # type: ignore[arg-type]
+trace_config.on_connection_create_end.append(_on_connection_create_end)  # type: ignore[arg-type]
+trace_config.on_connection_reuseconn.append(_on_connection_reuseconn)  # type: ignore[arg-type]
+trace_config.on_request_headers_sent.append(_on_request_headers_sent)  # type: ignore[arg-type]
+trace_config.on_request_chunk_sent.append(_on_request_chunk_sent)  # type: ignore[arg-type]
+trace_config.on_request_end.append(_on_request_end)  # type: ignore[arg-type]
+trace_config.on_response_chunk_received.append(_on_response_chunk_received)  # type: ignore[arg-type]
+trace_config.on_request_exception.append(_on_request_exception)  # type: ignore[arg-type]
@@ -0,0 +1,320 @@
+"""
+Per-event-loop connection pools for upstream requests
+
+By default every data source call opens its own ``aiohttp.ClientSession`` and
+therefore its own connector, so no connection is ever reused. A long-lived
+event loop (the ``SyncApiClient`` background loop, a server process, ...) can
+open a pool with ``open_pool``; from then on every session created by
+``BaseAPI._client_session`` on that loop shares the pool's connector and keeps
+upstream connections alive between calls. Short-lived loops (``asyncio.run``
+per call) keep the previous behaviour and leave no connector behind.
+
+``accept_encoding`` negotiates response compression for both HTTP clients:
+it advertises zstd, brotli, gzip and deflate in that order of preference,
+limited to the codecs the client can decode in this installation (brotli
+needs the ``brotli`` package, zstd the ``zstandard`` package and, for
+aiohttp, a version that decodes it). Transferred and decompressed response
+bytes are recorded per call in ``metrics``.
+
+A pool opened with ``http2=True`` (or with the ``upstream_http2`` config key
+set) additionally holds a shared HTTP/2 client; sessions of that loop then
+multiplex their requests over a few connections, see ``http2``.
+
+Pools cache resolved upstream addresses for ``dns_ttl`` seconds (aiohttp's
+default is 10). With ``warm_connections`` set, ``open_pool`` also starts a
+background ``warm_up`` of the proxy host: it resolves the host and opens that
+many keep-alive connections (TCP and TLS handshakes included) with ``HEAD``
+requests, so the first calls on a fresh loop do not pay for them.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import time
+import weakref
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+import httpx
+from aiohttp import compression_utils
+
+from . import fixtures
+from .http2 import available as http2_available
+from .http2 import create_client as create_http2_client
+
+logger = logging.getLogger("data_sources_transport")
+
+# 按偏好排序的压缩格式
+ENCODING_PREFERENCE = ("zstd", "br", "gzip", "deflate")
+
+_settings: Dict[str, Any] = {"compression": True, "http2": False, "dns_ttl": 300, "warm_url": None, "warm_connections": 0}
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.TCPConnector]" = weakref.WeakKeyDictionary()
+_http2_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+# 后台预热任务，保留引用避免被回收
+_warm_tasks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task]" = weakref.WeakKeyDictionary()
+
+
+def open_pool(
+    limit: int = 100,
+    limit_per_host: int = 0,
+    keepalive_timeout: float = 30,
+    http2: Optional[bool] = None,
+    http2_connections: int = 4,
+    http2_prior_knowledge: bool = False,
+    warm_connections: Optional[int] = None,
+) -> aiohttp.TCPConnector:
+    """
+    Open the connection pool of the running event loop (or return the open one)
+
+    Args:
+        limit: Maximum number of connections of the pool, 0 for no limit
+        limit_per_host: Maximum number of connections per upstream host, 0 for no limit
+        keepalive_timeout: Seconds an idle connection is kept open
+        http2: Also open a shared HTTP/2 client used by all sessions of this loop, None for the upstream_http2 setting;
+            ignored with a warning when the ``h2`` package is not installed
+        http2_connections: Maximum number of HTTP/2 connections
+        http2_prior_knowledge: Speak HTTP/2 without negotiation, needed for plain http:// upstreams
+        warm_connections: Connections to the proxy host opened in the background when the pool is created,
+            None for the upstream_warm_connections setting, 0 for none
+
+    Returns:
+        aiohttp.TCPConnector: The pool shared by the sessions of this loop
+    """
+    loop = asyncio.get_running_loop()
+    connector = _pools.get(loop)
+    created = False
+    if connector is None or connector.closed:
+        created = True
+        dns_ttl = _settings["dns_ttl"]
+        connector = aiohttp.TCPConnector(
+            limit=limit, limit_per_host=limit_per_host, keepalive_timeout=keepalive_timeout, use_dns_cache=dns_ttl > 0, ttl_dns_cache=dns_ttl or None
+        )
+        _pools[loop] = connector
+    if _settings["http2"] if http2 is None else http2:
+        if not http2_available():
+            logger.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+        elif loop not in _http2_clients:
+            headers = {"Accept-Encoding": accept_encoding("httpx")}
+            _http2_clients[loop] = create_http2_client(http2_connections, keepalive_timeout, http2_prior_knowledge, headers)
+    warm_connections = _settings["warm_connections"] if warm_connections is None else warm_connections
+    if created and warm_connections > 0 and _settings["warm_url"]:
+        start_warm_up(_settings["warm_url"], warm_connections)
+    return connector
+
+
+def get_pool() -> Optional[aiohttp.TCPConnector]:
+    """
+    Get the connection pool of the running event loop
+
+    Returns:
+        Optional[aiohttp.TCPConnector]: The open pool, None if no pool was opened on this loop (or no loop runs)
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    connector = _pools.get(loop)
+    if connector is None or connector.closed:
+        return None
+    return connector
+
+
+def get_http2_client() -> Optional[Any]:
+    """
+    Get the shared HTTP/2 client of the running event loop
+
+    Returns:
+        Optional[httpx.AsyncClient]: The client, None if the pool of this loop was opened without HTTP/2 (or no loop runs)
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    return _http2_clients.get(loop)
+
+
+async def warm_up(url: Optional[str] = None, connections: Optional[int] = None, timeout: float = 10) -> int:
+    """
+    Resolve the upstream host and open keep-alive connections to it in the pool of the running event loop
+
+    Warm-up requests are ``HEAD`` requests to ``url`` outside of any call, so
+    they are not counted in the call metrics; their response status is
+    ignored. Failures are logged and do not raise. Nothing is done without an
+    open pool (connections would not outlive the request) or in replay mode.
+
+    Args:
+        url: Upstream URL, defaults to the configured proxy URL
+        connections: Connections to open, defaults to the upstream_warm_connections setting (at least 1);
+            a single request warms the HTTP/2 client, which multiplexes over one connection
+        timeout: Seconds allowed for each warm-up request
+
+    Returns:
+        int: Number of connections opened
+    """
+    url = url or _settings["warm_url"]
+    connector = get_pool()
+    if not url or connector is None or fixtures.mode == fixtures.REPLAY:
+        return 0
+    connections = max(1, _settings["warm_connections"] if connections is None else connections)
+    if connector.limit:
+        connections = min(connections, connector.limit)
+    started = time.perf_counter()
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(trust_env=True, connector=connector, connector_owner=False, timeout=client_timeout) as session:
+
+        async def open_connection() -> bool:
+            try:
+                async with session.head(url, allow_redirects=False) as response:
+                    await response.read()
+                return True
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Warm-up request to {url} failed: {e!r}")
+                return False
+
+        # 并发请求才能建立多个连接，顺序请求会复用同一个连接
+        opened = sum(await asyncio.gather(*(open_connection() for _ in range(connections))))
+    http2_client = get_http2_client()
+    if http2_client is not None:
+        try:
+            await http2_client.head(url, timeout=timeout)
+        except httpx.HTTPError as e:
+            logger.warning(f"HTTP/2 warm-up request to {url} failed: {e!r}")
+    logger.info(f"Warmed up {opened}/{connections} connections to {url} in {(time.perf_counter() - started) * 1000:.1f}ms")
+    return opened
+
+
+def start_warm_up(url: Optional[str] = None, connections: Optional[int] = None) -> asyncio.Task:
+    """
+    Run ``warm_up`` in the background on the running event loop
+
+    Args:
+        url: Upstream URL, defaults to the configured proxy URL
+        connections: Connections to open, defaults to the upstream_warm_connections setting
+
+    Returns:
+        asyncio.Task: Task of the warm-up, cancelled by ``close_pool`` if still running
+    """
+    task = asyncio.get_running_loop().create_task(warm_up(url, connections))
+    _warm_tasks[asyncio.get_running_loop()] = task
+    return task
+
+
+async def close_pool() -> None:
+    """Close the connection pool (and the HTTP/2 client) of the running event loop, if any"""
+    loop = asyncio.get_running_loop()
+    task = _warm_tasks.pop(loop, None)
+    if task is not None and not task.done():
+        task.cancel()
+    connector = _pools.pop(loop, None)
+    if connector is not None:
+        await connector.close()
+    client = _http2_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def session_kwargs() -> Dict[str, Any]:
+    """
+    Get the ``aiohttp.ClientSession`` arguments that attach a session to the pool of the running loop
+
+    Returns:
+        Dict[str, Any]: {"connector": ..., "connector_owner": False}, or {} when the loop has no pool
+    """
+    connector = get_pool()
+    if connector is None:
+        return {}
+    # 会话关闭时不关闭共享连接池
+    return {"connector": connector, "connector_owner": False}
+
+
+def configure(
+    compression: Optional[bool] = None,
+    http2: Optional[bool] = None,
+    dns_ttl: Optional[float] = None,
+    warm_url: Optional[str] = None,
+    warm_connections: Optional[int] = None,
+) -> None:
+    """
+    Configure the upstream transport
+
+    Args:
+        compression: Whether to ask upstreams for compressed responses
+        http2: Whether pools opened by ``open_pool`` use HTTP/2 by default
+        dns_ttl: Seconds pools cache resolved upstream addresses, 0 disables the cache
+        warm_url: Upstream URL warmed up by ``warm_up``, usually the proxy URL
+        warm_connections: Connections opened in the background when a pool is created, 0 for none
+    """
+    if compression is not None:
+        _settings["compression"] = compression
+    if http2 is not None:
+        _settings["http2"] = http2
+    if dns_ttl is not None:
+        _settings["dns_ttl"] = max(0, dns_ttl)
+    if warm_url is not None:
+        _settings["warm_url"] = warm_url
+    if warm_connections is not None:
+        _settings["warm_connections"] = max(0, warm_connections)
+
+
+def configure_from(config: Dict[str, Any]) -> None:
+    """
+    Configure the upstream transport from the data source config dict
+
+    Args:
+        config: Config with the optional keys upstream_compression, upstream_http2, upstream_dns_ttl,
+            upstream_warm_connections and external_api_proxy_url (the warm-up URL)
+    """
+    configure(
+        compression=config.get("upstream_compression"),
+        http2=config.get("upstream_http2"),
+        dns_ttl=config.get("upstream_dns_ttl"),
+        warm_url=config.get("external_api_proxy_url"),
+        warm_connections=config.get("upstream_warm_connections"),
+    )
+
+
+def _has_module(*names: str) -> bool:
+    return any(importlib.util.find_spec(name) is not None for name in names)
+
+
+def supported_encodings(client: str = "aiohttp") -> List[str]:
+    """
+    Get the response encodings a HTTP client can decode in this installation
+
+    Args:
+        client: "aiohttp" or "httpx"
+
+    Returns:
+        List[str]: Encodings in order of preference, e.g. ["br", "gzip", "deflate"]
+    """
+    if client == "aiohttp":
+        available = {"gzip", "deflate"}
+        if compression_utils.HAS_BROTLI:
+            available.add("br")
+        if getattr(compression_utils, "HAS_ZSTD", False):
+            available.add("zstd")
+    elif client == "httpx":
+        available = {"gzip", "deflate"}
+        if _has_module("brotli", "brotlicffi"):
+            available.add("br")
+        if _has_module("zstandard"):
+            available.add("zstd")
+    else:
+        raise ValueError(f"Unknown HTTP client {client!r}, expected aiohttp or httpx")
+    return [encoding for encoding in ENCODING_PREFERENCE if encoding in available]
+
+
+def accept_encoding(client: str = "aiohttp") -> str:
+    """
+    Get the Accept-Encoding header value for upstream requests
+
+    Args:
+        client: "aiohttp" or "httpx"
+
+    Returns:
+        str: e.g. "br, gzip;q=0.9, deflate;q=0.8", "identity" when compression is disabled
+    """
+    if not _settings["compression"]:
+        return "identity"
+    encodings = supported_encodings(client)
+    return ", ".join(encoding if index == 0 else f"{encoding};q={1 - index / 10:g}" for index, encoding in enumerate(encodings))
@@ -2,16 +2,24 @@
 TripAdvisor Officical API data source implementation
 """
 
+import asyncio
 import logging
-from datetime import datetime
+from contextvars import ContextVar
 from typing import Any, Dict, List, Optional
 
 import httpx
 
+from . import errors, timeconv
 from .base import BaseAPI
+from .projection import FieldSelector
 
 logger = logging.getLogger("tripadvisor_official_source")
 
+# 组合请求期间共享的连接池客户端，未设置时每次请求单独创建
+_shared_client: ContextVar[Optional[httpx.AsyncClient]] = ContextVar("tripadvisor_shared_client", default=None)
+
+BUNDLE_PARTS = ("details", "reviews", "photos")
+
 
 class TripAdvisorSource(BaseAPI):
     """TripAdvisor official API data source"""
@@ -34,10 +42,8 @@ class TripAdvisorSource(BaseAPI):
         if params is None:
             params = {}
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            return response.json()
+        # 组合请求期间复用共享客户端，否则由管道单独创建
+        return await self._request("GET", url, params=params, headers=self.headers, use_httpx=True, client=_shared_client.get())
 
     @property
     def source_name(self) -> str:
@@ -58,6 +64,7 @@ class TripAdvisorSource(BaseAPI):
         phone: Optional[str] = None,
         address: Optional[str] = None,
         latLong: Optional[str] = None,
+        fields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Search for locations (hotels, restaurants, attractions) on Tripadvisor
@@ -69,6 +76,7 @@ class TripAdvisorSource(BaseAPI):
             phone(str): Optional phone number to search for
             address(str): Optional address to search for
             latLong(str): Optional latitude,longitude coordinates (e.g., '42.3455,-71.0983')
+            fields(List[str]): Optional list of fields to return for each location (e.g., ['location_id', 'name'])
 
         Returns:
             Dict[str, Any]: Dictionary containing location info, e.g.
@@ -111,9 +119,9 @@ class TripAdvisorSource(BaseAPI):
                 return {"success": False, "error": "No data returned from Tripadvisor API"}
             if not data.get("data", None):
                 return {"success": False, "error": "No data returned from Tripadvisor API"}
-            return {"success": True, "data": data.get("data", [])}
+            return {"success": True, "data": FieldSelector(fields).apply(data.get("data", []))}
         except Exception as e:
-            logger.error(f"Error searching locations: {e}")
+            errors.log_failure(logger, f"Error searching locations: {e}", e)
             return {"success": False, "error": str(e)}
 
     async def search_nearby_locations(
@@ -122,6 +130,7 @@ class TripAdvisorSource(BaseAPI):
         longitude: float,
         language: str = "en",
         category: Optional[str] = None,
+        fields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Search for locations near a specific latitude/longitude.
@@ -131,6 +140,7 @@ class TripAdvisorSource(BaseAPI):
             longitude(float): Longitude coordinate
             language(str): Language code (default: 'en')
             category(str): Optional category filter ('hotels', 'attractions', 'restaurants')
+            fields(List[str]): Optional list of fields to return for each location (e.g., ['location_id', 'name'])
 
         Returns:
             Dict[str, Any]: Dictionary containing the search results
@@ -169,16 +179,17 @@ class TripAdvisorSource(BaseAPI):
             if not data.get("data", None):
                 return {"success": False, "error": "No data returned from Tripadvisor API"}
 
-            return {"success": True, "data": data.get("data", [])}
+            return {"success": True, "data": FieldSelector(fields).apply(data.get("data", []))}
 
         except Exception as e:
-            logger.error(f"Error searching nearby locations: {e}")
+            errors.log_failure(logger, f"Error searching nearby locations: {e}", e)
             return {"success": False, "error": str(e)}
 
     async def get_location_details(
         self,
         locationId: int,
         language: str = "en",
+        fields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Get detailed information about a specific location (hotel, restaurant, or attraction).
@@ -186,6 +197,7 @@ class TripAdvisorSource(BaseAPI):
         Args:
             locationId(int): Tripadvisor location ID (can be string or integer)
             language(str): Language code (default: 'en')
+            fields(List[str]): Optional list of fields to return, dotted paths allowed (e.g., ['name', 'rating', 'ranking_data.ranking'])
 
         Returns:
             Dict[str, Any]: Dictionary containing detailed location info, e.g.
@@ -279,15 +291,16 @@ class TripAdvisorSource(BaseAPI):
             if not data:
                 return {"success": False, "error": "No data returned from Tripadvisor API"}
 
-            return {"success": True, "data": self._parse_location_details(data)}
+            return {"success": True, "data": self._parse_location_details(data, FieldSelector(fields))}
         except Exception as e:
-            logger.error(f"Error getting location details: {e}")
+            errors.log_failure(logger, f"Error getting location details: {e}", e)
             return {"success": False, "error": str(e)}
 
     async def get_location_reviews(
         self,
         locationId: int,
         language: str = "en",
+        fields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Get the most recent reviews for a specific location.
@@ -295,6 +308,7 @@ class TripAdvisorSource(BaseAPI):
         Args:
             locationId(int): Tripadvisor location ID (can be string or integer)
             language(str): Language code (default: 'en')
+            fields(List[str]): Optional list of fields to return for each review (e.g., ['rating', 'text'])
 
         Returns:
             Dict[str, Any]: Dictionary containing review info, e.g.
@@ -351,16 +365,17 @@ class TripAdvisorSource(BaseAPI):
                 return {"success": False, "error": "No data returned from Tripadvisor API"}
 
             # 解析数据
-            reviews = self._parse_reviews(data)
+            reviews = self._parse_reviews(data, FieldSelector(fields))
             return {"success": True, "data": reviews}
         except Exception as e:
-            logger.error(f"Error getting location reviews: {e}")
+            errors.log_failure(logger, f"Error getting location reviews: {e}", e)
             return {"success": False, "error": str(e)}
 
     async def get_location_photos(
         self,
         locationId: int,
         language: str = "en",
+        fields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Get high-quality photos for a specific location.
@@ -368,6 +383,7 @@ class TripAdvisorSource(BaseAPI):
         Args:
             locationId(int): Tripadvisor location ID (can be string or integer)
             language(str): Language code (default: 'en')
+            fields(List[str]): Optional list of fields to return for each photo (e.g., ['images', 'caption'])
 
         Returns:
             Dict[str, Any]: Dictionary containing photo info, e.g.
@@ -405,17 +421,140 @@ class TripAdvisorSource(BaseAPI):
             if not data:
                 return {"success": False, "error": "No data returned from Tripadvisor API"}
 
-            return {"success": True, "data": self._parse_photos(data)}
+            return {"success": True, "data": self._parse_photos(data, FieldSelector(fields))}
         except Exception as e:
-            logger.error(f"Error getting location photos: {e}")
+            errors.log_failure(logger, f"Error getting location photos: {e}", e)
             return {"success": False, "error": str(e)}
 
-    def _parse_reviews(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def get_location_bundle(
+        self,
+        locationId: int,
+        parts: Optional[List[str]] = None,
+        language: str = "en",
+    ) -> Dict[str, Any]:
+        """
+        Get details, reviews and photos of a location in one call. The sub-requests are sent concurrently over a shared connection pool.
+
+        Args:
+            locationId(int): Tripadvisor location ID (can be string or integer)
+            parts(List[str]): Parts to fetch, any of 'details', 'reviews', 'photos' (default: all)
+            language(str): Language code (default: 'en')
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the merged result, e.g.
+            {
+                "success": True,               # Whether at least one part was fetched
+                "data": {
+                    "location_id": "13189438", # Location ID
+                    "details": {...},          # Same as get_location_details data, None if failed or not requested
+                    "reviews": [...],          # Same as get_location_reviews data, None if failed or not requested
+                    "photos": [...],           # Same as get_location_photos data, None if failed or not requested
+                    "errors": {                # Error message of each failed part
+                        "photos": "..."
+                    }
+                }
+            }
+        """
+        parts = list(parts) if parts else list(BUNDLE_PARTS)
+        unknown_parts = [part for part in parts if part not in BUNDLE_PARTS]
+        if unknown_parts:
+            return {"success": False, "error": f"Unknown parts: {unknown_parts}, options: {list(BUNDLE_PARTS)}"}
+
+        if _shared_client.get() is not None:
+            return await self._fetch_location_bundle(locationId, parts, language)
+
+        async with self._http_client() as client:
+            token = _shared_client.set(client)
+            try:
+                return await self._fetch_location_bundle(locationId, parts, language)
+            finally:
+                _shared_client.reset(token)
+
+    async def get_locations_bundle(
+        self,
+        locationIds: List[int],
+        parts: Optional[List[str]] = None,
+        language: str = "en",
+        max_concurrency: int = 5,
+    ) -> Dict[str, Any]:
+        """
+        Get details, reviews and photos of multiple locations, with bounded concurrency over a shared connection pool.
+
+        Args:
+            locationIds(List[int]): Tripadvisor location IDs
+            parts(List[str]): Parts to fetch for each location, any of 'details', 'reviews', 'photos' (default: all)
+            language(str): Language code (default: 'en')
+            max_concurrency(int): Maximum number of locations fetched at the same time (default: 5)
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the bundles in input order, e.g.
+            {
+                "success": True,               # Whether at least one location was fetched
+                "data": {
+                    "count": 2,                # Number of locations fetched
+                    "locations": [...],        # Bundle data of each location, same as get_location_bundle data
+                    "failed_locations": [      # Locations for which every part failed
+                        {"location_id": "123", "error": "..."}
+                    ]
+                }
+            }
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        limits = httpx.Limits(max_connections=max(1, max_concurrency) * len(parts or BUNDLE_PARTS))
+
+        async def fetch(location_id: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.get_location_bundle(location_id, parts=parts, language=language)
+
+        async with self._http_client(limits=limits) as client:
+            token = _shared_client.set(client)
+            try:
+                results = await asyncio.gather(*(fetch(location_id) for location_id in locationIds))
+            finally:
+                _shared_client.reset(token)
+
+        locations = []
+        failed_locations = []
+        for location_id, result in zip(locationIds, results):
+            if result["success"]:
+                locations.append(result["data"])
+            else:
+                failed_locations.append({"location_id": str(location_id), "error": result["error"]})
+
+        if locationIds and not locations:
+            error_msg = "All location bundle retrieval failed:\n" + "\n".join(f"{item['location_id']}: {item['error']}" for item in failed_locations)
+            return {"success": False, "error": error_msg}
+
+        return {"success": True, "data": {"count": len(locations), "locations": locations, "failed_locations": failed_locations}}
+
+    async def _fetch_location_bundle(self, locationId: int, parts: List[str], language: str) -> Dict[str, Any]:
+        """并发获取地点的各个部分并合并结果"""
+        fetchers = {
+            "details": self.get_location_details,
+            "reviews": self.get_location_reviews,
+            "photos": self.get_location_photos,
+        }
+        results = await asyncio.gather(*(fetchers[part](locationId, language=language) for part in parts))
+
+        bundle: Dict[str, Any] = {"location_id": str(locationId), "details": None, "reviews": None, "photos": None, "errors": {}}
+        for part, result in zip(parts, results):
+            if result["success"]:
+                bundle[part] = result["data"]
+            else:
+                bundle["errors"][part] = result["error"]
+
+        if len(bundle["errors"]) == len(parts):
+            return {"success": False, "error": "; ".join(f"{part}: {error}" for part, error in bundle["errors"].items())}
+        return {"success": True, "data": bundle}
+
+    def _parse_reviews(self, data: Dict[str, Any], selector: Optional[FieldSelector] = None) -> List[Dict[str, Any]]:
         """Parse location review data"""
+        if selector is None:
+            selector = FieldSelector()
         reviews = []
         for review_data in data["data"]:
             subratings = {}
-            for key, value in review_data.get("subratings", {}).items():
+            for key, value in review_data.get("subratings", {}).items() if selector.wants("subratings") else ():
                 subratings[key] = {
                     "name": value.get("name", ""),  # 评分类型
                     "value": value.get("value", ""),  # 评分值
@@ -449,14 +588,17 @@ class TripAdvisorSource(BaseAPI):
                     "published_date": self._parse_date(review_data.get("owner_response", {}).get("published_date", "")),  # 回复发布时间
                 },
             }
-            reviews.append(review)
+            reviews.append(selector.apply(review))
 
         return reviews
 
-    def _parse_location_details(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    def _parse_location_details(self, data: Dict[str, Any], selector: Optional[FieldSelector] = None) -> Dict[str, Any]:
         """Parse location detail data"""
+        if selector is None:
+            selector = FieldSelector()
+
         ancestors = []
-        for ancestor in data.get("ancestors", []):
+        for ancestor in data.get("ancestors", []) if selector.wants("ancestors") else ():
             ancestors.append(
                 {
                     "level": ancestor.get("level", ""),  # 级别
@@ -466,7 +608,7 @@ class TripAdvisorSource(BaseAPI):
             )
 
         subratings = {}
-        for key, value in data.get("subratings", {}).items():
+        for key, value in data.get("subratings", {}).items() if selector.wants("subratings") else ():
             subratings[key] = {
                 "name": value.get("name", ""),  # 评分类型
                 "localized_name": value.get("localized_name", ""),  # 评分类别名称
@@ -474,7 +616,7 @@ class TripAdvisorSource(BaseAPI):
             }
 
         trip_types = []
-        for trip_type in data.get("trip_types", []):
+        for trip_type in data.get("trip_types", []) if selector.wants("trip_types") else ():
             trip_types.append(
                 {
                     "name": trip_type.get("name", ""),  # 旅行类型
@@ -484,7 +626,7 @@ class TripAdvisorSource(BaseAPI):
             )
 
         subcategory = []
-        for subcat in data.get("subcategory", []):
+        for subcat in data.get("subcategory", []) if selector.wants("subcategory") else ():
             subcategory.append(
                 {
                     "name": subcat.get("name", ""),  # 子类别名称
@@ -536,10 +678,12 @@ class TripAdvisorSource(BaseAPI):
             "awards": data.get("awards", []),  # 奖项数据
         }
 
-        return location_details
+        return selector.apply(location_details)
 
-    def _parse_photos(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _parse_photos(self, data: Dict[str, Any], selector: Optional[FieldSelector] = None) -> List[Dict[str, Any]]:
         """解析地点照片数据"""
+        if selector is None:
+            selector = FieldSelector()
         photos = []
         for photo_data in data.get("data", []):
             photo = {
@@ -552,7 +696,7 @@ class TripAdvisorSource(BaseAPI):
                 "source": photo_data.get("source", {}),  # 照片来源
                 "user": photo_data.get("user", {}),  # 照片上传者
             }
-            photos.append(photo)
+            photos.append(selector.apply(photo))
 
         return photos
 
@@ -560,7 +704,7 @@ class TripAdvisorSource(BaseAPI):
         """解析日期字符串"""
         # 新 API 日期格式：2025-04-24T22:29:34Z
         try:
-            return datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%SZ").strftime("%Y-%m-%d %H:%M:%S")
+            return timeconv.to_datetime_string(date_str, timeconv.ISO_Z)
         except ValueError:
             return date_str
 
@@ -568,7 +712,7 @@ class TripAdvisorSource(BaseAPI):
         """解析日期字符串"""
         # 新 API 日期格式：2021-02-26T00:50:50.206Z
         try:
-            return datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%Y-%m-%d %H:%M:%S")
+            return timeconv.to_datetime_string(date_str, timeconv.ISO_MS_Z)
         except ValueError:
             return date_str
 
@@ -589,6 +733,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    import asyncio
-
     asyncio.run(main())
@@ -3,17 +3,39 @@ Twitter data source implementation
 """
 
 import asyncio
+import hashlib
 import json
 import logging
-from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 import aiohttp
 
+from . import errors, payload_log, pipeline, timeconv
 from .base import BaseAPI
+from .cache import TTLCache
+from .executor import run_parse
+from .models import TimelineTweet, Tweet, TweetAuthor, TweetMetrics, TwitterUser, TwitterUserMetrics, build
+from .projection import FieldSelector
 
 logger = logging.getLogger("twitter_source")
 
+# 增量获取的最新推文 ID 键中不包含的分页参数
+_PAGING_PARAMS = ("limit", "continuation_token", "section", "include_pinned")
+
+# 不做投影的字段选择器，用于引用推文
+_ALL_FIELDS = FieldSelector()
+
+
+def _tweet_id(result: Dict[str, Any]) -> Optional[int]:
+    """推文 ID 转为整数以便比较新旧，无法解析时返回 None"""
+    tweet_id = result.get("tweet_id")
+    if tweet_id is None:
+        return None
+    try:
+        return int(tweet_id)
+    except (TypeError, ValueError):
+        return None
+
 
 class TwitterSource(BaseAPI):
     """Twitter data source"""
@@ -27,6 +49,14 @@ class TwitterSource(BaseAPI):
             "X-Biz-Id":"matrix-agent",
             "X-Request-Timeout": str(config["timeout"]-5),
             }
+        # 增量获取时每个查询/用户已见过的最新推文 ID，配置 path 后持久化到本地文件
+        self._since_ids = TTLCache(
+            ttl=config.get("twitter_since_id_ttl", 30 * 24 * 3600),
+            max_entries=10000,
+            path=config.get("twitter_since_id_path"),
+            name="twitter_since_ids",
+        )
+        self._since_max_pages = config.get("twitter_since_max_pages", 10)
 
     @property
     def source_name(self) -> str:
@@ -50,6 +80,9 @@ class TwitterSource(BaseAPI):
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         cursor: Optional[str] = None,
+        compact: bool = False,
+        fields: Optional[List[str]] = None,
+        since_last_seen: bool = False,
     ) -> Dict[str, Any]:
         """
         Search for tweets.
@@ -64,6 +97,9 @@ class TwitterSource(BaseAPI):
             start_date (Optional[str]): Start date, format: YYYY-MM-DD, default is None
             end_date (Optional[str]): End date, format: YYYY-MM-DD, default is None
             cursor (Optional[str]): Pagination cursor, used to get next page results, default is None for first page
+            compact (bool): Return tweets as memory-compact records (dict-like, convert with `.to_dict()`), default is False
+            fields (Optional[List[str]]): Only return these fields of each tweet, e.g. ["id", "text", "public_metrics.like_count"], default is None (all fields)
+            since_last_seen (bool): Incremental mode for polling, default is False. Searches the latest tweets (instead of top tweets), pages until tweets already returned by a previous incremental call of the same search are reached and returns only newer ones; cursor is ignored. When there are more than limit new tweets, the oldest limit are returned and the rest by the next call (the first call returns the newest limit); "truncated" is then true, as it is when older new tweets were not reached within twitter_since_max_pages pages. The newest returned tweet ID is remembered per search, additionally returned as "since_id" (previous) and "newest_id"
 
         Returns:
             Dict[str, Any]: Dictionary containing tweet search results, e.g.
@@ -140,85 +176,44 @@ class TwitterSource(BaseAPI):
                 params["start_date"] = start_date
             if end_date:
                 params["end_date"] = end_date
-            if cursor:
-                params["continuation_token"] = cursor
 
             request_url = f"{self.proxy_url}/search/search"
-
-            # 使用aiohttp发送异步请求
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # 解析响应
-                    data = await response.json(content_type=None)
-
-            # API返回的是JSON字符串，需要先解析
-            if isinstance(data, str):
-                data = json.loads(data)
-
-            if not isinstance(data, dict):
-                raise ValueError(f"Invalid API response format: {data}")
-
-            if "results" not in data:
-                raise ValueError(f"Missing results field in API response: {data}")
-
-            tweets = []
-            for result in data["results"]:
-                if not isinstance(result, dict):
-                    logger.warning(f"Skipping invalid tweet data: {result}")
-                    continue
-
-                tweet = {
-                    "id": str(result.get("tweet_id")),
-                    "created_at": self._format_date(result.get("creation_date")),
-                    "text": result.get("text", ""),
-                    "media_urls": result.get("media_urls", []) if isinstance(result.get("media_urls"), list) else [],
-                    "video_urls": result.get("video_urls", []) if isinstance(result.get("video_urls"), list) else [],
-                    "author": {
-                        "id": str(result.get("user", {}).get("user_id")),
-                        "name": result.get("user", {}).get("name"),
-                        "username": result.get("user", {}).get("username"),
-                        "followers_count": result.get("user", {}).get("follower_count", 0),
-                        "is_verified": result.get("user", {}).get("is_verified", False),
-                        "is_blue_verified": result.get("user", {}).get("is_blue_verified", False),
-                    },
-                    "public_metrics": {
-                        "retweet_count": result.get("retweet_count", 0),
-                        "reply_count": result.get("reply_count", 0),
-                        "like_count": result.get("favorite_count", 0),
-                        "quote_count": result.get("quote_count", 0),
-                        "view_count": result.get("views", 0),
-                        "bookmark_count": result.get("bookmark_count", 0),
-                    },
-                }
-                tweets.append(tweet)
-
-            return {
-                "success": True,
-                "data": {"query": query, "count": len(tweets), "tweets": tweets, "cursor": data.get("continuation_token")},
-            }
-
-        except asyncio.TimeoutError:
+            selector = FieldSelector(fields)
+
+            if since_last_seen:
+                # 按时间排序才能在遇到已见过的推文时停止翻页
+                params["section"] = "latest"
+                return await self._fetch_since_last_seen(
+                    self._since_key("search", params),
+                    limit,
+                    lambda page_cursor, since_id: self._fetch_page(
+                        request_url, params, page_cursor, self._parse_search_payload, query, compact, selector, since_id
+                    ),
+                )
+
+            return await self._fetch_page(request_url, params, cursor, self._parse_search_payload, query, compact, selector)
+
+        except asyncio.TimeoutError as e:
             error_msg = f"Request timeout (timeout={self._timeout}s)"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except aiohttp.ClientError as e:
             error_msg = f"HTTP request error: {str(e)}"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except Exception as e:
             error_msg = f"Error occurred while searching tweets: {str(e)}"
-            logger.error(error_msg)
-            logger.exception(e)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
 
-    async def get_user_info(self, username: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+    async def get_user_info(self, username: str, user_id: Optional[str] = None, fields: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Get detailed information about a Twitter user.
 
         Args:
             username (str): Twitter username without @ symbol
             user_id (Optional[str]): Twitter user ID, default is None, if provided user_id, username will be ignored
+            fields (Optional[List[str]]): Only return these fields, e.g. ["name", "public_metrics.followers_count"], default is None (all fields)
 
         Returns:
             Dict[str, Any]: Dictionary containing user information, e.g.
@@ -270,39 +265,38 @@ class TwitterSource(BaseAPI):
             if user_id:
                 params["user_id"] = user_id
 
-            # 使用aiohttp发送异步请求
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # 解析响应
-                    data = await response.json(content_type=None)
-
-            # 解析响应数据
-            if isinstance(data, str):
-                data = json.loads(data)
+            # 通过请求管道发送请求
+            data = await self._request("GET", request_url, params=params, headers=self.headers, timeout=self._timeout, decode=pipeline.DECODE_LENIENT_JSON)
 
             if not isinstance(data, dict):
-                raise ValueError(f"Invalid API response format: {data}")
+                raise ValueError(f"Invalid API response format: {payload_log.preview(data)}")
 
             # 构建返回数据
-            return {"success": True, "data": self._parse_user_info(data)}
+            return {"success": True, "data": FieldSelector(fields).apply(self._parse_user_info(data))}
 
-        except asyncio.TimeoutError:
+        except asyncio.TimeoutError as e:
             error_msg = f"Request timeout (timeout={self._timeout}s)"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except aiohttp.ClientError as e:
             error_msg = f"HTTP request error: {str(e)}"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except Exception as e:
             error_msg = f"Error occurred while getting user info: {str(e)}"
-            logger.error(error_msg)
-            logger.exception(e)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
 
     async def get_user_tweets(
-        self, username: str, limit: int = 10, user_id: Optional[str] = None, include_replies: bool = False, include_pinned: bool = False
+        self,
+        username: str,
+        limit: int = 10,
+        user_id: Optional[str] = None,
+        include_replies: bool = False,
+        include_pinned: bool = False,
+        compact: bool = False,
+        fields: Optional[List[str]] = None,
+        since_last_seen: bool = False,
     ) -> Dict[str, Any]:
         """
         Get a list of tweets from a Twitter user.
@@ -313,6 +307,9 @@ class TwitterSource(BaseAPI):
             user_id (Optional[str]): Twitter user ID, default is None, if provided user_id, username will be ignored
             include_replies (bool): Whether to include reply tweets, default is False
             include_pinned (bool): Whether to include pinned tweets, default is False
+            compact (bool): Return tweets as memory-compact records (dict-like, convert with `.to_dict()`), default is False
+            fields (Optional[List[str]]): Only return these fields of each tweet, e.g. ["id", "text", "created_at"], default is None (all fields)
+            since_last_seen (bool): Incremental mode for polling, default is False. Pages until tweets already returned by a previous incremental call for the same user are reached and returns only newer ones; pinned tweets are not included. When there are more than limit new tweets, the oldest limit are returned and the rest by the next call (the first call returns the newest limit); "truncated" is then true, as it is when older new tweets were not reached within twitter_since_max_pages pages. The newest returned tweet ID is remembered per user, additionally returned as "since_id" (previous) and "newest_id"
 
         Returns:
             Dict[str, Any]: Dictionary containing user tweet list, e.g.
@@ -381,139 +378,339 @@ class TwitterSource(BaseAPI):
             if user_id:
                 params["user_id"] = user_id
 
-            # 使用aiohttp发送异步请求
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # 解析响应
-                    data = await response.json(content_type=None)
-
-            # 解析响应数据
-            if isinstance(data, str):
-                data = json.loads(data)
-
-            if not isinstance(data, dict):
-                raise ValueError(f"Invalid API response format: {data}")
-
-            if "results" not in data:
-                raise ValueError(f"Missing results field in API response: {data}")
-
-            tweets = []
-            for result in data["results"]:
-                tweet = self._parse_tweet_with_ref(result)
+            selector = FieldSelector(fields)
 
-                tweets.append(tweet)
+            if since_last_seen:
+                # 置顶推文通常较旧，会提前终止翻页
+                params["include_pinned"] = "false"
+                return await self._fetch_since_last_seen(
+                    self._since_key("user", params),
+                    limit,
+                    lambda page_cursor, since_id: self._fetch_page(
+                        request_url, params, page_cursor, self._parse_timeline_payload, username, compact, selector, since_id
+                    ),
+                )
 
-            return {
-                "success": True,
-                "data": {"username": username, "count": len(tweets), "tweets": tweets, "cursor": data.get("continuation_token")},
-            }
+            return await self._fetch_page(request_url, params, None, self._parse_timeline_payload, username, compact, selector)
 
-        except asyncio.TimeoutError:
+        except asyncio.TimeoutError as e:
             error_msg = f"Request timeout (timeout={self._timeout}s)"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except aiohttp.ClientError as e:
             error_msg = f"HTTP request error: {str(e)}"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except Exception as e:
             error_msg = f"Error occurred while getting user tweets: {str(e)}"
-            logger.error(error_msg)
-            logger.exception(e)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
 
-    def _format_date(self, date_str: Optional[str]) -> Optional[str]:
+    async def _fetch_page(
+        self,
+        request_url: str,
+        params: Dict[str, Any],
+        cursor: Optional[str],
+        parse: Callable[..., Dict[str, Any]],
+        name: str,
+        compact: bool,
+        selector: FieldSelector,
+        since_id: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """请求并解析一页推文，100 条推文的大页面在解析线程池/进程池中解析"""
+        if cursor:
+            params = {**params, "continuation_token": cursor}
+
+        # 通过请求管道发送请求
+        body = await self._request("GET", request_url, params=params, headers=self.headers, timeout=self._timeout, decode=pipeline.DECODE_BYTES)
+        return await run_parse(parse, body, name, compact, selector, since_id, size=len(body))
+
+    @staticmethod
+    def _since_key(kind: str, params: Dict[str, Any]) -> str:
+        """增量获取的存储键：查询/用户及筛选条件（不含分页参数）的摘要，TTLCache 的键归一化不会合并不同的查询"""
+        raw = json.dumps([kind, {key: value for key, value in params.items() if key not in _PAGING_PARAMS}], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    async def _fetch_since_last_seen(
+        self, key: str, limit: int, fetch_page: Callable[[Optional[str], int], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        增量获取：从最新的推文开始翻页，直到遇到 ID 不大于上次记录的推文、没有下一页或达到 twitter_since_max_pages
+        新推文超过 limit 条时只返回其中最旧的 limit 条，记录的推文 ID 只推进到已返回的推文，其余留给下次获取；
+        首次获取（没有记录）时返回最新的 limit 条
+        """
+        stored = self._since_ids.get(key)
+        since_id = int(stored) if stored else 0
+        # (推文 ID, 推文)，按从新到旧排列
+        new_tweets: List[Tuple[int, Any]] = []
+        seen_ids = set()
+        cursor = None
+        reached_seen = False
+        data: Dict[str, Any] = {}
+        for _ in range(max(1, self._since_max_pages)):
+            result = await fetch_page(cursor, since_id)
+            if not result["success"]:
+                return result
+            data = result["data"]
+            added = 0
+            for tweet_id, tweet in zip(data.pop("tweet_ids"), data["tweets"]):
+                if tweet_id in seen_ids:
+                    continue
+                seen_ids.add(tweet_id)
+                new_tweets.append((tweet_id, tweet))
+                added += 1
+            reached_seen = data.pop("reached_seen")
+            cursor = data.get("cursor")
+            # 首次获取没有未返回的推文需要补齐，取到 limit 条即可
+            if reached_seen or not cursor or not added or (not since_id and len(new_tweets) >= limit):
+                break
+
+        truncated = False
+        if not since_id:
+            new_tweets = new_tweets[:limit]
+        else:
+            # 翻页上限内没有遇到已见过的推文，更旧的新推文未能获取
+            truncated = not reached_seen and bool(cursor)
+            if len(new_tweets) > limit:
+                new_tweets = new_tweets[len(new_tweets) - limit :]
+                truncated = True
+
+        newest_id = max((tweet_id for tweet_id, _ in new_tweets), default=since_id)
+        if newest_id > since_id:
+            # 并发轮询时只向前推进
+            current = self._since_ids.get(key)
+            if not current or int(current) < newest_id:
+                self._since_ids.set(key, str(newest_id))
+
+        tweets = [tweet for _, tweet in new_tweets]
+        data.pop("tweet_ids", None)
+        data.pop("reached_seen", None)
+        data.update(
+            count=len(tweets),
+            tweets=tweets,
+            cursor=None,
+            since_id=str(since_id) if since_id else None,
+            newest_id=str(newest_id) if newest_id else None,
+            truncated=truncated,
+        )
+        return {"success": True, "data": data}
+
+    @staticmethod
+    def _parse_search_payload(body: bytes, query: str, compact: bool, selector: FieldSelector, since_id: Optional[int] = None) -> Dict[str, Any]:
+        """解码并解析搜索响应，需可序列化以便在解析进程池中执行"""
+        data = json.loads(body)
+
+        # API返回的是JSON字符串，需要先解析
+        if isinstance(data, str):
+            data = json.loads(data)
+
+        if not isinstance(data, dict):
+            raise ValueError(f"Invalid API response format: {payload_log.preview(data)}")
+
+        if "results" not in data:
+            raise ValueError(f"Missing results field in API response: {payload_log.preview(data)}")
+
+        tweets = []
+        # 增量获取时跳过不晚于 since_id 的推文，不解析
+        tweet_ids: List[int] = []
+        reached_seen = False
+        for result in data["results"]:
+            if not isinstance(result, dict):
+                logger.warning(f"Skipping invalid tweet data: {payload_log.preview(result)}")
+                continue
+
+            if since_id is not None:
+                tweet_id = _tweet_id(result)
+                if tweet_id is None or tweet_id <= since_id:
+                    reached_seen = reached_seen or tweet_id is not None
+                    continue
+                tweet_ids.append(tweet_id)
+
+            tweets.append(TwitterSource._parse_search_tweet(result, selector, compact))
+
+        output = {"query": query, "count": len(tweets), "tweets": tweets, "cursor": data.get("continuation_token")}
+        if since_id is not None:
+            output.update(tweet_ids=tweet_ids, reached_seen=reached_seen)
+        return {"success": True, "data": output}
+
+    @staticmethod
+    def _parse_timeline_payload(body: bytes, username: str, compact: bool, selector: FieldSelector, since_id: Optional[int] = None) -> Dict[str, Any]:
+        """解码并解析用户推文响应，需可序列化以便在解析进程池中执行"""
+        data = json.loads(body)
+
+        # API返回的是JSON字符串，需要先解析
+        if isinstance(data, str):
+            data = json.loads(data)
+
+        if not isinstance(data, dict):
+            raise ValueError(f"Invalid API response format: {payload_log.preview(data)}")
+
+        if "results" not in data:
+            raise ValueError(f"Missing results field in API response: {payload_log.preview(data)}")
+
+        tweets = []
+        # 增量获取时跳过不晚于 since_id 的推文，不解析
+        tweet_ids: List[int] = []
+        reached_seen = False
+        for result in data["results"]:
+            if since_id is not None:
+                tweet_id = _tweet_id(result)
+                if tweet_id is None or tweet_id <= since_id:
+                    reached_seen = reached_seen or tweet_id is not None
+                    continue
+                tweet_ids.append(tweet_id)
+
+            tweets.append(TwitterSource._parse_timeline_tweet(result, selector, compact))
+
+        output = {"username": username, "count": len(tweets), "tweets": tweets, "cursor": data.get("continuation_token")}
+        if since_id is not None:
+            output.update(tweet_ids=tweet_ids, reached_seen=reached_seen)
+        return {"success": True, "data": output}
+
+    @staticmethod
+    def _format_date(date_str: Optional[str]) -> Optional[str]:
         """Format date string"""
         if not date_str:
             return None
         try:
             # 新API的日期格式示例: "Thu Mar 13 18:08:35 +0000 2025"
-            dt = datetime.strptime(date_str, "%a %b %d %H:%M:%S %z %Y")
-            return dt.strftime("%Y-%m-%d %H:%M:%S")
+            return timeconv.to_datetime_string(date_str, timeconv.TWITTER)
         except Exception:
             return date_str
 
-    def _parse_user_info(self, data: dict[str, Any]) -> dict[str, Any]:
-        return {
-            "id": str(data.get("user_id")),
-            "username": data.get("username"),
-            "name": data.get("name"),
-            "created_at": self._format_date(data.get("creation_date")),
-            "description": data.get("description"),
-            "location": data.get("location"),
-            "url": data.get("external_url"),
-            "profile_image_url": data.get("profile_pic_url"),
-            "profile_banner_url": data.get("profile_banner_url"),
-            "public_metrics": {
-                "followers_count": data.get("follower_count", 0),
-                "following_count": data.get("following_count", 0),
-                "tweet_count": data.get("number_of_tweets", 0),
-                "listed_count": data.get("listed_count", 0),
-                "like_count": data.get("favourites_count", 0),
-            },
-            "verified": data.get("is_verified", False),
-            "blue_verified": data.get("is_blue_verified", False),
-            "private": data.get("is_private", False),
-            "bot": data.get("bot", False),
-        }
-
-    def _parse_tweet_without_ref(self, result: dict[str, Any]) -> dict[str, Any]:
-        media_urls = []
-        if result.get("media_url"):
-            if isinstance(result["media_url"], list):
-                media_urls.extend(result["media_url"])
-            else:
-                media_urls.append(result["media_url"])
-
-        # 处理视频URL
-        video_urls = []
-        if result.get("video_url"):
-            if isinstance(result["video_url"], list):
-                video_urls.extend(result["video_url"])
-            elif result["video_url"]:
-                video_urls.append(result["video_url"])
-
-        tweet = {
-            "id": str(result.get("tweet_id")),
-            "created_at": self._format_date(result.get("creation_date")),
-            "text": result.get("text", ""),
-            "language": result.get("language"),
-            "media_urls": media_urls,
-            "video_urls": video_urls,
-            "public_metrics": {
-                "retweet_count": result.get("retweet_count", 0),
-                "reply_count": result.get("reply_count", 0),
-                "like_count": result.get("favorite_count", 0),
-                "quote_count": result.get("quote_count", 0),
-                "view_count": result.get("views", 0),
-                "bookmark_count": result.get("bookmark_count", 0),
-            },
-            "user": self._parse_user_info(result.get("user", {})),
-        }
+    @staticmethod
+    def _parse_search_tweet(result: dict[str, Any], selector: FieldSelector, compact: bool) -> Any:
+        """
+        Build a tweet of the search results
 
-        return tweet
+        Args:
+            result: Raw tweet of the API response
+            selector: Requested fields; unrequested sub-structures are not parsed and the dict is projected
+            compact: Return a Tweet record instead of a dict, only used when selector selects everything
 
-    def _parse_tweet_with_ref(self, result: dict[str, Any]) -> dict[str, Any]:
-        """Parse tweet data"""
+        Returns:
+            Any: Tweet record, or the (projected) tweet dict
+        """
+        compact = compact and selector.selects_all
+        media_urls = result.get("media_urls", [])
+        video_urls = result.get("video_urls", [])
+        tweet = build(
+            Tweet,
+            compact,
+            id=str(result.get("tweet_id")),
+            created_at=TwitterSource._format_date(result.get("creation_date")) if selector.wants("created_at") else None,
+            text=result.get("text", ""),
+            media_urls=media_urls if isinstance(media_urls, list) else [],
+            video_urls=video_urls if isinstance(video_urls, list) else [],
+            author=TwitterSource._parse_author(result.get("user", {}), compact) if selector.wants("author") else None,
+            public_metrics=TwitterSource._parse_metrics(result, compact) if selector.wants("public_metrics") else None,
+        )
+        return tweet if selector.selects_all else selector.apply(tweet)
+
+    @staticmethod
+    def _parse_timeline_tweet(result: dict[str, Any], selector: FieldSelector, compact: bool, with_ref: bool = True) -> Any:
+        """
+        Build a tweet of a user timeline
 
-        tweet = self._parse_tweet_without_ref(result)
+        Args:
+            result: Raw tweet of the API response
+            selector: Requested fields; unrequested sub-structures are not parsed and the dict is projected
+            compact: Return a TimelineTweet record instead of a dict, only used when selector selects everything
+            with_ref: Whether to parse the referenced tweet (reply / retweet / quote)
 
+        Returns:
+            Any: TimelineTweet record, or the (projected) tweet dict
+        """
+        compact = compact and selector.selects_all
+        media_urls = result.get("media_url") or []
+        video_urls = result.get("video_url") or []
+        # 引用推文较少出现，始终为 dict 结构
+        referenced_tweets = TwitterSource._parse_referenced_tweets(result) if with_ref and selector.wants("referenced_tweets") else None
+        tweet = build(
+            TimelineTweet,
+            compact,
+            id=str(result.get("tweet_id")),
+            created_at=TwitterSource._format_date(result.get("creation_date")) if selector.wants("created_at") else None,
+            text=result.get("text", ""),
+            language=result.get("language"),
+            media_urls=list(media_urls) if isinstance(media_urls, list) else [media_urls],
+            video_urls=list(video_urls) if isinstance(video_urls, list) else [video_urls],
+            public_metrics=TwitterSource._parse_metrics(result, compact) if selector.wants("public_metrics") else None,
+            user=TwitterSource._parse_user_info(result.get("user", {}), compact) if selector.wants("user") else None,
+            referenced_tweets=referenced_tweets or None,
+        )
+        return tweet if selector.selects_all else selector.apply(tweet)
+
+    @staticmethod
+    def _parse_referenced_tweets(result: dict[str, Any]) -> dict[str, Any]:
+        """Parse referenced tweet (reply / retweet / quote) data"""
         # 处理引用推文
         referenced_tweets: dict[str, Any] = {}
         if result.get("in_reply_to_status_id"):
             referenced_tweets = {"type": "reply", "id": str(result.get("in_reply_to_status_id", ""))}
         elif result.get("retweet_tweet_id") and result.get("retweet_status"):
             retweet = result.get("retweet_status", {})
-            referenced_tweets = {"type": "retweet", **self._parse_tweet_without_ref(retweet)}
+            referenced_tweets = {"type": "retweet", **TwitterSource._parse_timeline_tweet(retweet, _ALL_FIELDS, False, with_ref=False)}
             if retweet.get("quoted_status"):
                 quoted = retweet.get("quoted_status", {})
-                referenced_tweets["quoted_status"] = {"type": "quote", **self._parse_tweet_without_ref(quoted)}
+                referenced_tweets["quoted_status"] = {"type": "quote", **TwitterSource._parse_timeline_tweet(quoted, _ALL_FIELDS, False, with_ref=False)}
         elif result.get("quoted_status_id") and result.get("quoted_status"):
             quoted = result.get("quoted_status", {})
-            referenced_tweets = {"type": "quote", **self._parse_tweet_without_ref(quoted)}
-
-        if referenced_tweets:
-            tweet["referenced_tweets"] = referenced_tweets
-
-        return tweet
+            referenced_tweets = {"type": "quote", **TwitterSource._parse_timeline_tweet(quoted, _ALL_FIELDS, False, with_ref=False)}
+
+        return referenced_tweets
+
+    @staticmethod
+    def _parse_metrics(result: dict[str, Any], compact: bool) -> Any:
+        return build(
+            TweetMetrics,
+            compact,
+            retweet_count=result.get("retweet_count", 0),
+            reply_count=result.get("reply_count", 0),
+            like_count=result.get("favorite_count", 0),
+            quote_count=result.get("quote_count", 0),
+            view_count=result.get("views", 0),
+            bookmark_count=result.get("bookmark_count", 0),
+        )
+
+    @staticmethod
+    def _parse_author(user: dict[str, Any], compact: bool) -> Any:
+        return build(
+            TweetAuthor,
+            compact,
+            id=str(user.get("user_id")),
+            name=user.get("name"),
+            username=user.get("username"),
+            followers_count=user.get("follower_count", 0),
+            is_verified=user.get("is_verified", False),
+            is_blue_verified=user.get("is_blue_verified", False),
+        )
+
+    @staticmethod
+    def _parse_user_info(data: dict[str, Any], compact: bool = False) -> Any:
+        return build(
+            TwitterUser,
+            compact,
+            id=str(data.get("user_id")),
+            username=data.get("username"),
+            name=data.get("name"),
+            created_at=TwitterSource._format_date(data.get("creation_date")),
+            description=data.get("description"),
+            location=data.get("location"),
+            url=data.get("external_url"),
+            profile_image_url=data.get("profile_pic_url"),
+            profile_banner_url=data.get("profile_banner_url"),
+            public_metrics=build(
+                TwitterUserMetrics,
+                compact,
+                followers_count=data.get("follower_count", 0),
+                following_count=data.get("following_count", 0),
+                tweet_count=data.get("number_of_tweets", 0),
+                listed_count=data.get("listed_count", 0),
+                like_count=data.get("favourites_count", 0),
+            ),
+            verified=data.get("is_verified", False),
+            blue_verified=data.get("is_blue_verified", False),
+            private=data.get("is_private", False),
+            bot=data.get("bot", False),
+        )
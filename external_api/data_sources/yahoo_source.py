@@ -3,13 +3,18 @@ Yahoo Finance data source implementation
 """
 
 import asyncio
+import json
 import logging
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 import aiohttp
 
+from . import errors, pipeline, timeconv
 from .base import BaseAPI
+from .executor import run_parse
+from .models import PriceBar, build
+from .projection import FieldSelector
 
 logger = logging.getLogger("yahoo_finance_source")
 
@@ -60,6 +65,8 @@ class YahooFinanceSource(BaseAPI):
         end_date: str,
         interval: str = "1d",
         events: str = "",
+        compact: bool = False,
+        fields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """Get stock price data. Please set start_date, end_date, interval reasonably to avoid getting too much data,
         which could cause request timeout or performance issues.
@@ -70,6 +77,8 @@ class YahooFinanceSource(BaseAPI):
             end_date: End date in YYYY-MM-DD format
             interval: Time interval, options: 1m|2m|5m|15m|30m|60m|1d|1wk|1mo, default: 1d
             events: Event type, options: capitalGain|div|split|earn|history, default: empty
+            compact: Return price bars as memory-compact records (dict-like, convert with `.to_dict()`), default: False
+            fields: Only return these fields of each price bar, e.g. ["date", "close"], default: None (all fields)
 
         Returns:
             Dict[str, Any]: Dictionary containing stock price data, e.g.
@@ -124,56 +133,61 @@ class YahooFinanceSource(BaseAPI):
 
             request_url = f"{self.proxy_url}/stock/v3/get-chart"
 
-            # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # Parse the response
-                    data = await response.json()
+            # Send request through the request pipeline
+            body = await self._request("GET", request_url, params=params, headers=self.headers, timeout=self._timeout, decode=pipeline.DECODE_BYTES)
 
-            # Check if there is an error in API response
-            if data.get("chart", {}).get("error"):
-                return {"success": False, "error": str(data["chart"]["error"])}
-
-            # Parse response data
-            chart_data = data["chart"]["result"][0]
-            timestamps = chart_data["timestamp"]
-            quote = chart_data["indicators"]["quote"][0]
-
-            # Build price data list
-            prices = []
-            for i, timestamp in enumerate(timestamps):
-                price_data = {
-                    "date": datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d"),
-                    "open": quote["open"][i],
-                    "high": quote["high"][i],
-                    "low": quote["low"][i],
-                    "close": quote["close"][i],
-                    "volume": int(quote["volume"][i]),
-                }
-                prices.append(price_data)
+            # Parse the response, large charts (e.g. 1m interval) on the parse executor
+            return await run_parse(self._parse_chart_payload, body, symbol, compact, FieldSelector(fields), size=len(body))
 
-            return {"success": True, "data": {"symbol": symbol, "prices": prices}}
-
-        except asyncio.TimeoutError:
+        except asyncio.TimeoutError as e:
             error_msg = f"Request timeout (timeout={self._timeout}s)"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except aiohttp.ClientError as e:
             error_msg = f"HTTP request error: {str(e)}"
-            logger.error(error_msg)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
         except Exception as e:
-            logger.error(f"Error occurred while getting stock price data: {str(e)}")
-            logger.exception(e)
+            errors.log_failure(logger, f"Error occurred while getting stock price data: {str(e)}", e)
             return {"success": False, "error": f"Unknown error: {str(e)}"}
 
-    async def get_stock_news(self, symbol: str, region: str = "US", snippet_count: int = 10) -> Dict[str, Any]:
+    @staticmethod
+    def _parse_chart_payload(body: bytes, symbol: str, compact: bool, selector: FieldSelector) -> Dict[str, Any]:
+        """解码并解析 K 线响应，需可序列化以便在解析进程池中执行"""
+        data = json.loads(body)
+
+        # Check if there is an error in API response
+        if data.get("chart", {}).get("error"):
+            return {"success": False, "error": str(data["chart"]["error"])}
+
+        # Parse response data
+        chart_data = data["chart"]["result"][0]
+        timestamps = chart_data["timestamp"]
+        quote = chart_data["indicators"]["quote"][0]
+
+        # Build price data list; unrequested columns (and their date formatting) are skipped
+        compact = compact and selector.selects_all
+        missing = [None] * len(timestamps)
+        dates = timeconv.epochs_to_dates(timestamps) if selector.wants("date") else missing
+        opens, highs, lows, closes = (quote[name] if selector.wants(name) else missing for name in ("open", "high", "low", "close"))
+        volumes = [int(volume) for volume in quote["volume"]] if selector.wants("volume") else missing
+
+        prices = []
+        for i in range(len(timestamps)):
+            price_data = build(PriceBar, compact, date=dates[i], open=opens[i], high=highs[i], low=lows[i], close=closes[i], volume=volumes[i])
+            prices.append(price_data if selector.selects_all else selector.apply(price_data))
+
+        return {"success": True, "data": {"symbol": symbol, "prices": prices}}
+
+    async def get_stock_news(
+        self, symbol: str, region: str = "US", snippet_count: int = 10, fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
         """获取股票相关的新闻数据
         Args:
             symbol(str): Stock code
             region(str): Region code, defaults to US
             snippet_count(int): Number of news items to return, defaults to 10
+            fields(Optional[List[str]]): Only return these fields of each news item, e.g. ["title", "link"], defaults to None (all fields)
         Returns:
             Dict[str, Any]: Dictionary containing stock news data, e.g.
             {
@@ -204,76 +218,68 @@ class YahooFinanceSource(BaseAPI):
 
             # 发送POST请求
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    # 使用POST请求，并设置空数据体
-                    async with session.post(
-                        request_url,
-                        headers=self.headers,
-                        params=params,
-                        data="",  # load_more 逻辑，先不适配
-                        timeout=self._timeout,
-                    ) as response:
-                        response.raise_for_status()
-                        data = await response.json()
-
-                        # 提取并处理新闻数据 - 根据实际响应格式调整
-                        stream_items = []
-                        # 检查响应结构中的main.stream路径
-                        if data.get("data") and data["data"].get("main") and data["data"]["main"].get("stream"):
-                            stream_items = data["data"]["main"]["stream"]
-
-                        # 转换为简化的新闻对象列表
-                        simple_news = []
-                        for stream_item in stream_items:
-                            content = stream_item.get("content", {})
-                            if not content:
-                                continue
-
-                            # 获取链接
-                            link = ""
-                            click_through_url = content.get("clickThroughUrl", {})
-                            if click_through_url and click_through_url.get("url"):
-                                link = click_through_url["url"]
-
-                            # 获取发布者
-                            publisher = ""
-                            if content.get("provider") and content["provider"].get("displayName"):
-                                publisher = content["provider"]["displayName"]
-
-                            # 创建简化的新闻项
-                            news_item = {
-                                "title": content.get("title", ""),
-                                "publisher": publisher,
-                                "publish_date": content.get("pubDate", ""),
-                                "link": link,
-                                "uuid": content.get("id", ""),
-                                "content_type": content.get("contentType", ""),
-                                "thumbnail": self._extract_thumbnail(content.get("thumbnail", {})),
-                                "tickers": self._extract_tickers(content.get("finance", {})),
-                            }
-                            simple_news.append(news_item)
-
-                        # 返回结构化的新闻列表
-                        return {"success": True, "data": {"symbol": symbol, "simple_news": simple_news}}
+                # 使用POST请求，并设置空数据体（load_more 逻辑，先不适配）
+                data = await self._request("POST", request_url, params=params, headers=self.headers, data="", timeout=self._timeout)
+
+                # 提取并处理新闻数据 - 根据实际响应格式调整
+                stream_items = []
+                # 检查响应结构中的main.stream路径
+                if data.get("data") and data["data"].get("main") and data["data"]["main"].get("stream"):
+                    stream_items = data["data"]["main"]["stream"]
+
+                # 转换为简化的新闻对象列表
+                selector = FieldSelector(fields)
+                simple_news = []
+                for stream_item in stream_items:
+                    content = stream_item.get("content", {})
+                    if not content:
+                        continue
+
+                    # 获取链接
+                    link = ""
+                    click_through_url = content.get("clickThroughUrl", {})
+                    if click_through_url and click_through_url.get("url"):
+                        link = click_through_url["url"]
+
+                    # 获取发布者
+                    publisher = ""
+                    if content.get("provider") and content["provider"].get("displayName"):
+                        publisher = content["provider"]["displayName"]
+
+                    # 创建简化的新闻项
+                    news_item = {
+                        "title": content.get("title", ""),
+                        "publisher": publisher,
+                        "publish_date": content.get("pubDate", ""),
+                        "link": link,
+                        "uuid": content.get("id", ""),
+                        "content_type": content.get("contentType", ""),
+                    }
+                    if selector.wants("thumbnail"):
+                        news_item["thumbnail"] = self._extract_thumbnail(content.get("thumbnail", {}))
+                    if selector.wants("tickers"):
+                        news_item["tickers"] = self._extract_tickers(content.get("finance", {}))
+                    simple_news.append(selector.apply(news_item))
 
-            except asyncio.TimeoutError:
+                # 返回结构化的新闻列表
+                return {"success": True, "data": {"symbol": symbol, "simple_news": simple_news}}
+
+            except asyncio.TimeoutError as e:
                 error_msg = f"请求超时 (timeout={self._timeout}秒)"
-                logger.error(error_msg)
+                errors.log_failure(logger, error_msg, e)
                 return {"success": False, "error": error_msg}
             except aiohttp.ClientError as e:
                 error_msg = f"HTTP请求错误: {str(e)}"
-                logger.error(error_msg)
+                errors.log_failure(logger, error_msg, e)
                 return {"success": False, "error": error_msg}
             except Exception as e:
                 error_msg = f"获取股票新闻信息时发生错误: {str(e)}"
-                logger.error(error_msg)
-                logger.exception(e)
+                errors.log_failure(logger, error_msg, e)
                 return {"success": False, "error": error_msg}
 
         except Exception as e:
             error_msg = f"获取股票新闻信息时发生错误: {str(e)}"
-            logger.error(error_msg)
-            logger.exception(e)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
 
     def _extract_thumbnail(self, thumbnail_data: Dict[str, Any]) -> str:
@@ -315,11 +321,12 @@ class YahooFinanceSource(BaseAPI):
                     tickers.append(ticker_data["symbol"])
         return tickers
 
-    async def get_stock_info(self, symbol: str) -> Dict[str, Any]:
+    async def get_stock_info(self, symbol: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
         """Get basic stock information
 
         Args:
             symbol(str): Stock code. For Hong Kong stocks, use 4-digit format like 1211.HK (not 01211.HK). For Chinese stocks, use 6-digit format with .SS suffix for Shanghai stocks (e.g. 600009.SS) and .SZ suffix for Shenzhen stocks (e.g. 000002.SZ).
+            fields(Optional[List[str]]): Only return these fields, dotted paths allowed, e.g. ["market_cap", "fifty_two_week.high"], defaults to None (all fields)
 
         Returns:
             Dict[str, Any]: Dictionary containing basic stock information, e.g.
@@ -356,18 +363,15 @@ class YahooFinanceSource(BaseAPI):
 
             # Send request
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        response.raise_for_status()
-                        data = await response.json()
+                data = await self._request("GET", request_url, params=params, headers=self.headers, timeout=self._timeout)
 
-            except asyncio.TimeoutError:
+            except asyncio.TimeoutError as e:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
-                logger.error(error_msg)
+                errors.log_failure(logger, error_msg, e)
                 return {"success": False, "error": error_msg}
             except aiohttp.ClientError as e:
                 error_msg = f"HTTP request error: {str(e)}"
-                logger.error(error_msg)
+                errors.log_failure(logger, error_msg, e)
                 return {"success": False, "error": error_msg}
 
             # Check if there is an error in API response
@@ -379,7 +383,7 @@ class YahooFinanceSource(BaseAPI):
             # Parse response data
             summary_detail = data["quoteSummary"]["result"][0]["summaryDetail"]
 
-            return {
+            output = {
                 "success": True,
                 "data": {
                     "symbol": symbol,
@@ -402,11 +406,12 @@ class YahooFinanceSource(BaseAPI):
                     },
                 },
             }
+            output["data"] = FieldSelector(fields).apply(output["data"])
+            return output
 
         except Exception as e:
             error_msg = f"Error occurred while getting stock financial data: {str(e)}"
-            logger.error(error_msg)
-            logger.exception(e)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
 
     async def get_multiple_stocks_price(
@@ -416,6 +421,8 @@ class YahooFinanceSource(BaseAPI):
         end_date: str,
         interval: str = "1d",
         events: str = "",
+        compact: bool = False,
+        fields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """Get price data for multiple stocks
 
@@ -425,6 +432,8 @@ class YahooFinanceSource(BaseAPI):
             end_date(str): End date in YYYY-MM-DD format
             interval(str): Time interval, options: 1m|2m|5m|15m|30m|60m|1d|1wk|1mo, default: 1d
             events(str): Event type, options: capitalGain|div|split|earn|history, default: empty
+            compact(bool): Return price bars as memory-compact records (dict-like, convert with `.to_dict()`), default: False
+            fields(Optional[List[str]]): Only return these fields of each price bar, e.g. ["date", "close"], default: None (all fields)
 
         Returns:
             Dict[str, Any]: Dictionary containing stock price data, e.g.
@@ -473,7 +482,13 @@ class YahooFinanceSource(BaseAPI):
             for symbol in symbols:
                 try:
                     result = await self.get_stock_price(
-                        symbol=symbol, start_date=start_date, end_date=end_date, interval=interval, events=events
+                        symbol=symbol,
+                        start_date=start_date,
+                        end_date=end_date,
+                        interval=interval,
+                        events=events,
+                        compact=compact,
+                        fields=fields,
                     )
                     if result["success"]:
                         stocks_data.append(result["data"])
@@ -482,8 +497,7 @@ class YahooFinanceSource(BaseAPI):
                         logger.warning(f"Failed to get data for stock {symbol}: {result['error']}")
                 except Exception as e:
                     failed_symbols.append((symbol, str(e)))
-                    logger.error(f"Error occurred while getting data for stock {symbol}: {str(e)}")
-                    logger.exception(e)
+                    errors.log_failure(logger, f"Error occurred while getting data for stock {symbol}: {str(e)}", e)
 
             # If all stocks fail to get data
             if len(failed_symbols) == len(symbols):
@@ -501,15 +515,15 @@ class YahooFinanceSource(BaseAPI):
             }
 
         except Exception as e:
-            logger.error(f"Error occurred while batch getting stock data: {str(e)}")
-            logger.exception(e)
+            errors.log_failure(logger, f"Error occurred while batch getting stock data: {str(e)}", e)
             return {"success": False, "error": str(e)}
 
-    async def get_stock_insights(self, symbol: str) -> Dict[str, Any]:
+    async def get_stock_insights(self, symbol: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
         """Get stock insight data, including technical analysis, valuation, and company snapshot
 
         Args:
             symbol(str): Stock code
+            fields(Optional[List[str]]): Only return these fields, dotted paths allowed, e.g. ["recommendation.rating"], default None (all fields)
 
         Returns:
             Dict[str, Any]: Dictionary containing stock insight data, e.g.
@@ -568,16 +582,12 @@ class YahooFinanceSource(BaseAPI):
             params = {"symbol": symbol}
 
             # Send request
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                try:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # Check response status
-                        response.raise_for_status()
-                        data = await response.json()
-                except asyncio.TimeoutError:
-                    return {"success": False, "error": f"Request timeout (timeout={self._timeout}s)"}
-                except aiohttp.ClientError as e:
-                    return {"success": False, "error": f"HTTP request error: {str(e)}"}
+            try:
+                data = await self._request("GET", request_url, params=params, headers=self.headers, timeout=self._timeout)
+            except asyncio.TimeoutError:
+                return {"success": False, "error": f"Request timeout (timeout={self._timeout}s)"}
+            except aiohttp.ClientError as e:
+                return {"success": False, "error": f"HTTP request error: {str(e)}"}
 
             # Check if there is an error in API response
             if data.get("finance", {}).get("error"):
@@ -593,7 +603,7 @@ class YahooFinanceSource(BaseAPI):
             recommendation = result.get("recommendation", {})
 
             # Build return data
-            return {
+            output = {
                 "success": True,
                 "data": {
                     "symbol": symbol,
@@ -628,19 +638,23 @@ class YahooFinanceSource(BaseAPI):
                     },
                 },
             }
+            output["data"] = FieldSelector(fields).apply(output["data"])
+            return output
 
         except Exception as e:
-            logger.error(f"Error occurred while getting stock insight data: {str(e)}")
-            logger.exception(e)
+            errors.log_failure(logger, f"Error occurred while getting stock insight data: {str(e)}", e)
             return {"success": False, "error": str(e)}
 
-    async def get_stock_statistics(self, symbol: str, region: Optional[str] = None, lang: Optional[str] = None) -> Dict[str, Any]:
+    async def get_stock_statistics(
+        self, symbol: str, region: Optional[str] = None, lang: Optional[str] = None, fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
         """Get stock statistics data, including valuation metrics, financial ratios, and shareholder information
 
         Args:
             symbol(str): Stock code
             region(str): Region code, options: US, HK, CN, etc.
             lang(str): Language code, options: en-US, zh-CN, etc.
+            fields(Optional[List[str]]): Only return these fields, dotted paths allowed, e.g. ["stock_metrics.beta"], default None (all fields)
 
         Returns:
             Dict[str, Any]: Dictionary containing stock statistics data, e.g.
@@ -709,16 +723,12 @@ class YahooFinanceSource(BaseAPI):
                 params["lang"] = lang
 
             # Send request
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                try:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # Check response status
-                        response.raise_for_status()
-                        data = await response.json()
-                except asyncio.TimeoutError:
-                    return {"success": False, "error": f"Request timeout (timeout={self._timeout}s)"}
-                except aiohttp.ClientError as e:
-                    return {"success": False, "error": f"HTTP request error: {str(e)}"}
+            try:
+                data = await self._request("GET", request_url, params=params, headers=self.headers, timeout=self._timeout)
+            except asyncio.TimeoutError:
+                return {"success": False, "error": f"Request timeout (timeout={self._timeout}s)"}
+            except aiohttp.ClientError as e:
+                return {"success": False, "error": f"HTTP request error: {str(e)}"}
 
             # Check if there is an error in API response
             if data.get("quoteSummary", {}).get("error"):
@@ -728,7 +738,7 @@ class YahooFinanceSource(BaseAPI):
             stats = data["quoteSummary"]["result"][0]["defaultKeyStatistics"]
 
             # Build return data
-            return {
+            output = {
                 "success": True,
                 "data": {
                     "symbol": symbol,
@@ -766,17 +776,19 @@ class YahooFinanceSource(BaseAPI):
                     },
                 },
             }
+            output["data"] = FieldSelector(fields).apply(output["data"])
+            return output
 
         except Exception as e:
-            logger.error(f"Error occurred while getting stock statistics data: {str(e)}")
-            logger.exception(e)
+            errors.log_failure(logger, f"Error occurred while getting stock statistics data: {str(e)}", e)
             return {"success": False, "error": str(e)}
 
-    async def get_financial_data(self, symbol: str) -> Dict[str, Any]:
+    async def get_financial_data(self, symbol: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
         """Get stock financial data
 
         Args:
             symbol(str): Stock code
+            fields(Optional[List[str]]): Only return these fields, dotted paths allowed, e.g. ["price.current"], default None (all fields)
 
         Returns:
             Dict[str, Any]: Dictionary containing stock financial data, e.g.
@@ -852,18 +864,15 @@ class YahooFinanceSource(BaseAPI):
 
             # Send request
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        response.raise_for_status()
-                        data = await response.json()
+                data = await self._request("GET", request_url, params=params, headers=self.headers, timeout=self._timeout)
 
-            except asyncio.TimeoutError:
+            except asyncio.TimeoutError as e:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
-                logger.error(error_msg)
+                errors.log_failure(logger, error_msg, e)
                 return {"success": False, "error": error_msg}
             except aiohttp.ClientError as e:
                 error_msg = f"Request failed: {str(e)}"
-                logger.error(error_msg)
+                errors.log_failure(logger, error_msg, e)
                 return {"success": False, "error": error_msg}
 
             # Check if there is an error in API response
@@ -875,7 +884,7 @@ class YahooFinanceSource(BaseAPI):
             # Parse response data
             financial_data = data["quoteSummary"]["result"][0]["financialData"]
 
-            return {
+            output = {
                 "success": True,
                 "data": {
                     "symbol": symbol,
@@ -922,9 +931,10 @@ class YahooFinanceSource(BaseAPI):
                     "currency": financial_data.get("financialCurrency", "USD"),
                 },
             }
+            output["data"] = FieldSelector(fields).apply(output["data"])
+            return output
 
         except Exception as e:
             error_msg = f"Error occurred while getting stock financial data: {str(e)}"
-            logger.error(error_msg)
-            logger.exception(e)
+            errors.log_failure(logger, error_msg, e)
             return {"success": False, "error": error_msg}
@@ -2,18 +2,33 @@ import asyncio
 import json
 import os
 import uuid
-from typing import Any, Dict, List, Optional, cast
+import weakref
+from typing import Any, Coroutine, Dict, List, Optional, Set, Tuple, cast
 
 import aiohttp
 from pydantic import BaseModel
 
+from external_api.data_sources import errors, tracing
+from external_api.data_sources.instrumentation import run_instrumented, session_trace_configs
+
 ENV_AGENT_NAME = "AGENT_NAME"
 ENV_FUNC_SERVER_PORT = "FUNC_SERVER_PORT"
+# FunctionProxy 到 function server 的传输方式: per_call / pooled / batched
+ENV_FUNC_PROXY_TRANSPORT = "FUNC_PROXY_TRANSPORT"
 MCP_FUNCTION_LIST_JSON_FILE = "mcp_function_list.json"
 
 SERVER_PORT = 12306
 PROXY_TIMEOUT = 3600
 
+# per_call: 每次调用新建会话；pooled: 同一事件循环内复用连接池；
+# batched: 在 pooled 基础上将同时发出的调用合并发往 /execute_batch，目前只有 benchmarks/function_proxy.py 的桩服务实现了该接口，
+# 探测到接口存在之前以及 function server 不支持时（404/405）按 pooled 逐个调用
+PROXY_TRANSPORTS = ("per_call", "pooled", "batched")
+POOL_SIZE = 100
+BATCH_MAX_SIZE = 32
+BATCH_MAX_DELAY = 0.002
+BATCH_PROBE_TIMEOUT = 10
+
 
 class ToolResult(BaseModel):
     """工具结果"""
@@ -32,6 +47,9 @@ class FunctionProxy:
         self.agent_name: str = os.environ.get(ENV_AGENT_NAME, "")
         self.server_port = SERVER_PORT
         self.timeout: int = PROXY_TIMEOUT
+        self.transport: str = os.environ.get(ENV_FUNC_PROXY_TRANSPORT, "per_call")
+        if self.transport not in PROXY_TRANSPORTS:
+            raise ValueError(f"Unknown {ENV_FUNC_PROXY_TRANSPORT} {self.transport!r}, expected one of {PROXY_TRANSPORTS}")
 
     def get_server_url(self):
         if self.server_port == 0:
@@ -39,6 +57,10 @@ class FunctionProxy:
         return f"http://localhost:{self.server_port}"
 
     async def __call__(self, *args, **kwargs) -> ToolResult:
+        # 记录调用延迟、错误率与字节数等指标
+        return await run_instrumented(f"function.{self.name}", self._call, *args, **kwargs)
+
+    async def _call(self, *args, **kwargs) -> ToolResult:
         call_params = kwargs.copy()
         args_len = len(args)
 
@@ -50,40 +72,63 @@ class FunctionProxy:
                 if i < self.params_len:
                     call_params[self.params[i]["name"]] = args[i]
 
-        request = {
-            "request_id": str(uuid.uuid4()),
+        request_id = str(uuid.uuid4())
+        request: Dict[str, Any] = {
+            "request_id": request_id,
             "function_name": self.origin_name or self.name,
             "function_kind": self.kind,
             "caller_name": self.agent_name,
             "parameters": call_params,
         }
 
+        # 请求ID附加到 trace，并通过请求头传递给 function server；调用结束后恢复，避免泄漏到后续请求
+        token = tracing.bind_request_id(request_id)
+        try:
+            return await self._execute(request)
+        finally:
+            tracing.current_request_id.reset(token)
+
+    async def _execute(self, request: Dict[str, Any]) -> ToolResult:
+        """发送一次函数调用请求并转换结果"""
         # 发出请求前的拦截
         tool_result = self._intercept_request(self.name, request)
         if tool_result is not None:
             return tool_result
 
+        try:
+            status, body = await self._send(request)
+            if status != 200:
+                errors.record(errors.classify_status(status))
+                return ToolResult(is_error=True, message=f"Function call failed: {body.decode('utf-8', errors='replace')}")
+
+            result = json.loads(body)
+            if result.get("is_error", False):
+                return ToolResult(is_error=True, message=result.get("message", "Unknown error"))
+
+            tool_result = ToolResult(is_error=False, message=result.get("message", "succeed"))
+            return self._intercept_response(self.name, request, tool_result)
+        except asyncio.TimeoutError:
+            errors.record(errors.ErrorKind.TIMEOUT)
+            error_msg = f"Timeout when calling function {self.name}"
+            return ToolResult(is_error=True, message=error_msg)
+        except Exception as e:
+            # 只为解析/内部错误附带截断的堆栈，连接失败等上游故障不格式化堆栈
+            errors.record(errors.classify(e))
+            return ToolResult(is_error=True, message=errors.format_error(e))
+
+    async def _send(self, request: Dict[str, Any]) -> Tuple[int, bytes]:
+        """按配置的传输方式发送请求，返回 (状态码, 响应体)"""
         timeout = aiohttp.ClientTimeout(total=self.timeout)
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            try:
-                async with session.post(f"{self.get_server_url()}/execute", json=request) as response:
-                    if response.status != 200:
-                        return ToolResult(is_error=True, message=f"Function call failed: {await response.text()}")
-
-                    result = await response.json()
-                    if result.get("is_error", False):
-                        return ToolResult(is_error=True, message=result.get("message", "Unknown error"))
-
-                    tool_result = ToolResult(is_error=False, message=result.get("message", "succeed"))
-                    return self._intercept_response(self.name, request, tool_result)
-            except asyncio.TimeoutError:
-                error_msg = f"Timeout when calling function {self.name}"
-                return ToolResult(is_error=True, message=error_msg)
-            except Exception as e:
-                import traceback
-
-                error_msg = f"Error: {str(e)}\nTraceback:\n{traceback.format_exc()}"
-                return ToolResult(is_error=True, message=error_msg)
+        if self.transport == "batched":
+            return await _get_batcher(self.get_server_url()).submit(request, timeout)
+
+        if self.transport == "pooled":
+            async with _get_pooled_session().post(f"{self.get_server_url()}/execute", json=request, timeout=timeout) as response:
+                return response.status, await response.read()
+
+        async with aiohttp.ClientSession(timeout=timeout, trust_env=True, trace_configs=session_trace_configs()) as session:
+            async with session.post(f"{self.get_server_url()}/execute", json=request) as response:
+                return response.status, await response.read()
 
     def _intercept_request(self, function_name: str, request: Dict[str, Any]) -> Optional[ToolResult]:
         if self.kind == "agent" and self.agent_name and "planner" not in self.agent_name:
@@ -97,6 +142,151 @@ class FunctionProxy:
         return result
 
 
+# 每个事件循环一个连接池会话 / 批处理器，会话不能跨事件循环使用
+_pooled_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, _ExecuteBatcher]]" = weakref.WeakKeyDictionary()
+
+
+def _get_pooled_session() -> aiohttp.ClientSession:
+    loop = asyncio.get_running_loop()
+    session = _pooled_sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=POOL_SIZE), trust_env=True, trace_configs=session_trace_configs()
+        )
+        _pooled_sessions[loop] = session
+    return session
+
+
+class _ExecuteBatcher:
+    """
+    将同一事件循环内同时发出的调用合并为一次 /execute_batch 请求
+
+    请求体为 {"requests": [...]}，响应为 {"results": [...]}，与请求一一对应；
+    首次使用时先探测批量接口（空批次），探测完成前及 function server 不支持批量接口（404/405）时逐个调用 /execute
+    """
+
+    def __init__(self, server_url: str):
+        self.server_url = server_url
+        # None: 尚未探测
+        self.supported: Optional[bool] = None
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future, aiohttp.ClientTimeout]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # 持有探测及发送中的批次任务，避免任务在完成前被垃圾回收
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, request: Dict[str, Any], timeout: aiohttp.ClientTimeout) -> Tuple[int, bytes]:
+        if self.supported is None and not self._tasks:
+            self._start(self._probe())
+        if not self.supported:
+            return await self._execute(request, timeout)
+
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._pending.append((request, future, timeout))
+        if len(self._pending) >= BATCH_MAX_SIZE:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(BATCH_MAX_DELAY, self._flush)
+        return await asyncio.wait_for(asyncio.shield(future), timeout.total)
+
+    def _start(self, coro: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _probe(self) -> None:
+        try:
+            timeout = aiohttp.ClientTimeout(total=BATCH_PROBE_TIMEOUT)
+            async with _get_pooled_session().post(f"{self.server_url}/execute_batch", json={"requests": []}, timeout=timeout) as response:
+                self.supported = response.status == 200
+        except Exception:
+            # 下一次调用重新探测
+            return
+
+    async def _execute(self, request: Dict[str, Any], timeout: aiohttp.ClientTimeout) -> Tuple[int, bytes]:
+        async with _get_pooled_session().post(f"{self.server_url}/execute", json=request, timeout=timeout) as response:
+            return response.status, await response.read()
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self._start(self._send_batch(batch))
+
+    def close(self) -> None:
+        """取消探测及发送中的批次，等待中的调用以 CancelledError 结束"""
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def _send_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future, aiohttp.ClientTimeout]]) -> None:
+        # 批次的超时取其中最长的调用超时，与逐个调用时一致
+        timeout = max((item_timeout for _, _, item_timeout in batch), key=lambda item: item.total or 0)
+        try:
+            payload = {"requests": [request for request, _, _ in batch]}
+            async with _get_pooled_session().post(f"{self.server_url}/execute_batch", json=payload, timeout=timeout) as response:
+                if response.status in (404, 405):
+                    self.supported = False
+                    results = None
+                elif response.status != 200:
+                    body = await response.read()
+                    results = [(response.status, body)] * len(batch)
+                else:
+                    data = await response.json()
+                    results = [(200, json.dumps(item).encode("utf-8")) for item in data["results"]]
+                    if len(results) != len(batch):
+                        # 结果与请求无法对应，整批失败
+                        raise ValueError(f"/execute_batch returned {len(results)} results for {len(batch)} requests")
+
+            if results is None:
+                # 批量接口不可用，并发逐个发送，每个结果各自返回
+                await asyncio.gather(*(self._execute_into(request, future, item_timeout) for request, future, item_timeout in batch))
+                return
+
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # 取消等情况下也不能留下永远等待的调用
+            for _, future, _ in batch:
+                if not future.done():
+                    future.cancel()
+
+    async def _execute_into(self, request: Dict[str, Any], future: asyncio.Future, timeout: aiohttp.ClientTimeout) -> None:
+        try:
+            result = await self._execute(request, timeout)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+
+def _get_batcher(server_url: str) -> _ExecuteBatcher:
+    batchers = _batchers.setdefault(asyncio.get_running_loop(), {})
+    batcher = batchers.get(server_url)
+    if batcher is None:
+        batcher = batchers[server_url] = _ExecuteBatcher(server_url)
+    return batcher
+
+
+async def close_function_transports() -> None:
+    """关闭当前事件循环中 pooled / batched 传输使用的连接池"""
+    loop = asyncio.get_running_loop()
+    for batcher in _batchers.pop(loop, {}).values():
+        batcher.close()
+    session = _pooled_sessions.pop(loop, None)
+    if session is not None:
+        await session.close()
+
+
 def load_function_proxys(file_path: str) -> tuple[List[Dict[str, Any]], Dict[str, FunctionProxy]]:
     # 加载 function_list.json 并创建 function proxies
     with open(file_path, "r", encoding="utf-8") as f: